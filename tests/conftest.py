@@ -1,6 +1,9 @@
+import pathlib
 import sys
 import pytest
 
+DATASET = pathlib.Path(__file__).parent / "fixtures" / "persons.json"
+
 
 # each test runs on cwd to its temp dir
 @pytest.fixture(autouse=True)
@@ -12,3 +15,44 @@ def go_to_tmpdir(request):
     # Chdir only for the duration of the test.
     with tmpdir.as_cwd():
         yield
+
+
+# each test gets a fresh rate limiter and circuit breaker, so failures in one
+# test cannot open the breaker for the next
+@pytest.fixture(autouse=True)
+def fresh_resilience_policy():
+    from wikipedia_name_query.resilience import ResiliencePolicy, configure_policy
+    configure_policy(ResiliencePolicy())
+    yield
+
+
+# each test starts with an empty shared Person record cache
+@pytest.fixture(autouse=True)
+def fresh_person_records():
+    from wikipedia_name_query.person import RECORDS
+    RECORDS.clear()
+    yield
+
+
+# each test gets its own result cache, so nothing is read from or written to
+# the real cache under $HOME
+@pytest.fixture(autouse=True)
+def isolated_result_cache(tmp_path, monkeypatch):
+    from wikipedia_name_query import backends, cache
+    monkeypatch.setenv(cache.CACHE_PATH_ENV, str(tmp_path / "cache.db"))
+    cache.configure_cache()
+    monkeypatch.setattr(backends, "_default_query", None)
+    yield
+    cache.configure_cache()
+
+
+# the stand-in SPARQL endpoint serving tests/fixtures/persons.json, with the
+# shared client pointed at it, so lookups never reach the live DBpedia
+@pytest.fixture
+def server():
+    from wikipedia_name_query import sparql
+    from wikipedia_name_query.stub_server import StubSPARQLServer
+    with StubSPARQLServer.from_file(DATASET) as stub:
+        sparql.configure_client(endpoint=stub.url)
+        yield stub
+    sparql.configure_client(endpoint=sparql.ENDPOINT)
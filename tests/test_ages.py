@@ -0,0 +1,42 @@
+import numpy as np
+from wikipedia_name_query.ages import NO_AGE, calculate_ages
+from wikipedia_name_query.person import Person
+from wikipedia_name_query.records import PersonTable
+
+
+def test_ages_respect_birthdays():
+    """
+    Tests that a year is only counted once the birthday has passed
+    """
+    births = ["2000-06-15", "2000-06-15", "2000-06-15", "2000-02-29"]
+    deaths = ["2010-06-14", "2010-06-15", None, None]
+    ages = calculate_ages(births, deaths, as_of="2004-02-28")
+    assert ages.tolist() == [9, 10, 3, 3]
+
+
+def test_missing_birth_date():
+    """
+    Tests that a missing birth date gives NO_AGE instead of failing
+    """
+    ages = calculate_ages(np.array(["NaT", "1990-01-01"], dtype="datetime64[D]"), as_of="2020-01-01")
+    assert ages.tolist() == [NO_AGE, 30]
+
+
+def test_scalar_wrapper():
+    """
+    Tests that calculate_age agrees with the batch API
+    """
+    assert Person.calculate_age("1815-12-10", "1852-11-27") == 36
+    assert Person.calculate_age("1938-01-10") == calculate_ages(["1938-01-10"])[0]
+
+
+def test_table_ages():
+    """
+    Tests computing ages straight from a table's date columns
+    """
+    table = PersonTable.from_rows([
+        ["Ada Lovelace", "1815-12-10", "1852-11-27"],
+        ["Donald Knuth", "1938-01-10", None],
+        ["Nobody", None, None],
+    ])
+    assert table.ages(as_of="2020-01-10").tolist() == [36, 82, NO_AGE]
@@ -1,5 +1,6 @@
 import pytest
 from unittest.mock import MagicMock
+from textual.worker import WorkerCancelled
 from wikipedia_name_query.TUI.query_app import QueryApp
 from wikipedia_name_query.input_database import Database
 
@@ -49,3 +50,41 @@ def test_theme_toggle(app):
     initial_theme = app.theme
     app.action_toggle_dark()  # Simulate theme toggle
     assert app.theme != initial_theme, f"Theme did not toggle. Expected different from {initial_theme}"
+
+
+async def settle(pilot):
+    """Wait for the app's workers to finish, ignoring those replaced by a later one."""
+    await pilot.pause()
+    for worker in list(pilot.app.workers):
+        try:
+            await worker.wait()
+        except WorkerCancelled:
+            pass
+
+
+@pytest.mark.asyncio
+async def test_new_names_follow_the_active_search(tmpdir):
+    """Test that imported names are loaded once, and only shown if they match an active search."""
+    db = Database(str(tmpdir / "names.db"))
+    db.add_names(["Ada Lovelace", "Alan Turing"])
+    app = QueryApp(db=db)
+    async with app.run_test() as pilot:
+        await settle(pilot)
+        table = app.query_one("#output-table")
+        assert table.row_count == 2
+
+        app.query_one("#search").value = "ada"
+        await settle(pilot)
+        db.add_names(["Ada Yonath", "Grace Hopper"])
+        app._show_new_names()
+        await settle(pilot)
+        assert sorted(table.get_row_at(row)[0] for row in range(table.row_count)) == ["Ada Lovelace", "Ada Yonath"]
+
+        app.query_one("#search").value = ""
+        await settle(pilot)
+        db.add_names(["Kurt Gödel"])
+        app._show_new_names()
+        app._show_new_names()
+        await settle(pilot)
+        assert table.row_count == 5
+    db.close()
@@ -0,0 +1,65 @@
+import asyncio
+import pytest
+from wikipedia_name_query.async_query import AsyncQuery
+from wikipedia_name_query.cache import ResultCache
+from wikipedia_name_query.person import Person
+
+
+def make_query(monkeypatch, delay=0.01, **kwargs):
+    """
+    Builds an AsyncQuery whose endpoint is replaced by a slow fake that records concurrency
+    """
+    query = AsyncQuery(cache=ResultCache(), **kwargs)
+    query.in_flight = query.peak = query.calls = 0
+
+    async def fake_send(sparql):
+        query.calls += 1
+        query.in_flight += 1
+        query.peak = max(query.peak, query.in_flight)
+        await asyncio.sleep(delay)
+        query.in_flight -= 1
+        return [{"name": {"value": "Donald Knuth"}, "birthDate": {"value": "1938-01-10"}}]
+
+    monkeypatch.setattr(query, "_send", fake_send)
+    return query
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded(monkeypatch):
+    """
+    Tests that no more than max_concurrency lookups are in flight at once
+    """
+    query = make_query(monkeypatch, max_concurrency=4)
+    names = [f"Person {i}" for i in range(20)]
+
+    async with asyncio.timeout(5):
+        output = await query.get_people_info(names)
+
+    assert len(output) == 20
+    assert query.calls == 20
+    assert query.peak == 4
+
+
+@pytest.mark.asyncio
+async def test_aload_uses_shared_query(monkeypatch):
+    """
+    Tests that Person.aload fills in the attributes and repeat loads hit the cache
+    """
+    query = make_query(monkeypatch)
+    person = Person("Donald Knuth")
+    await person.aload(query)
+    await Person("donald knuth").aload(query)
+
+    assert person.fullname == "Donald Knuth"
+    assert person.dob == "1938-01-10"
+    assert query.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_request_timeout(monkeypatch):
+    """
+    Tests that a request slower than the timeout is cancelled
+    """
+    query = make_query(monkeypatch, delay=1, timeout=0.01)
+    with pytest.raises(TimeoutError):
+        await query.get_person_info("Donald Knuth")
@@ -0,0 +1,156 @@
+import sqlite3
+import threading
+import pytest
+from wikipedia_name_query.cache import (
+    CACHE_PATH_ENV, MISSING, LRUCache, ResultCache, SQLiteCache, configure_cache, get_default_cache,
+)
+from wikipedia_name_query.query import Query
+
+
+@pytest.fixture
+def cache():
+    """
+    Two-tier cache with a tiny memory tier and an on-disk tier in the temp dir
+    """
+    return ResultCache(memory=LRUCache(maxsize=2), disk=SQLiteCache("cache.db"))
+
+
+def test_lru_evicts_oldest():
+    """
+    Tests that the least recently used entry is dropped first
+    """
+    lru = LRUCache(maxsize=2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    lru.get("a")
+    lru.set("c", 3)
+    assert lru.get("b") is MISSING
+    assert lru.get("a") == 1
+    assert lru.evictions == 1
+
+
+def test_disk_hit_after_eviction(cache):
+    """
+    Tests that entries evicted from memory are still served from disk
+    """
+    for key in ("a", "b", "c"):
+        cache.set(key, [[key, "1938-01-10", None]])
+    assert cache.get("a") == [["a", "1938-01-10", None]]
+    assert cache.stats.as_dict() == {
+        "hits": 1, "memory_hits": 0, "disk_hits": 1, "misses": 0, "evictions": 2,
+    }
+
+
+def test_cached_none_is_a_hit(cache):
+    """
+    Tests that a cached "not found" result is not treated as a miss
+    """
+    cache.set("google", None)
+    assert cache.get("google") is None
+    assert cache.get("nobody") is MISSING
+    assert cache.stats.misses == 1
+
+
+def test_ttl_expiry():
+    """
+    Tests that on-disk entries older than the ttl are ignored and purged
+    """
+    disk = SQLiteCache("cache.db", ttl=-1)
+    disk.set("a", 1)
+    assert disk.get("a") is MISSING
+    assert disk.purge_expired() == 1
+
+
+def test_memory_ttl_expiry():
+    """
+    Tests that in-memory entries expire with the same ttl but are still served stale
+    """
+    lru = LRUCache(ttl=60)
+    lru.set("a", 1)
+    lru.set("b", 2, stored_at=0)
+    assert lru.get("a") == 1
+    assert lru.get("b") is MISSING
+    assert lru.get_stale("b") == 2
+
+    cache = ResultCache(disk=SQLiteCache("cache.db", ttl=60))
+    assert cache.memory.ttl == 60
+    cache.memory.set("c", 3, stored_at=0)
+    assert cache.get("c") is MISSING
+    assert cache.get_stale("c") == 3
+
+
+def test_disk_hit_keeps_its_age(cache):
+    """
+    Tests that an entry promoted from disk expires when the disk copy would
+    """
+    cache.memory.ttl = cache.disk.ttl
+    cache.set("a", 1)
+    cache.memory.clear()
+    entry = cache.disk.get_entry("a")
+    assert cache.get("a") == 1
+    assert cache.memory._data["a"] == (1, entry[1])
+
+
+def test_stats_are_thread_safe():
+    """
+    Tests that counters updated from many threads are not lost
+    """
+    cache = ResultCache()
+
+    def miss():
+        for _ in range(1000):
+            cache.get("nobody")
+
+    threads = [threading.Thread(target=miss) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.stats.misses == 8000
+
+
+def test_query_uses_cache(cache, monkeypatch):
+    """
+    Tests that Query only fetches once per normalized name and refreshes on request
+    """
+    calls = []
+
+    def fake_fetch(person_name):
+        calls.append(person_name)
+        return [["Donald Knuth", "1938-01-10", None]]
+
+    query = Query(cache=cache)
+    monkeypatch.setattr(query, "_fetch_person_info", fake_fetch)
+    query.get_person_info("Donald Knuth")
+    query.get_person_info("  donald   KNUTH ")
+    assert calls == ["Donald Knuth"]
+
+    query.get_person_info("Donald Knuth", refresh=True)
+    query.invalidate("Donald Knuth")
+    query.get_person_info("Donald Knuth")
+    assert len(calls) == 3
+
+
+def test_default_cache_location(tmp_path, monkeypatch):
+    """
+    Tests that the shared cache lives where the environment or configure_cache says
+    """
+    monkeypatch.setenv(CACHE_PATH_ENV, str(tmp_path / "env.db"))
+    configure_cache()
+    assert get_default_cache().disk.path == str(tmp_path / "env.db")
+
+    configure_cache(tmp_path / "cli.db")
+    assert get_default_cache().disk.path == str(tmp_path / "cli.db")
+    assert (tmp_path / "cli.db").exists()
+
+
+def test_configure_cache_closes_old_cache(tmp_path):
+    """
+    Tests that reconfiguring the shared cache closes the old connection
+    """
+    configure_cache(tmp_path / "old.db")
+    old = get_default_cache()
+    configure_cache(tmp_path / "new.db")
+    with pytest.raises(sqlite3.ProgrammingError):
+        old.disk.get("a")
+    assert get_default_cache() is not old
@@ -0,0 +1,53 @@
+from datetime import date
+import pytest
+from wikipedia_name_query.dates import XSDDate, civil_from_days, format_days, parse_date, to_days
+from wikipedia_name_query.person import Person
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("1938-01-10", XSDDate(1938, 1, 10)),
+    ("1938-01-10Z", XSDDate(1938, 1, 10)),
+    ("1938-01-10+02:00", XSDDate(1938, 1, 10)),
+    ("1938-01-10T00:00:00Z", XSDDate(1938, 1, 10)),
+    ("-0384-06-01", XSDDate(-384, 6, 1)),
+    ("1938-01", XSDDate(1938, 1, None)),
+    ("1938", XSDDate(1938, None, None)),
+    ("--01-10", XSDDate(None, 1, 10)),
+])
+def test_parse_date(value, expected):
+    """
+    Tests the fast path and every tolerated xsd form
+    """
+    assert parse_date(value) == expected
+
+
+@pytest.mark.parametrize("value", [None, "", "unknown", "1938-13-01", "1938-02-30", "1900-02-29", "1938-1-10", "19380110",
+                                   "1938-0²-10", "1938-0٣-10", "١٩٣٨-01-10", "١٩٣٨", "--0٣-10"])
+def test_invalid_dates(value):
+    """
+    Tests that malformed values parse to None instead of raising
+    """
+    assert parse_date(value) is None
+
+
+def test_days_agree_with_datetime():
+    """
+    Tests the day arithmetic against the standard library over its whole range
+    """
+    epoch = date(1970, 1, 1).toordinal()
+    for ordinal in range(1, date.max.toordinal(), 997):
+        day = date.fromordinal(ordinal)
+        days = ordinal - epoch
+        assert to_days(day.isoformat()) == days
+        assert civil_from_days(days) == (day.year, day.month, day.day)
+    assert format_days(to_days("-0384-06-01")) == "-0384-06-01"
+    assert to_days("--01-10") is None
+
+
+def test_age_from_unusual_dates():
+    """
+    Tests that ages survive BCE and timezone dates, and malformed ones give None
+    """
+    assert Person.calculate_age("-0384-06-01", "-0322-10-01") == 62
+    assert Person.calculate_age("1815-12-10Z", "1852-11-27Z") == 36
+    assert Person.calculate_age("sometime") is None
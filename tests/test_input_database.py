@@ -0,0 +1,332 @@
+import sqlite3
+import threading
+import time
+import pytest
+from wikipedia_name_query.input_database import (
+    MIGRATIONS, STATUS_FOUND, STATUS_NOT_FOUND, Added, Database, Resolved,
+)
+from wikipedia_name_query.records import PersonRecord
+
+
+@pytest.fixture
+def db(tmpdir):
+    """Fixture to provide an empty database in a temporary file."""
+    database = Database(str(tmpdir / "names.db"))
+    yield database
+    database.close()
+
+
+def test_migrations_upgrade_an_old_database(tmpdir):
+    """
+    Tests that a database created before versioning keeps its names and gains the new tables
+    """
+    path = str(tmpdir / "old.db")
+    old = sqlite3.connect(path)
+    old.execute("CREATE TABLE names(id INTEGER PRIMARY KEY, name TEXT NOT NULL);")
+    old.execute("INSERT INTO names (name) VALUES ('Ada Lovelace');")
+    old.commit()
+    old.close()
+
+    db = Database(path)
+    assert db.version == len(MIGRATIONS)
+    assert db.get_all_names() == [(1, "Ada Lovelace")]
+    assert db.get_resolved([1]) == {}
+    db.close()
+    # Opening it again applies nothing.
+    assert Database(path).version == len(MIGRATIONS)
+
+
+def test_save_and_get_resolved(db):
+    """
+    Tests that resolved results are stored, replaced and read back in bulk
+    """
+    for name in ("Ada Lovelace", "Nobody Atall", "Alan Turing"):
+        db.add_name(name)
+    ada = PersonRecord("Ada Lovelace", "1815-12-10", "1852-11-27", "http://dbpedia.org/resource/Ada_Lovelace")
+    db.save_resolved([
+        Resolved.from_record(1, ada, fetched_at=100.0),
+        Resolved.from_record(2, None, fetched_at=100.0),
+    ])
+    stored = db.get_resolved([1, 2, 3])
+    assert set(stored) == {1, 2}
+    assert stored[1].status == STATUS_FOUND
+    assert stored[1].record == ada
+    assert stored[1].uri == "http://dbpedia.org/resource/Ada_Lovelace"
+    assert stored[2].status == STATUS_NOT_FOUND
+    assert stored[2].record is None
+
+    db.save_resolved([Resolved.from_record(2, PersonRecord("Nobody Atall", "1900-01-01"), fetched_at=200.0)])
+    assert db.get_resolved([2])[2].fetched_at == 200.0
+
+
+def test_save_resolved_skips_removed_names(db):
+    """
+    Tests that a result for a name removed during the lookup does not fail the rest of the batch
+    """
+    db.add_names(["Ada Lovelace", "Alan Turing"])
+    db.remove_name(1)
+    assert db.save_resolved([Resolved.from_record(1, None), Resolved.from_record(2, None)]) == 1
+    assert set(db.get_resolved([1, 2])) == {2}
+
+
+def test_stale_names(db):
+    """
+    Tests that names without a result, then those with the oldest, are reported as stale
+    """
+    for name in ("Ada Lovelace", "Alan Turing", "Grace Hopper"):
+        db.add_name(name)
+    db.save_resolved([
+        Resolved.from_record(1, None, fetched_at=1000.0),
+        Resolved.from_record(2, None, fetched_at=100.0),
+    ])
+    assert db.get_stale_names(max_age=500, now=1200.0) == [(3, "Grace Hopper"), (2, "Alan Turing")]
+    assert db.get_stale_names(max_age=50, now=1200.0, limit=2) == [(3, "Grace Hopper"), (2, "Alan Turing")]
+    assert db.get_resolved([1])[1].is_stale(max_age=500, now=1200.0) is False
+
+
+def test_clearing_names_clears_results(db):
+    """
+    Tests that results are removed with their names
+    """
+    db.add_name("Ada Lovelace")
+    db.save_resolved([Resolved.from_record(1, None)])
+    db.clear_all_names()
+    assert db.get_resolved([1]) == {}
+
+
+def test_add_and_remove_names_in_bulk(db):
+    """
+    Tests that bulk inserts return the assigned IDs across batches and bulk removes report their count
+    """
+    db.add_name("Ada Lovelace")
+    added = db.add_names(["Alan Turing", "", "Grace Hopper", "Donald Knuth"], batch_size=2)
+    assert added.ids == [2, 3, 4]
+    assert db.get_all_names() == [(1, "Ada Lovelace"), (2, "Alan Turing"), (3, "Grace Hopper"),
+                                  (4, "Donald Knuth")]
+
+    db.save_resolved([Resolved.from_record(3, None)])
+    assert db.remove_names([1, 3, 99], batch_size=2) == 2
+    assert db.get_all_names() == [(2, "Alan Turing"), (4, "Donald Knuth")]
+    assert db.get_resolved([3]) == {}
+    db.remove_name(2)
+    assert db.get_all_names() == [(4, "Donald Knuth")]
+
+
+def test_add_names_is_one_transaction(db):
+    """
+    Tests that a failing bulk insert adds nothing
+    """
+    assert db.add_names(["Ada Lovelace", 42]).new == 0
+    assert db.get_all_names() == []
+
+
+def test_add_names_is_fast(db):
+    """
+    Tests that importing 100k names does not commit once per name
+    """
+    added = db.add_names(f"Person {i}" for i in range(100_000))
+    assert added.new == 100_000
+    assert db.get_last_name() == (100_000, "Person 99999")
+
+
+def test_bulk_delete_and_save_are_fast(db):
+    """
+    Tests that removing 100k names and saving 20k results update the search
+    index per batch rather than through a trigger per row
+    """
+    triggers = db.db.execute("SELECT name FROM sqlite_master WHERE type = 'trigger';").fetchall()
+    assert sorted(name for name, in triggers) == ["names_fts_insert", "names_fts_update"]
+
+    db.add_names(f"Person {i}" for i in range(100_000))
+    start = time.perf_counter()
+    db.save_resolved(Resolved.from_record(id, PersonRecord(f"Resolved {id}", "1900-01-01"))
+                     for id in range(1, 20_001))
+    assert time.perf_counter() - start < 2.5
+    assert db.search("resolved 20000") == [(20_000, "Person 19999")]
+
+    start = time.perf_counter()
+    assert db.remove_names(range(1, 100_001)) == 100_000
+    assert time.perf_counter() - start < 8
+    assert db.search("person") == []
+    assert db.db.execute("SELECT count(*) FROM names_fts;").fetchone()[0] == 0
+
+
+def test_connections_are_tuned(db):
+    """
+    Tests that connections use WAL journaling and the tuned pragmas
+    """
+    assert db.db.execute("PRAGMA journal_mode;").fetchone()[0] == "wal"
+    assert db.db.execute("PRAGMA synchronous;").fetchone()[0] == 1  # NORMAL
+    assert db.db.execute("PRAGMA foreign_keys;").fetchone()[0] == 1
+
+
+def test_threads_share_the_database(db, tmpdir):
+    """
+    Tests that threads and a second Database on the same file read and write concurrently
+    """
+    other = Database(str(tmpdir / "names.db"))
+    errors = []
+
+    def write(start):
+        try:
+            for i in range(20):
+                db.add_names([f"Person {start + i}"])
+                other.get_all_names()
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=write, args=(start,)) for start in range(0, 80, 20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(other.get_all_names()) == 80
+    other.close()
+
+
+def test_thread_connections_are_closed(tmpdir):
+    """
+    Tests that connections of finished threads are closed, and close() closes every thread's
+    """
+    database = Database(str(tmpdir / "names.db"))
+    opened = []
+    thread = threading.Thread(target=lambda: opened.append(database.db))
+    thread.start()
+    thread.join()
+    assert len(database.connections) == 2
+
+    # Opening the next connection closes the finished thread's one.
+    release = threading.Event()
+
+    def hold():
+        opened.append(database.db)
+        release.wait()
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    while len(opened) < 2:
+        time.sleep(0.01)
+    with pytest.raises(sqlite3.ProgrammingError):
+        opened[0].execute("SELECT 1;")
+    assert len(database.connections) == 2
+
+    # close() also closes the connection of a thread that is still running.
+    database.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        opened[1].execute("SELECT 1;")
+    release.set()
+    holder.join()
+
+
+def test_iter_names_pages_by_id(db):
+    """
+    Tests that names are streamed in ID order across pages, resuming after an ID
+    """
+    db.add_names(f"Person {i}" for i in range(10))
+    db.remove_names([3, 4])
+    names = list(db.iter_names(page_size=3))
+    assert [id for id, _ in names] == [1, 2, 5, 6, 7, 8, 9, 10]
+    assert names[0] == (1, "Person 0")
+    assert list(db.iter_names(page_size=3, after_id=8)) == [(9, "Person 8"), (10, "Person 9")]
+    assert db.count_names() == 8
+
+
+def test_names_are_unique_by_normalized_key(db):
+    """
+    Tests that single and bulk inserts skip names equivalent to stored ones
+    """
+    assert db.add_name("Ada Lovelace") is True
+    assert db.add_name("  ada   LOVELACE ") is False
+    added = db.add_names(["Alan Turing", "ALAN TURING", "Ａｄａ Lovelace", "Grace Hopper"])
+    assert added == Added([2, 3], 2, 2)
+    assert db.get_all_names() == [(1, "Ada Lovelace"), (2, "Alan Turing"), (3, "Grace Hopper")]
+    # Re-importing the same file adds nothing.
+    assert db.add_names(["Alan Turing", "Grace Hopper"]) == Added([], 0, 2)
+
+
+def test_migration_deduplicates_existing_names(tmpdir):
+    """
+    Tests that upgrading a database with duplicate names keeps the oldest row
+    and the newest resolved result
+    """
+    path = str(tmpdir / "old.db")
+    old = sqlite3.connect(path)
+    old.executescript(MIGRATIONS[0] + MIGRATIONS[1] + """
+        INSERT INTO names (name) VALUES ('Ada Lovelace'), ('ada lovelace'), ('Alan Turing'), ('ADA  LOVELACE');
+        INSERT INTO resolved VALUES (2, 'Ada Lovelace', '1815-12-10', NULL, NULL, 200.0, 'found');
+        INSERT INTO resolved VALUES (4, NULL, NULL, NULL, NULL, 100.0, 'not_found');
+        PRAGMA user_version = 2;
+    """)
+    old.close()
+
+    db = Database(path)
+    assert db.get_all_names() == [(1, "Ada Lovelace"), (3, "Alan Turing")]
+    assert db.get_resolved([1])[1].fetched_at == 200.0
+    assert db.add_name("Ada Lovelace") is False
+    db.close()
+
+
+def test_migration_keeps_newest_resolved_over_keepers_own(tmpdir):
+    """
+    Tests that a newer result on a duplicate replaces the older result of the row that is kept
+    """
+    path = str(tmpdir / "old.db")
+    old = sqlite3.connect(path)
+    old.executescript(MIGRATIONS[0] + MIGRATIONS[1] + """
+        INSERT INTO names (name) VALUES ('Ada Lovelace'), ('ada lovelace'), ('ADA LOVELACE');
+        INSERT INTO resolved VALUES (1, NULL, NULL, NULL, NULL, 100.0, 'not_found');
+        INSERT INTO resolved VALUES (2, 'Ada Lovelace', '1815-12-10', NULL, 'http://dbpedia.org/resource/Ada_Lovelace', 300.0, 'found');
+        INSERT INTO resolved VALUES (3, 'Ada King', '1815-12-10', NULL, NULL, 200.0, 'found');
+        PRAGMA user_version = 2;
+    """)
+    old.close()
+
+    db = Database(path)
+    assert db.get_all_names() == [(1, "Ada Lovelace")]
+    stored = db.get_resolved([1])[1]
+    assert (stored.fullname, stored.fetched_at, stored.status) == ("Ada Lovelace", 300.0, STATUS_FOUND)
+    assert stored.uri == "http://dbpedia.org/resource/Ada_Lovelace"
+    db.close()
+
+
+def test_search_names_and_resolved_full_names(db):
+    """
+    Tests prefix and diacritic-insensitive search, kept in sync with inserts, results and deletes
+    """
+    db.add_names(["Ada Lovelace", "Kurt Gödel", "Einstein", "Alan Turing"])
+    assert db.search("ada lov") == [(1, "Ada Lovelace")]
+    assert db.search("GODEL") == [(2, "Kurt Gödel")]
+    assert db.search("al") == [(4, "Alan Turing")]
+    assert db.search("") == []
+    assert db.search('"*(') == []
+
+    db.save_resolved([Resolved.from_record(3, PersonRecord("Albert Einstein", "1879-03-14"))])
+    assert db.search("albert") == [(3, "Einstein")]
+    assert sorted(id for id, _ in db.search("al")) == [3, 4]
+
+    with db.db:
+        db.db.execute("INSERT INTO names (name, name_key) VALUES ('Grace Hopper', 'grace hopper');")
+    assert db.search("hopper") == [(5, "Grace Hopper")]
+
+    db.remove_names([3])
+    assert db.search("albert") == []
+    db.clear_all_names()
+    assert db.search("ada") == []
+
+
+def test_search_index_is_built_for_existing_names(tmpdir):
+    """
+    Tests that the migration indexes names stored before it
+    """
+    path = str(tmpdir / "old.db")
+    old = sqlite3.connect(path)
+    old.executescript("""
+        CREATE TABLE names(id INTEGER PRIMARY KEY, name TEXT NOT NULL);
+        INSERT INTO names (name) VALUES ('Grace Hopper');
+    """)
+    old.close()
+    db = Database(path)
+    assert db.search("hop") == [(1, "Grace Hopper")]
+    db.close()
@@ -0,0 +1,48 @@
+import logging
+from wikipedia_name_query.ages import calculate_ages
+from wikipedia_name_query.instrumentation import (
+    TIMERS, StageTimers, configure_logging, shutdown_logging,
+)
+
+
+def test_logging_is_opt_in_and_queued(tmpdir):
+    """
+    Tests that records reach the file only once logging is configured
+    """
+    logger = logging.getLogger("wikipedia_name_query.test")
+    path = tmpdir / "run.log"
+    logger.info("not written")
+    configure_logging(logging.INFO, str(path))
+    try:
+        logger.debug("below the level")
+        logger.info("looked up %s", "Donald Knuth")
+    finally:
+        shutdown_logging()
+    contents = path.read_text("utf8")
+    assert "looked up Donald Knuth" in contents
+    assert "not written" not in contents
+    assert "below the level" not in contents
+
+
+def test_stage_timers():
+    """
+    Tests that stage runs are counted and timed
+    """
+    timers = StageTimers()
+    for _ in range(3):
+        with timers.time("http"):
+            pass
+    stats = timers.stats()
+    assert stats["http"]["count"] == 3
+    assert stats["http"]["total"] >= 0
+    timers.reset()
+    assert timers.stats() == {}
+
+
+def test_age_stage_is_recorded():
+    """
+    Tests that the age computation reports to the shared timers
+    """
+    TIMERS.reset()
+    calculate_ages(["1938-01-10"])
+    assert TIMERS.stats()["age"]["count"] == 1
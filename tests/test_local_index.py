@@ -0,0 +1,94 @@
+import gzip
+import sqlite3
+import pytest
+from wikipedia_name_query.local_index import LocalIndex
+from wikipedia_name_query.person import Person
+
+DUMP = r'''<http://dbpedia.org/resource/Donald_Knuth> <http://xmlns.com/foaf/0.1/name> "Donald Knuth"@en .
+<http://dbpedia.org/resource/Donald_Knuth> <http://dbpedia.org/ontology/birthDate> "1938-01-10"^^<http://www.w3.org/2001/XMLSchema#date> .
+<http://dbpedia.org/resource/Alan_Turing> <http://xmlns.com/foaf/0.1/name> "Alan Turing"@en .
+<http://dbpedia.org/resource/Alan_Turing> <http://xmlns.com/foaf/0.1/name> "Alan Mathison Turing"@de .
+<http://dbpedia.org/resource/Alan_Turing> <http://dbpedia.org/ontology/birthDate> "1912-06-23"^^<http://www.w3.org/2001/XMLSchema#date> .
+<http://dbpedia.org/resource/Alan_Turing> <http://dbpedia.org/ontology/deathDate> "1954-06-07"^^<http://www.w3.org/2001/XMLSchema#date> .
+<http://dbpedia.org/resource/Kurt_Gödel> <http://xmlns.com/foaf/0.1/name> "Kurt Gödel"@en .
+<http://dbpedia.org/resource/Kurt_Gödel> <http://dbpedia.org/ontology/birthDate> "1906-04-28"^^<http://www.w3.org/2001/XMLSchema#date> .
+<http://dbpedia.org/resource/Google> <http://xmlns.com/foaf/0.1/name> "Google"@en .
+'''
+
+
+@pytest.fixture
+def index(tmpdir):
+    """
+    Builds a local index from a small gzipped dump
+    """
+    dump = tmpdir / "persons.nt.gz"
+    with gzip.open(dump, "wt", encoding="utf8") as file:
+        file.write(DUMP)
+    local_index = LocalIndex(str(tmpdir / "index.db"))
+    assert local_index.ingest(str(dump), batch_size=2) == 8
+    return local_index
+
+
+def test_exact_lookup(index):
+    """
+    Tests that an exact name match is found case-insensitively
+    """
+    assert index.get_person_info("alan turing") == [["Alan Turing", "1912-06-23", "1954-06-07", "http://dbpedia.org/resource/Alan_Turing"]]
+    assert index.get_person_info("Kurt Gödel") == [["Kurt Gödel", "1906-04-28", None, "http://dbpedia.org/resource/Kurt_Gödel"]]
+
+
+def test_prefix_and_substring_lookup(index):
+    """
+    Tests that prefix matches win over substring matches
+    """
+    assert index.get_person_info("Donald")[0][0] == "Donald Knuth"
+    assert index.get_person_info("Turing") == [["Alan Turing", "1912-06-23", "1954-06-07", "http://dbpedia.org/resource/Alan_Turing"]]
+
+
+def test_later_word_lookup_uses_the_word_index(index):
+    """
+    Tests that the last tier matches later words of a name, the last one as a
+    prefix and ignoring accents, through the full-text index rather than a scan
+    """
+    assert index.get_person_info("knu")[0][0] == "Donald Knuth"
+    assert index.get_person_info("godel")[0][0] == "Kurt Gödel"
+    assert index.get_person_info("nuth") is None
+    plan = " ".join(row[-1] for row in index._db.execute("""
+        EXPLAIN QUERY PLAN SELECT n.uri FROM person_names AS n
+        WHERE n.rowid IN (SELECT rowid FROM person_name_words WHERE person_name_words MATCH 'knu*');
+    """))
+    assert "SCAN n" not in plan
+
+
+def test_word_index_is_built_for_an_older_index(tmpdir):
+    """
+    Tests that opening an index made before the word index existed fills it in
+    """
+    path = str(tmpdir / "old.db")
+    old = sqlite3.connect(path)
+    old.executescript("""
+        CREATE TABLE persons(uri TEXT PRIMARY KEY, birth_date TEXT, death_date TEXT);
+        CREATE TABLE person_names(name_key TEXT NOT NULL, name TEXT NOT NULL, uri TEXT NOT NULL,
+                                  UNIQUE (name_key, uri));
+        INSERT INTO persons VALUES ('http://dbpedia.org/resource/Ada_Lovelace', '1815-12-10', '1852-11-27');
+        INSERT INTO person_names VALUES ('ada lovelace', 'Ada Lovelace', 'http://dbpedia.org/resource/Ada_Lovelace');
+    """)
+    old.commit()
+    old.close()
+    assert LocalIndex(path).get_person_info("Lovelace")[0][0] == "Ada Lovelace"
+
+
+def test_no_birth_date_is_not_found(index):
+    """
+    Tests that names without a birth date are not returned
+    """
+    assert index.get_person_info("google") is None
+
+
+def test_person_with_local_backend(index):
+    """
+    Tests that Person can load from the local backend
+    """
+    person = Person("Donald Knuth", backend=index)
+    person.load()
+    assert person.dob == "1938-01-10"
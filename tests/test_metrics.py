@@ -0,0 +1,144 @@
+import httpx
+import pytest
+from wikipedia_name_query.cache import LRUCache, ResultCache
+from wikipedia_name_query.metrics import (
+    LOOKUPS, REGISTRY, MetricsRegistry, _Metric, dashboard, start_http_server, write_metrics,
+)
+from wikipedia_name_query.query import Query
+from wikipedia_name_query.resilience import (
+    CircuitBreaker, CircuitOpenError, ResiliencePolicy, TokenBucket, configure_policy,
+)
+from wikipedia_name_query.TUI.metrics_panel import MetricsPanel
+
+
+def test_counter_and_gauge_render():
+    """
+    Tests that labelled counters and gauges render in the Prometheus text format
+    """
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests.", ("outcome",))
+    requests.labels(outcome="ok").inc()
+    requests.labels(outcome="ok").inc(2)
+    requests.labels(outcome="error").inc()
+    registry.gauge("open", "Open.").set(1)
+
+    text = registry.render()
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{outcome="ok"} 3' in text
+    assert 'requests_total{outcome="error"} 1' in text
+    assert "open 1" in text
+    assert requests.value == 4
+
+
+def test_metric_base_is_abstract():
+    """
+    Tests that a metric type must say how to create its children
+    """
+    with pytest.raises(TypeError):
+        _Metric("untyped", "Untyped.")
+
+
+def test_histogram_buckets_and_percentiles():
+    """
+    Tests that histogram buckets are cumulative and percentiles come from the observations
+    """
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.2, 0.3, 2.0):
+        latency.observe(value)
+
+    text = registry.render()
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1"} 3' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in text
+    assert "latency_seconds_count 4" in text
+    assert latency.percentile(50) == 0.2
+    assert latency.percentile(99) == 2.0
+
+
+def test_write_metrics_and_http_endpoint(tmpdir):
+    """
+    Tests that metrics can be written to a file and served over HTTP
+    """
+    registry = MetricsRegistry()
+    registry.counter("lookups_total", "Lookups.").inc()
+    path = tmpdir / "metrics.prom"
+    write_metrics(str(path), registry)
+    assert "lookups_total 1" in path.read_text("utf8")
+
+    server = start_http_server(0, registry=registry)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        assert "lookups_total 1" in httpx.get(f"{url}/metrics").text
+        assert httpx.get(f"{url}/other").status_code == 404
+    finally:
+        server.shutdown()
+
+
+def test_lookups_are_recorded(monkeypatch):
+    """
+    Tests that query lookups count as misses, then hits, in the dashboard
+    """
+    query = Query(cache=LRUCache())
+    monkeypatch.setattr(query, "_fetch_person_info", lambda name: [[name, "1938-01-10", None]])
+    before = dashboard()
+    query.get_person_info("Donald Knuth")
+    query.get_person_info("Donald Knuth")
+    after = dashboard()
+
+    assert after["lookups"] - before["lookups"] == 2
+    assert after["errors"] == before["errors"]
+    assert after["p50"] is not None
+    results = {labels["result"]: child.value for labels, child in LOOKUPS.children()}
+    assert results["hit"] >= 1 and results["miss"] >= 1
+
+
+def test_batch_lookups_are_recorded(monkeypatch):
+    """
+    Tests that each name of a batch lookup counts as a miss, then as a hit
+    """
+    query = Query(cache=ResultCache())
+    monkeypatch.setattr(query, "_fetch_people_info", lambda names: {name: [[name, "1938-01-10", None]] for name in names})
+    before = dashboard()
+    query.get_people_info(["Donald Knuth", "Alan Turing"])
+    query.get_people_info(["Donald Knuth", "Alan Turing"])
+    assert dashboard()["lookups"] - before["lookups"] == 4
+
+
+def test_resilience_stats_are_exported():
+    """
+    Tests that retries, failures, breaker rejections and throttle waits appear in the metrics
+    """
+    policy = ResiliencePolicy(limiter=TokenBucket(rate=20, capacity=1),
+                              breaker=CircuitBreaker(failure_threshold=2), max_retries=1, backoff_base=0)
+    configure_policy(policy)
+
+    def unavailable():
+        raise httpx.ConnectError("endpoint down")
+
+    with pytest.raises(httpx.ConnectError):
+        policy.call(unavailable)
+    with pytest.raises(CircuitOpenError):
+        policy.call(unavailable)
+
+    text = REGISTRY.render()
+    assert "wnq_endpoint_retries 1" in text
+    assert "wnq_endpoint_failures 2" in text
+    assert "wnq_circuit_rejections 1" in text
+    assert "wnq_throttle_waits 1" in text
+    assert "wnq_circuit_open 1" in text
+
+
+def test_metrics_panel_text():
+    """
+    Tests the metrics panel's formatting
+    """
+    summary = {"p50": 0.0123, "p99": 0.5, "lookups": 10, "errors": 1, "hit_ratio": 0.75}
+    text = MetricsPanel.render_metrics(summary, 2.0, 0.5)
+    assert "p50: 12.3 ms" in text
+    assert "p99: 500.0 ms" in text
+    assert "Requests: 2.0/s" in text
+    assert "Errors: 0.5/s" in text
+    assert "Hit ratio: 75%" in text
+    empty = {"p50": None, "p99": None, "lookups": 0, "errors": 0, "hit_ratio": None}
+    assert "p50: -" in MetricsPanel.render_metrics(empty, 0.0, 0.0)
@@ -0,0 +1,93 @@
+from wikipedia_name_query.person import RECORDS, Person, invalidate_record
+
+
+class FakeBackend:
+    """
+    In-memory backend that counts how often it is queried
+    """
+
+    def __init__(self):
+        self.rows = {"donald knuth": [["Donald Knuth", "1938-01-10", None]],
+                     "alan turing": [["Alan Turing", "1912-06-23", "1954-06-07"]]}
+        self.calls = 0
+        self.batch_calls = 0
+
+    def get_person_info(self, person_name, refresh=False):
+        self.calls += 1
+        return self.rows.get(person_name.lower())
+
+    def get_people_info(self, names, chunk_size=50, refresh=False):
+        self.batch_calls += 1
+        return {name: self.rows.get(name.lower()) for name in names}
+
+    def iter_person_info(self, person_name, page_size=25):
+        yield from self.rows.get(person_name.lower()) or []
+
+    def invalidate(self, person_name=None):
+        pass
+
+
+def test_person_loads_lazily_once():
+    """
+    Tests that nothing is queried until an attribute is read, and then only once
+    """
+    backend = FakeBackend()
+    person = Person("Alan Turing", backend)
+    assert backend.calls == 0
+    assert person.fullname == "Alan Turing"
+    assert person.dod == "1954-06-07"
+    assert person.age == 41
+    assert backend.calls == 1
+
+
+def test_records_are_shared_between_people():
+    """
+    Tests that a second Person for the same name reuses the resolved record
+    """
+    backend = FakeBackend()
+    assert Person("Donald Knuth", backend).dob == "1938-01-10"
+    assert Person("  donald   KNUTH ", backend).dob == "1938-01-10"
+    assert backend.calls == 1
+    Person("Donald Knuth", backend).load(refresh=True)
+    assert backend.calls == 2
+
+    invalidate_record("Donald Knuth", backend)
+    assert Person("Donald Knuth", backend).dob == "1938-01-10"
+    assert backend.calls == 3
+
+
+def test_setting_a_field_does_not_query():
+    """
+    Tests that an explicitly set field survives a later lazy load
+    """
+    backend = FakeBackend()
+    person = Person("Donald Knuth", backend)
+    person.fullname = "Don"
+    assert backend.calls == 0
+    assert person.dob == "1938-01-10"
+    assert person.fullname == "Don"
+
+
+def test_prefetch():
+    """
+    Tests that prefetch resolves many people with one batched call
+    """
+    backend = FakeBackend()
+    people = Person.prefetch(["Donald Knuth", "Alan Turing", "Nobody"], backend)
+    assert [person.fullname for person in people] == ["Donald Knuth", "Alan Turing", None]
+    assert backend.batch_calls == 1
+    assert Person("Alan Turing", backend).dob == "1912-06-23"
+    Person.prefetch(["Alan Turing"], backend)
+    assert (backend.calls, backend.batch_calls) == (0, 1)
+
+
+def test_prefetch_more_than_cache_size():
+    """
+    Tests that prefetch loads everyone even when the names overflow the shared record cache
+    """
+    backend = FakeBackend()
+    names = [f"Person {i}" for i in range(RECORDS.maxsize + 10)]
+    backend.rows.update({name.lower(): [[name, "1900-01-01", None]] for name in names})
+    people = Person.prefetch(names, backend)
+    assert [person.fullname for person in people] == names
+    assert backend.batch_calls == 1
@@ -0,0 +1,35 @@
+import pstats
+import time
+from wikipedia_name_query.profiling import Profiler
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_profile_files(tmpdir):
+    """
+    Tests that a profile writes a readable pstats file and collapsed stacks
+    """
+    path = str(tmpdir / "run.pstats")
+    with Profiler(path) as profiler:
+        busy(0.05)
+
+    stats = pstats.Stats(path)
+    assert any(function == "busy" for _, _, function in stats.stats)
+    lines = open(profiler.collapsed_path, encoding="utf8").read().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert any("test_profiling:busy" in line for line in lines)
+
+
+def test_profile_summary(capsys):
+    """
+    Tests that --profile-top style summaries are printed without writing files
+    """
+    with Profiler(None, top=5):
+        busy(0.01)
+    assert "cumulative" in capsys.readouterr().err
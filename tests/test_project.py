@@ -1,6 +1,10 @@
+from wikipedia_name_query.ages import calculate_ages
 from wikipedia_name_query.person import Person
 import pytest
 
+# ages of living people are checked as of this date, so they do not change with the calendar
+AS_OF = "2025-06-01"
+
 
 
 class Tests():
@@ -8,10 +12,12 @@ class Tests():
     Class to hold tests
     """
     @pytest.fixture
-    def person(self):
+    def person(self, server, monkeypatch):
         """
-        This function loads the data to be used it only needs to be opened once
+        This function loads the data to be used from the stand-in endpoint
         """
+        monkeypatch.setattr("wikipedia_name_query.person.calculate_ages",
+                            lambda births, deaths: calculate_ages(births, deaths, as_of=AS_OF))
         x = Person("Donald Knuth")
         x.load()
         return x
@@ -1,10 +1,12 @@
+import httpx
 import pytest
+from wikipedia_name_query.cache import ResultCache
 from wikipedia_name_query.query import Query
 
 @pytest.fixture
-def query_test1():
+def query_test1(server):
     """
-    This loads the data needed for tests
+    This loads the data needed for tests from the stand-in endpoint
     """
     query_test = Query()
     output = query_test.get_person_info("Donald Knuth")
@@ -17,7 +19,7 @@ def test_full_name(query_test1):
     assert query_test1[0][1] == "1938-01-10"
     assert query_test1[0][2] is None
 
-def test_rndm():
+def test_rndm(server):
     """
     Tests to see wether code will refuse to locate random inputs
     """
@@ -32,3 +34,131 @@ def test_none():
     query_test = Query()
     with pytest.raises(ValueError):
         query_test.get_person_info(None)
+
+def test_batch_chunks_and_splits(monkeypatch):
+    """
+    Tests that a batch is sent in chunks and bindings are split back per name
+    """
+    queries = []
+
+    def fake_run_query(query):
+        queries.append(query)
+        if "?query" not in query:
+            return []
+        return [
+            {"query": {"value": "Donald Knuth"}, "name": {"value": "Donald Knuth"},
+             "birthDate": {"value": "1938-01-10"}},
+            {"query": {"value": "Alan Turing"}, "name": {"value": "Alan Turing"},
+             "birthDate": {"value": "1912-06-23"}, "deathDate": {"value": "1954-06-07"}},
+        ]
+
+    monkeypatch.setattr("wikipedia_name_query.query._run_query", fake_run_query)
+    query_test = Query(cache=ResultCache())
+    names = ["Donald Knuth", "Alan Turing", "google", "nobody", "donald knuth"]
+    output = query_test.get_people_info(names, chunk_size=2)
+
+    # two chunked exact-label queries, plus one contains and one regex query
+    # shared by "google" and "nobody"
+    assert len(queries) == 4
+    regex_queries = [query for query in queries if "regex(" in query]
+    assert len(regex_queries) == 1
+    assert '"google"' in regex_queries[0] and '"nobody"' in regex_queries[0]
+    assert output["Donald Knuth"] == [["Donald Knuth", "1938-01-10", None, None]]
+    assert output["donald knuth"] == output["Donald Knuth"]
+    assert output["Alan Turing"][0][2] == "1954-06-07"
+    assert output["google"] is None
+    assert output["nobody"] is None
+
+    query_test.get_people_info(names)
+    assert len(queries) == 4
+
+
+def test_batch_serves_stale_results_when_endpoint_fails(monkeypatch):
+    """
+    Tests that a batch falls back to expired cached results like get_person_info, except when refreshing
+    """
+    def failing_run_query(query):
+        raise httpx.ConnectError("endpoint down")
+
+    monkeypatch.setattr("wikipedia_name_query.query._run_query", failing_run_query)
+    cache = ResultCache()
+    cache.memory.set("donald knuth", [["Donald Knuth", "1938-01-10", None, None]], stored_at=0)
+    query_test = Query(cache=cache)
+    assert query_test.get_people_info(["Donald Knuth"]) == {
+        "Donald Knuth": [["Donald Knuth", "1938-01-10", None, None]],
+    }
+    with pytest.raises(httpx.ConnectError):
+        query_test.get_people_info(["Donald Knuth"], refresh=True)
+    with pytest.raises(httpx.ConnectError):
+        query_test.get_people_info(["Donald Knuth", "Alan Turing"])
+
+
+def test_tiers_stop_at_first_match(monkeypatch):
+    """
+    Tests that later tiers only run when earlier ones find nothing
+    """
+    queries = []
+
+    def fake_run_query(query):
+        queries.append(query)
+        if "bif:contains" not in query:
+            return []
+        return [{"name": {"value": "Donald Knuth"}, "birthDate": {"value": "1938-01-10"}}]
+
+    monkeypatch.setattr("wikipedia_name_query.query._run_query", fake_run_query)
+    query_test = Query(cache=ResultCache())
+    output = query_test.get_person_info("Knuth")
+
+    assert output == [["Donald Knuth", "1938-01-10", None, None]]
+    assert len(queries) == 2
+    assert list(query_test.last_timings) == ["exact", "contains"]
+
+
+def test_iter_pages_lazily(monkeypatch):
+    """
+    Tests that rows are fetched one page at a time and only as they are consumed
+    """
+    queries = []
+    rows = [{"name": {"value": f"John {i}"}, "birthDate": {"value": "1900-01-01"}} for i in range(5)]
+
+    def fake_run_query(query):
+        queries.append(query)
+        if "bif:contains" not in query:
+            return []
+        offset = int(query.split("OFFSET")[1].split()[0])
+        return rows[offset:offset + 2]
+
+    monkeypatch.setattr("wikipedia_name_query.query._run_query", fake_run_query)
+    query_test = Query(cache=ResultCache())
+
+    first = next(query_test.iter_person_info("John", page_size=2))
+    assert first[0] == "John 0"
+    assert len(queries) == 2
+
+    queries.clear()
+    names = [row[0] for row in query_test.iter_person_info("John", page_size=2)]
+    assert names == [f"John {i}" for i in range(5)]
+    # exact tier, then three pages of the contains tier; regex never runs
+    assert len(queries) == 4
+
+
+def test_results_are_deduplicated_and_ranked(monkeypatch):
+    """
+    Tests that each person appears once and the most likely person comes first
+    """
+    def binding(uri, name, birth, popularity):
+        return {"person": {"value": uri}, "name": {"value": name},
+                "birthDate": {"value": birth}, "popularity": {"value": str(popularity)}}
+
+    def fake_run_query(query):
+        if "bif:contains" not in query:
+            return []
+        return [
+            binding("http://dbpedia.org/resource/Hans_Albert_Einstein", "Hans Albert Einstein", "1904-05-14", 9000),
+            binding("http://dbpedia.org/resource/Albert_Einstein", "Albert Einstein", "1879-03-14", 230000),
+            binding("http://dbpedia.org/resource/Albert_Einstein", "Albert Einstein", "1879-03-14", 230000),
+        ]
+
+    monkeypatch.setattr("wikipedia_name_query.query._run_query", fake_run_query)
+    output = Query(cache=ResultCache()).get_person_info("Einstein")
+    assert [row[0] for row in output] == ["Albert Einstein", "Hans Albert Einstein"]
@@ -0,0 +1,27 @@
+from wikipedia_name_query.ranking import rank_candidates, score
+
+
+def test_exact_beats_prefix_beats_overlap():
+    """
+    Tests the order of the name match signals
+    """
+    assert score("Grace Hopper", "grace  HOPPER") > score("Grace", "Grace Hopper") > score("Hopper", "Grace Hopper")
+
+
+def test_popularity_breaks_ties():
+    """
+    Tests that between equally good name matches the more popular person wins
+    """
+    rows = rank_candidates("John Smith", [
+        ("http://dbpedia.org/resource/John_Smith_(footballer)", ["John Smith", "1990-01-01", None], 2000),
+        ("http://dbpedia.org/resource/John_Smith_(explorer)", ["John Smith", "1580-01-06", "1631-06-21"], 120000),
+    ])
+    assert [row[1] for row in rows] == ["1580-01-06", "1990-01-01"]
+
+
+def test_duplicates_without_uri_are_merged():
+    """
+    Tests that identical rows count as one candidate when no URI is known
+    """
+    row = ["Ada Lovelace", "1815-12-10", "1852-11-27"]
+    assert rank_candidates("Ada Lovelace", [(None, row, 0), (None, list(row), 0)]) == [[*row, None]]
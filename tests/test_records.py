@@ -0,0 +1,58 @@
+import dataclasses
+import pytest
+from wikipedia_name_query.records import NO_DATE, PersonRecord, PersonTable, date_to_days
+
+
+ROWS = [
+    ["Ada Lovelace", "1815-12-10", "1852-11-27", None],
+    ["Donald Knuth", "1938-01-10", None, None],
+    ["Ada Lovelace", "1815-12-10", "1852-11-27", None],
+]
+
+
+def test_record_is_immutable_and_slotted():
+    """
+    Tests that records cannot be changed and carry no per-instance dict
+    """
+    record = PersonRecord.from_row(ROWS[0])
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        record.full_name = "Someone Else"
+    assert not hasattr(record, "__dict__")
+    assert record.to_row() == ROWS[0]
+    # rows cached before URIs were kept have three columns
+    assert PersonRecord.from_row(ROWS[0][:3]) == record
+
+
+def test_table_round_trips_rows():
+    """
+    Tests that rows come back out of the table unchanged and names are pooled
+    """
+    table = PersonTable.from_rows(ROWS)
+    assert len(table) == 3
+    assert table.rows() == ROWS
+    assert len(table.names) == 2
+    assert table[1] == PersonRecord("Donald Knuth", "1938-01-10", None)
+
+
+def test_table_from_bindings():
+    """
+    Tests building a table from SPARQL result bindings
+    """
+    bindings = [
+        {"name": {"value": "Donald Knuth"}, "birthDate": {"value": "1938-01-10"}},
+        {"name": {"value": "Ada Lovelace"}, "birthDate": {"value": "1815-12-10"},
+         "deathDate": {"value": "1852-11-27"}},
+    ]
+    table = PersonTable.from_bindings(bindings)
+    assert table.rows() == [ROWS[1], ROWS[0]]
+    assert [record.full_name for record in table] == ["Donald Knuth", "Ada Lovelace"]
+
+
+def test_date_to_days():
+    """
+    Tests the days-since-epoch date encoding
+    """
+    assert date_to_days("1970-01-02") == 1
+    assert date_to_days("1969-12-31") == -1
+    assert date_to_days(None) == NO_DATE
+    assert date_to_days("not a date") == NO_DATE
@@ -0,0 +1,121 @@
+import threading
+import httpx
+import pytest
+from wikipedia_name_query.cache import MISSING, ResultCache
+from wikipedia_name_query.input_database import STATUS_FOUND, STATUS_NOT_FOUND, Database, Resolved
+from wikipedia_name_query.normalize import normalize_name
+from wikipedia_name_query.person import RECORDS
+from wikipedia_name_query.query import Query
+from wikipedia_name_query.records import PersonRecord
+from wikipedia_name_query.refresh import RefreshResult, RefreshScheduler
+
+
+class FakeBackend:
+    """
+    In-memory backend that records the batches it is asked for
+    """
+
+    def __init__(self, fail=False):
+        self.rows = {"ada lovelace": [["Ada Lovelace", "1815-12-10", "1852-11-27",
+                                       "http://dbpedia.org/resource/Ada_Lovelace"]],
+                     "alan turing": [["Alan Turing", "1912-06-23", "1954-06-07",
+                                      "http://dbpedia.org/resource/Alan_Turing"]]}
+        self.batches = []
+        self.fail = fail
+
+    def get_people_info(self, names, chunk_size=50, refresh=False):
+        if self.fail:
+            raise httpx.ConnectError("endpoint down")
+        assert refresh
+        self.batches.append(list(names))
+        return {name: self.rows.get(name.lower()) for name in names}
+
+
+@pytest.fixture
+def db(tmpdir):
+    """Fixture to provide a database with three names, one resolved long ago."""
+    database = Database(str(tmpdir / "names.db"))
+    database.add_names(["Ada Lovelace", "Alan Turing", "Nobody Atall"])
+    database.save_resolved([Resolved.from_record(1, PersonRecord("Ada Lovelace", "1815-12-11"), fetched_at=0.0)])
+    yield database
+    database.close()
+
+
+def test_refresh_prioritizes_and_respects_max_names(db):
+    """
+    Tests that unresolved names go first, in batches, and no more than max_names are looked up
+    """
+    backend = FakeBackend()
+    scheduler = RefreshScheduler(db, backend, max_names=2, batch_size=1)
+    assert scheduler.refresh_once() == RefreshResult(found=1, not_found=1)
+    assert backend.batches == [["Alan Turing"], ["Nobody Atall"]]
+    assert db.get_resolved([3])[3].status == STATUS_NOT_FOUND
+
+    # The stale result for Ada is refreshed next, with the corrected birth date.
+    assert scheduler.refresh_once().refreshed == 1
+    assert db.get_resolved([1])[1].dob == "1815-12-10"
+    assert db.get_resolved([1])[1].uri == "http://dbpedia.org/resource/Ada_Lovelace"
+    # Everything is fresh now.
+    assert scheduler.refresh_once() == RefreshResult()
+
+
+def test_refresh_stops_when_request_budget_is_spent(server, tmpdir):
+    """
+    Tests that a run sends no further batch once it has used max_requests endpoint requests
+    """
+    database = Database(str(tmpdir / "budget.db"))
+    database.add_names([f"Nobody {word}" for word in ("one", "two", "three", "four", "five", "six")])
+    # Each batch of two unmatched names costs an exact, a full-text and a regex request.
+    scheduler = RefreshScheduler(database, Query(cache=ResultCache()), max_names=6, batch_size=2, max_requests=6)
+    assert scheduler.refresh_once() == RefreshResult(not_found=4)
+    assert server.request_count == 6
+    assert len(scheduler.due()) == 2
+    database.close()
+
+
+def test_refresh_drops_shared_records(db):
+    """
+    Tests that refreshed names are not served from the shared Person record cache afterwards
+    """
+    backend = FakeBackend()
+    key = (backend, normalize_name("Ada Lovelace"))
+    RECORDS.set(key, PersonRecord("Ada Lovelace", "1815-12-11"))
+    RefreshScheduler(db, backend).refresh_once()
+    assert RECORDS.get(key) is MISSING
+
+
+def test_refresh_stops_when_the_endpoint_fails(db):
+    """
+    Tests that an endpoint error ends the run and leaves the names due
+    """
+    scheduler = RefreshScheduler(db, FakeBackend(fail=True))
+    assert scheduler.refresh_once() == RefreshResult(failed=3)
+    assert db.get_resolved([1])[1].dob == "1815-12-11"
+    assert len(scheduler.due()) == 3
+
+
+def test_refresh_counts_unsaved_batches_as_failed(db, monkeypatch):
+    """
+    Tests that a batch whose results cannot be stored is reported as failed and stays due
+    """
+    monkeypatch.setattr(db, "save_resolved", lambda results: None)
+    scheduler = RefreshScheduler(db, FakeBackend())
+    assert scheduler.refresh_once() == RefreshResult(failed=3)
+    monkeypatch.undo()
+    assert len(scheduler.due()) == 3
+
+
+def test_run_until_stopped(db):
+    """
+    Tests that the scheduler reports each run and stops when asked
+    """
+    stop = threading.Event()
+    results = []
+
+    def on_refresh(result):
+        results.append(result)
+        stop.set()
+
+    RefreshScheduler(db, FakeBackend()).run(interval=60, stop=stop, on_refresh=on_refresh)
+    assert results == [RefreshResult(found=2, not_found=1)]
+    assert db.get_resolved([2])[2].status == STATUS_FOUND
@@ -0,0 +1,148 @@
+import asyncio
+import threading
+import time
+import pytest
+from wikipedia_name_query.async_query import AsyncQuery
+from wikipedia_name_query.cache import ResultCache
+from wikipedia_name_query.query import Query
+from wikipedia_name_query.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def test_threads_share_one_call():
+    """
+    Tests that concurrent threads asking for the same key run the function once
+    """
+    flight = SingleFlight()
+    calls = []
+
+    def slow_lookup():
+        calls.append(1)
+        time.sleep(0.1)
+        return "result"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", slow_lookup)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["result"] * 8
+    assert len(calls) == 1
+    assert flight.shared == 7
+
+
+def test_threads_share_errors():
+    """
+    Tests that an error is raised in every waiting thread and the key is released
+    """
+    flight = SingleFlight()
+    errors = []
+
+    def failing_lookup():
+        time.sleep(0.1)
+        raise ConnectionError("endpoint down")
+
+    def worker():
+        try:
+            flight.do("key", failing_lookup)
+        except ConnectionError as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 4
+    assert flight.do("key", lambda: "recovered") == "recovered"
+
+
+def test_query_threads_coalesce(monkeypatch):
+    """
+    Tests that threads resolving the same name through Query send one request
+    """
+    calls = []
+
+    def fake_run_query(query):
+        calls.append(query)
+        time.sleep(0.1)
+        return [{"name": {"value": "Donald Knuth"}, "birthDate": {"value": "1938-01-10"}}]
+
+    monkeypatch.setattr("wikipedia_name_query.query._run_query", fake_run_query)
+    threads = [threading.Thread(target=Query(cache=ResultCache()).get_person_info, args=("Donald Knuth",))
+               for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+
+
+def test_batch_waits_for_names_in_flight(monkeypatch):
+    """
+    Tests that a batch lookup shares the request of a single lookup already running for one of its names
+    """
+    calls = []
+
+    def fake_run_query(query):
+        calls.append(query)
+        time.sleep(0.2)
+        if "?query" in query:
+            return []
+        return [{"name": {"value": "Donald Knuth"}, "birthDate": {"value": "1938-01-10"}}]
+
+    monkeypatch.setattr("wikipedia_name_query.query._run_query", fake_run_query)
+    single = threading.Thread(target=Query(cache=ResultCache()).get_person_info, args=("Donald Knuth",))
+    single.start()
+    time.sleep(0.05)
+    output = Query(cache=ResultCache()).get_people_info(["Donald Knuth", "Alan Turing"])
+    single.join()
+
+    assert output["Donald Knuth"] == [["Donald Knuth", "1938-01-10", None, None]]
+    # The single lookup's exact request, then one batched request per tier for Alan Turing only.
+    assert len(calls) == 4
+    assert all("Donald Knuth" not in query for query in calls[1:])
+
+
+@pytest.mark.asyncio
+async def test_coroutines_coalesce(monkeypatch):
+    """
+    Tests that concurrent coroutines resolving the same name send one request
+    """
+    calls = []
+
+    async def fake_send(query):
+        calls.append(query)
+        await asyncio.sleep(0.05)
+        return [{"name": {"value": "Donald Knuth"}, "birthDate": {"value": "1938-01-10"}}]
+
+    query_test = AsyncQuery(cache=ResultCache())
+    monkeypatch.setattr(query_test, "_send", fake_send)
+    results = await asyncio.gather(*(query_test.get_person_info("Donald Knuth") for _ in range(10)))
+
+    assert all(result == [["Donald Knuth", "1938-01-10", None, None]] for result in results)
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_others():
+    """
+    Tests that cancelling one waiter leaves the shared call running for the rest
+    """
+    flight = AsyncSingleFlight()
+
+    async def slow_lookup():
+        await asyncio.sleep(0.05)
+        return "result"
+
+    first = asyncio.ensure_future(flight.do("key", slow_lookup))
+    second = asyncio.ensure_future(flight.do("key", slow_lookup))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "result"
+    assert flight.calls == 1
@@ -0,0 +1,68 @@
+import asyncio
+import httpx
+import pytest
+from wikipedia_name_query import sparql
+
+
+def handler(request):
+    """
+    Fake endpoint that echoes the posted query back as a binding
+    """
+    assert request.headers["Accept-Encoding"] == "gzip"
+    form = dict(httpx.QueryParams(request.content.decode()))
+    return httpx.Response(200, json={"results": {"bindings": [{"query": {"value": form["query"]}}]}})
+
+
+def test_select_posts_query():
+    """
+    Tests that select POSTs the query and returns the bindings
+    """
+    client = sparql.SPARQLClient(transport=httpx.MockTransport(handler))
+    assert client.select("SELECT 1") == [{"query": {"value": "SELECT 1"}}]
+    client.close()
+
+
+def test_error_status_raises():
+    """
+    Tests that an error status from the endpoint is raised to the caller
+    """
+    client = sparql.SPARQLClient(transport=httpx.MockTransport(lambda request: httpx.Response(503)))
+    with pytest.raises(httpx.HTTPStatusError):
+        client.select("SELECT 1")
+
+
+def test_shared_client_is_reused():
+    """
+    Tests that the module-level client is created once and replaced when reconfigured
+    """
+    client = sparql.get_client()
+    assert sparql.get_client() is client
+
+    sparql.configure_client(pool_size=4)
+    assert sparql.get_client() is not client
+    assert sparql.get_client().pool_size == 4
+    # Changing only the endpoint keeps the custom pool size.
+    sparql.configure_client(endpoint="http://localhost:8890/sparql")
+    assert sparql.get_client().pool_size == 4
+    assert sparql.get_client().endpoint == "http://localhost:8890/sparql"
+    sparql.configure_client(endpoint=sparql.ENDPOINT, pool_size=sparql.DEFAULT_POOL_SIZE)
+
+
+@pytest.mark.asyncio
+async def test_async_client_per_loop():
+    """
+    Tests that the shared async client is reused within an event loop
+    """
+    assert sparql.get_async_client() is sparql.get_async_client()
+
+
+@pytest.mark.asyncio
+async def test_reconfiguring_closes_async_clients():
+    """
+    Tests that reconfiguring closes the async client of the running loop instead of leaking its pool
+    """
+    client = sparql.get_async_client()
+    sparql.configure_client(timeout=sparql.DEFAULT_TIMEOUT)
+    await asyncio.sleep(0)
+    assert client._client.is_closed
+    assert sparql.get_async_client() is not client
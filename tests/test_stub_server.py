@@ -0,0 +1,133 @@
+import httpx
+import pytest
+from wikipedia_name_query.backends import Backend
+from wikipedia_name_query.cache import ResultCache
+from wikipedia_name_query.person import Person
+from wikipedia_name_query.query import Query
+from wikipedia_name_query.resilience import (
+    CircuitBreaker, CircuitOpenError, ResiliencePolicy, configure_policy, get_policy,
+)
+
+def test_query_against_stub(server):
+    """
+    Tests the full query path offline, tier by tier
+    """
+    query_test = Query(cache=ResultCache())
+    assert query_test.get_person_info("Donald Knuth") == [["Donald Knuth", "1938-01-10", None, "http://dbpedia.org/resource/Donald_Knuth"]]
+    assert query_test.get_person_info("Einstein")[0][0] == "Albert Einstein"
+    assert query_test.get_person_info("google") is None
+    assert list(query_test.last_timings) == ["exact", "contains", "regex"]
+
+
+def test_batch_against_stub(server):
+    """
+    Tests that a batch of exact names is answered in one request
+    """
+    query_test = Query(cache=ResultCache())
+    output = query_test.get_people_info(["Alan Turing", "Ada Lovelace", "Grace Hopper"])
+    assert output["Ada Lovelace"] == [["Ada Lovelace", "1815-12-10", "1852-11-27", "http://dbpedia.org/resource/Ada_Lovelace"]]
+    assert server.request_count == 1
+
+
+def test_batch_of_fuzzy_names_against_stub(server):
+    """
+    Tests that names without an exact match share one full-text request, and
+    names that also miss it share one regex request
+    """
+    query_test = Query(cache=ResultCache())
+    names = ["Knuth", "Einstein", "lovelace", "Gödel", "Alan Turing", "google", "nobody", "nuth"]
+    output = query_test.get_people_info(names)
+    assert output["Knuth"][0][0] == "Donald Knuth"
+    assert output["Einstein"][0][0] == "Albert Einstein"
+    assert output["lovelace"][0][0] == "Ada Lovelace"
+    assert output["Gödel"][0][0] == "Kurt Gödel"
+    assert output["Alan Turing"][0][0] == "Alan Turing"
+    assert output["google"] is None and output["nobody"] is None
+    assert output["nuth"][0][0] == "Donald Knuth"
+    # one exact request, one full-text request and one regex request
+    assert server.request_count == 3
+
+
+def test_person_depends_on_backend(server):
+    """
+    Tests that Person accepts any Backend implementation
+    """
+    backend = Query(cache=ResultCache())
+    assert isinstance(backend, Backend)
+    person = Person("Alan Turing", backend=backend)
+    person.load()
+    assert person.dod == "1954-06-07"
+
+
+def test_error_injection(server):
+    """
+    Tests that injected errors are retried, then reach the client as HTTP errors
+    """
+    configure_policy(ResiliencePolicy(max_retries=2, backoff_base=0.001))
+    server.error_rate = 1.0
+    with pytest.raises(httpx.HTTPStatusError):
+        Query(cache=ResultCache()).get_person_info("Alan Turing")
+    assert server.request_count == 3
+    assert get_policy().stats()["retries"] == 2
+
+
+def test_retry_recovers(server):
+    """
+    Tests that a transient error is retried transparently
+    """
+    configure_policy(ResiliencePolicy(backoff_base=0.001))
+    server.error_rate = 0.5
+    server._random.seed(1)
+    assert Query(cache=ResultCache()).get_person_info("Alan Turing")[0][0] == "Alan Turing"
+    assert get_policy().stats()["retries"] >= 1
+
+
+def test_open_breaker_serves_stale(server):
+    """
+    Tests that an open circuit fails fast, serving stale cached data when there is some
+    """
+    configure_policy(ResiliencePolicy(breaker=CircuitBreaker(failure_threshold=1), max_retries=0))
+    cache = ResultCache()
+    cache.set("alan turing", [["Alan Turing", "1912-06-23", "1954-06-07"]])
+    server.error_rate = 1.0
+    with pytest.raises(httpx.HTTPStatusError):
+        Query(cache=ResultCache()).get_person_info("Ada Lovelace")
+    assert get_policy().stats()["state"] == "open"
+
+    requests = server.request_count
+    assert Query(cache=cache).get_person_info("Alan Turing", refresh=True)[0][0] == "Alan Turing"
+    with pytest.raises(CircuitOpenError):
+        Query(cache=ResultCache()).get_person_info("Grace Hopper")
+    assert server.request_count == requests
+
+
+def test_candidates_against_stub(server):
+    """
+    Tests that Person.candidates lists the ranked matches from one request
+    """
+    person = Person("Einstein", backend=Query(cache=ResultCache()))
+    candidates = person.candidates(top_k=5)
+    assert [record.full_name for record in candidates] == ["Albert Einstein", "Hans Albert Einstein"]
+    assert person.fullname == "Albert Einstein"
+    requests = server.request_count
+    assert person.candidates(top_k=1)[0].birth_date == "1879-03-14"
+    assert server.request_count == requests
+
+
+@pytest.mark.asyncio
+async def test_async_candidates_do_not_block(server, monkeypatch):
+    """
+    Tests that Person.acandidates looks the name up asynchronously when its result is no longer cached
+    """
+    backend = Query(cache=ResultCache())
+    await Person("Einstein", backend=backend).aload()
+    backend.invalidate("Einstein")
+
+    def blocking_lookup(*args, **kwargs):
+        raise AssertionError("synchronous lookup on the event loop")
+
+    monkeypatch.setattr(backend, "get_person_info", blocking_lookup)
+    person = Person("Einstein", backend=backend)
+    await person.aload()
+    candidates = await person.acandidates()
+    assert [record.full_name for record in candidates] == ["Albert Einstein", "Hans Albert Einstein"]
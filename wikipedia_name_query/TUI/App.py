@@ -1,10 +1,21 @@
+import argparse
 from wikipedia_name_query.TUI.query_app import QueryApp
+from wikipedia_name_query.commands import add_profile_arguments, profiler_from_args
 from wikipedia_name_query.input_database import Database
+from wikipedia_name_query.refresh import DEFAULT_INTERVAL, RefreshScheduler
 
 def main():
+    parser = argparse.ArgumentParser(description="Wiki Query TUI")
+    add_profile_arguments(parser)
+    parser.add_argument("--refresh-interval", type=float, default=DEFAULT_INTERVAL,
+                        help="Seconds between background refreshes of stale names; 0 turns them off")
+    args = parser.parse_args()
+
     db = Database()
-    app = QueryApp(db=db)
+    refresher = RefreshScheduler(db) if args.refresh_interval > 0 else None
+    app = QueryApp(db=db, profiler=profiler_from_args(args), refresher=refresher,
+                   refresh_interval=args.refresh_interval)
     app.run()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
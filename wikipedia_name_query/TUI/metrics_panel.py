@@ -0,0 +1,77 @@
+"""
+Live metrics panel for the Wikipedia Name Query application.
+
+Shows the headline lookup metrics from `metrics.dashboard`: p50/p99
+lookup latency, request and error rates, and the cache hit ratio. The
+rates are computed from the change in the totals between refreshes.
+
+Dependencies:
+    - textual: For the refreshing widget
+    - time: For measuring the interval between refreshes
+"""
+import time
+from textual.widgets import Static
+from wikipedia_name_query.metrics import dashboard
+
+REFRESH_SECONDS = 1.0
+
+
+class MetricsPanel(Static):
+    """
+    A widget showing live lookup metrics, refreshed every `REFRESH_SECONDS`.
+    """
+
+    def on_mount(self) -> None:
+        """
+        Shows the current metrics and starts the refresh timer.
+        """
+        self._last = (time.monotonic(), dashboard())
+        self.update(self.render_metrics(self._last[1], 0.0, 0.0))
+        self.set_interval(REFRESH_SECONDS, self.refresh_metrics)
+
+    def refresh_metrics(self) -> None:
+        """
+        Recomputes the rates since the last refresh and redraws the panel.
+        """
+        now, summary = time.monotonic(), dashboard()
+        then, last = self._last
+        elapsed = max(now - then, 1e-9)
+        request_rate = (summary["lookups"] - last["lookups"]) / elapsed
+        error_rate = (summary["errors"] - last["errors"]) / elapsed
+        self._last = (now, summary)
+        self.update(self.render_metrics(summary, request_rate, error_rate))
+
+    @staticmethod
+    def render_metrics(summary: dict, request_rate: float, error_rate: float) -> str:
+        """
+        Formats the metrics as the panel's text.
+
+        Parameters
+        ----------
+        summary : dict
+            The result of `metrics.dashboard`.
+        request_rate : float
+            Lookups per second.
+        error_rate : float
+            Failed lookups per second.
+
+        Returns
+        -------
+        str
+            One line per metric.
+        """
+        return "\n".join((
+            f"p50: {_milliseconds(summary['p50'])}",
+            f"p99: {_milliseconds(summary['p99'])}",
+            f"Requests: {request_rate:.1f}/s",
+            f"Errors: {error_rate:.1f}/s",
+            f"Hit ratio: {_percent(summary['hit_ratio'])}",
+        ))
+
+
+def _milliseconds(seconds: float | None) -> str:
+    return "-" if seconds is None else f"{seconds * 1000:.1f} ms"
+
+
+def _percent(ratio: float | None) -> str:
+    return "-" if ratio is None else f"{ratio:.0%}"
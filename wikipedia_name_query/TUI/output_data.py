@@ -6,14 +6,16 @@ from textual.widgets import (
     Label,
     Static,
 )
+from wikipedia_name_query.input_database import Database, Resolved
 from wikipedia_name_query.person import Person
+from wikipedia_name_query.resilience import ENDPOINT_ERRORS
 
 class OutputData(Screen):
     """
     Screen to display detailed data for a selected name.
     """
 
-    def __init__(self, name: str, *args, **kwargs):
+    def __init__(self, name: str, *args, db: Database | None = None, name_id: int | None = None, **kwargs):
         """
         Initialize the OutputData screen.
 
@@ -21,6 +23,12 @@ class OutputData(Screen):
         ----------
         name : str
             The name of the person to display data for.
+        db : Database, optional
+            Database the person's resolved data is stored in. When given with
+            `name_id`, stored data is shown at once and only looked up again
+            once it is stale.
+        name_id : int, optional
+            The ID of the name in `db`.
         *args
             Additional positional arguments.
         **kwargs
@@ -29,7 +37,8 @@ class OutputData(Screen):
         super().__init__(*args, **kwargs)
         self.person_name = name
         self.person_query = Person(self.person_name)
-        self.person_query.load()
+        self.db = db
+        self.name_id = name_id
 
 
     def compose(self) -> ComposeResult:
@@ -43,13 +52,15 @@ class OutputData(Screen):
         """
         yield Vertical(
             Label("Output", id="output-title"),
-            Label(f"Name: {self.person_query.fullname}", classes="output-label"),
+            Label("Name: Loading...", classes="output-label", id="output-name"),
             Static(),
-            Label(f"Date of Birth: {self.person_query.dob}", classes="output-label"),
+            Label("Date of Birth: Loading...", classes="output-label", id="output-dob"),
             Static(),
-            Label(f"Date of Death: {self.person_query.dod}", classes="output-label"),
+            Label("Date of Death: Loading...", classes="output-label", id="output-dod"),
             Static(),
-            Label(f"Age: {self.person_query.age}", classes="output-label"),
+            Label("Age: Loading...", classes="output-label", id="output-age"),
+            Static(),
+            Label("", classes="output-text", id="output-candidates"),
             Static(),
             Button("Ok", variant="success", id="ok"),
             Static(),
@@ -57,6 +68,59 @@ class OutputData(Screen):
         )
 
 
+    async def on_mount(self) -> None:
+        """
+        Fill in the labels, from the database if the person's data is stored
+        there, and otherwise (or if it is stale) by looking the person up
+        without blocking the event loop and storing the result. Any other
+        people the name matches are listed after a lookup.
+
+        If the endpoint is unavailable the labels say so instead of the screen crashing.
+        """
+        stored = None
+        if self.db is not None and self.name_id is not None:
+            stored = self.db.get_resolved([self.name_id]).get(self.name_id)
+        if stored is not None:
+            self._show(Person.from_record(self.person_name, stored.record))
+            if not stored.is_stale():
+                return
+
+        try:
+            record = await self.person_query.aload()
+        except ENDPOINT_ERRORS as error:
+            if stored is None:
+                self.query_one("#output-name", Label).update(f"Name: {self.person_name}")
+                for label_id, label in (("#output-dob", "Date of Birth"), ("#output-dod", "Date of Death"),
+                                        ("#output-age", "Age")):
+                    self.query_one(label_id, Label).update(f"{label}: Unavailable")
+            self.notify(f"Could not look up {self.person_name}: {error}", severity="error")
+            return
+        if self.db is not None and self.name_id is not None:
+            self.db.save_resolved([Resolved.from_record(self.name_id, record)])
+        self._show(self.person_query)
+
+        # The lookup above is usually cached, so listing the other matches
+        # rarely costs a request, and never blocks the event loop when it does.
+        try:
+            others = (await self.person_query.acandidates())[1:]
+        except ENDPOINT_ERRORS:
+            others = []
+        if others:
+            self.query_one("#output-candidates", Label).update("Other matches: " + ", ".join(
+                f"{record.full_name} ({record.birth_date})" for record in others
+            ))
+
+
+    def _show(self, person: Person) -> None:
+        """
+        Fill in the labels with a loaded person's data.
+        """
+        self.query_one("#output-name", Label).update(f"Name: {person.fullname}")
+        self.query_one("#output-dob", Label).update(f"Date of Birth: {person.dob}")
+        self.query_one("#output-dod", Label).update(f"Date of Death: {person.dod}")
+        self.query_one("#output-age", Label).update(f"Age: {person.age}")
+
+
     def on_button_pressed(self, event: Button.Pressed) -> None:
         """
         Handle button presses in the OutputData screen.
@@ -6,10 +6,13 @@ Wikipedia data about people. It uses the Textual library to create an interactiv
 TUI that allows users to:
 
 - Add names to query
+- Search stored names as you type
+- Keep stored data fresh in the background
 - View detailed information about people (birth date, death date, age)
 - Delete entries
 - Import names from text files
 - Toggle between light and dark themes
+- Watch live lookup metrics
 
 The interface is composed of several screens and dialogs:
 - QueryApp: The main application screen with a data table and control buttons
@@ -32,9 +35,14 @@ Usage:
 
 Dependencies:
     - textual: For creating the TUI
+    - asyncio: For loading names without blocking the interface
+    - threading, functools: For running the refresh scheduler as a worker thread
     - pathlib: For file path handling
     - sys: For platform-specific operations
 """
+import asyncio
+import threading
+from functools import partial
 from textual.app import App, ComposeResult, on
 from textual.containers import Horizontal, Vertical
 from textual.widgets import (
@@ -42,14 +50,19 @@ from textual.widgets import (
     DataTable,
     Footer,
     Header,
+    Input,
     Static,
 )
-from wikipedia_name_query.input_database import Database
+from wikipedia_name_query.input_database import PAGE_SIZE, Database
+from wikipedia_name_query.normalize import split_names
 from wikipedia_name_query.person import Person
+from wikipedia_name_query.profiling import Profiler
+from wikipedia_name_query.refresh import DEFAULT_INTERVAL, RefreshResult, RefreshScheduler
 from wikipedia_name_query.TUI.input_dialog import InputDialog
 from wikipedia_name_query.TUI.question_dialog import QuestionDialog
 from wikipedia_name_query.TUI.output_data import OutputData
 from wikipedia_name_query.TUI.file_view_screen import FileViewScreen
+from wikipedia_name_query.TUI.metrics_panel import MetricsPanel
 
 class QueryApp(App):
     """
@@ -69,18 +82,25 @@ class QueryApp(App):
         Database instance for storing and retrieving data
     theme : str
         Current theme setting ("textual-dark" or "textual-light")
+    profiler : Profiler or None
+        Profiler wrapped around the whole run, rendering included
+    refresher : RefreshScheduler or None
+        Scheduler run in a worker thread to refresh stale stored data
     """
 
-    CSS_PATH = "tui.tcss"
+    CSS_PATH = "TUI.tcss"
     BINDINGS = [
         ("m", "toggle_dark", "Toggle dark mode"),
         ("a", "add", "Add"),
         ("d", "delete", "Delete"),
         ("c", "clear_all", "Clear All"),
+        ("slash", "focus_search", "Search"),
+        ("s", "toggle_metrics", "Metrics"),
         ("q", "request_quit", "Quit"),
     ]
 
-    def __init__(self, db: Database, **kwargs):
+    def __init__(self, db: Database, profiler: Profiler | None = None,
+                 refresher: RefreshScheduler | None = None, refresh_interval: float = DEFAULT_INTERVAL, **kwargs):
         """
         Initialize the QueryApp.
 
@@ -88,14 +108,35 @@ class QueryApp(App):
         ----------
         db : Database
             Database instance for storing and retrieving data
+        profiler : Profiler, optional
+            Profiler to run for as long as the app does. Its files are
+            written, and its summary printed, once the terminal is restored.
+        refresher : RefreshScheduler, optional
+            Scheduler that looks up stale stored names again while the app runs.
+        refresh_interval : float, optional
+            Seconds between the refresher's runs. Defaults to `DEFAULT_INTERVAL`.
         **kwargs
             Additional keyword arguments passed to the parent App class
         """
         super().__init__(**kwargs)
         self.db = db
+        self.profiler = profiler
+        self.refresher = refresher
+        self.refresh_interval = refresh_interval
+        self._refresh_stop = threading.Event()
         self.theme = "textual-dark"  
 
 
+    def run(self, *args, **kwargs):
+        """
+        Run the app, under the profiler if one was given.
+        """
+        if self.profiler is None:
+            return super().run(*args, **kwargs)
+        with self.profiler:
+            return super().run(*args, **kwargs)
+
+
     def compose(self) -> ComposeResult:
         """
         Compose the screen layout with all UI elements.
@@ -104,15 +145,16 @@ class QueryApp(App):
         -------
         ComposeResult
             The composed UI elements including header, footer,
-            output table, and buttons panel.
+            search box, output table, and buttons panel.
         """
         yield Header()
         yield Footer()
 
         self.output_table = self.create_output_table()
         buttons_panel = self.create_buttons_panel()
+        search_input = Input(placeholder="Search names", id="search")
 
-        yield Horizontal(self.output_table, buttons_panel)
+        yield Horizontal(Vertical(search_input, self.output_table, classes="names-panel"), buttons_panel)
 
 
     def create_output_table(self) -> DataTable:
@@ -139,7 +181,8 @@ class QueryApp(App):
         Create and configure the buttons panel.
 
         Creates a vertical panel containing buttons for various operations
-        like Add, Delete, View, Clear All, and File operations.
+        like Add, Delete, View, Clear All, and File operations, above the
+        live metrics panel.
 
         Returns
         -------
@@ -159,6 +202,7 @@ class QueryApp(App):
             Static(classes="separator"),
             clear_button,
             file_button,
+            MetricsPanel(classes="metrics-panel", id="metrics"),
             classes="buttons-panel",
         )
         return buttons_panel
@@ -169,30 +213,143 @@ class QueryApp(App):
         Initialize the app when mounted.
 
         Sets up the initial state of the application including the title,
-        subtitle, and loads existing names from the database into the table.
+        subtitle, and starts loading existing names from the database into the
+        table and, if there is a refresher, refreshing stale data in the background.
         """
         self.title = "Wiki Query"
         self.sub_title = "An App To Query Wikipedia"
-        self._load_names()
+        self._last_id = 0
+        self._start_loading_names()
+        # Keep the single-key shortcuts working until the search box is chosen.
+        self.query_one("#output-table").focus()
+        if self.refresher is not None:
+            self.run_worker(
+                partial(self.refresher.run, self.refresh_interval, self._refresh_stop, self._report_refresh),
+                group="refresh", thread=True, exit_on_error=False,
+            )
+
+
+    def on_unmount(self) -> None:
+        """
+        Stop the refresh scheduler when the app closes.
+        """
+        self._refresh_stop.set()
+
+
+    def _report_refresh(self, result: RefreshResult) -> None:
+        """
+        Report a refresh run from the scheduler's thread, if it changed or failed anything.
+        """
+        if result.refreshed or result.failed:
+            self.call_from_thread(
+                self.notify,
+                f"Refreshed {result.refreshed} names; {result.failed} could not be looked up.",
+                severity="warning" if result.failed else "information",
+            )
+
+
+    def _start_loading_names(self) -> None:
+        """
+        Load the names not yet in the table in the background, so the app
+        stays responsive while a large database is read.
+        """
+        self.run_worker(self._load_names, group="load-names", exclusive=True)
 
 
-    def _load_names(self) -> None:
+    def _show_new_names(self) -> None:
+        """
+        Show names just added to the database: run the active search again,
+        or load the names not yet in the table if there is none. Either one
+        replaces a load or search still running, so no row is added twice.
+        """
+        text = self.query_one("#search", Input).value
+        if any(char.isalnum() for char in text):
+            self.run_worker(partial(self._show_search, text), group="load-names", exclusive=True)
+        else:
+            self._start_loading_names()
+
+
+    async def _load_names(self) -> None:
         """
         Load names from the database into the DataTable.
 
-        Retrieves all names from the database and populates the DataTable,
-        including error handling for invalid data formats.
+        Streams the names added since the last load a page at a time,
+        letting the table render after each page, with error handling for
+        invalid data formats. `_last_id` only moves past a page once it is
+        in the table, so a load that is cancelled and started again resumes
+        where the table ends.
         """
         name_list = self.query_one("#output-table")  # Reference by id
-        for name_data in self.db.get_all_names():
+        total = self.db.count_names()
+        page = []
+        last_id = self._last_id
+        for name_data in self.db.iter_names(after_id=self._last_id):
             if isinstance(name_data, tuple) and len(name_data) == 2:
                 id, name = name_data
+                last_id = max(last_id, id)
                 if isinstance(name, str) and name.strip():
-                    name_list.add_row(name, key=id)
+                    page.append(name_data)
                 else:
                     self.notify(f"Invalid name data: {name_data}")
             else:
                 self.notify(f"Invalid data format: {name_data}")
+            if len(page) >= PAGE_SIZE:
+                self._add_rows(name_list, page)
+                self._last_id = max(self._last_id, last_id)
+                page = []
+                await asyncio.sleep(0)
+        self._add_rows(name_list, page)
+        self._last_id = max(self._last_id, last_id)
+        self.sub_title = f"An App To Query Wikipedia - {total} names"
+
+
+    @staticmethod
+    def _add_rows(name_list: DataTable, rows: list[tuple[int, str]]) -> None:
+        """
+        Add `(id, name)` rows to the DataTable, keyed by ID.
+        """
+        for id, name in rows:
+            name_list.add_row(name, key=id)
+
+
+    def action_focus_search(self) -> None:
+        """
+        Move the focus to the search box.
+        """
+        self.query_one("#search", Input).focus()
+
+
+    @on(Input.Changed, "#search")
+    def search_names(self, event: Input.Changed) -> None:
+        """
+        Handle a change to the search box.
+
+        Shows the stored names matching the search, best match first, or
+        every name again once the box is cleared. Each keystroke replaces
+        the previous search.
+        """
+        self.run_worker(self._show_search(event.value), group="load-names", exclusive=True)
+
+
+    @on(Input.Submitted, "#search")
+    def leave_search(self) -> None:
+        """
+        Handle Enter in the search box by moving the focus to the results.
+        """
+        self.query_one("#output-table").focus()
+
+
+    async def _show_search(self, text: str) -> None:
+        """
+        Replace the table's rows with the names matching `text`, or all names if it has no words.
+        """
+        name_list = self.query_one("#output-table")
+        name_list.clear()
+        self._last_id = 0
+        if not any(char.isalnum() for char in text):
+            await self._load_names()
+            return
+        self._add_rows(name_list, self.db.search(text))
 
 
     def action_toggle_dark(self) -> None:
@@ -206,19 +363,29 @@ class QueryApp(App):
         self.notify(f"Theme: {self.theme}")
 
 
+    def action_toggle_metrics(self) -> None:
+        """
+        Show or hide the live metrics panel.
+        """
+        panel = self.query_one("#metrics")
+        panel.display = not panel.display
+
+
     @on(Button.Pressed, "#add")
     def action_add(self) -> None:
         """
         Handle the add action.
 
         Opens an InputDialog for adding a new name to the database and table.
-        On successful addition, updates both the database and the UI table.
+        On successful addition, updates both the database and the UI table;
+        names already in the list are not added again.
         """
         def check_name(name_data: str) -> None:
             if name_data:
-                self.db.add_name(name_data)
-                id, *name = self.db.get_last_name()
-                self.query_one("#output-table").add_row(*name, key=id)
+                if not self.db.add_name(name_data):
+                    self.notify(f"{name_data} is already in the list.")
+                    return
+                self._show_new_names()
                 self.notify("Name added successfully!")
 
         self.push_screen(InputDialog(), check_name)
@@ -240,8 +407,10 @@ class QueryApp(App):
 
         def check_answer(accepted: bool) -> None:
             if accepted:
+                self.workers.cancel_group(self, "load-names")
                 self.db.clear_all_names()
                 name_list.clear()
+                self._last_id = 0
                 self.notify("All names cleared successfully!")
 
         self.push_screen(QuestionDialog("Are you sure you want to remove all names?"), check_answer)
@@ -282,7 +451,8 @@ class QueryApp(App):
         """
         Handle the view action.
 
-        Opens a detailed view of the selected name's Wikipedia data.
+        Opens a detailed view of the selected name's Wikipedia data, shown from
+        the database when it has been looked up before.
         Handles cases where no name is selected or the table is empty.
         """
         name_list = self.query_one("#output-table")
@@ -297,7 +467,7 @@ class QueryApp(App):
 
             def check_answer(accepted: bool) -> None:
                 if accepted:
-                    self.push_screen(OutputData(name=name))
+                    self.push_screen(OutputData(name=name, db=self.db, name_id=row_key.value))
 
             self.push_screen(QuestionDialog(f"Are you sure you want to view the data for {name}?"), check_answer)
         except (IndexError, AttributeError):
@@ -311,26 +481,23 @@ class QueryApp(App):
 
         Opens the file selection screen for importing names from a text file.
         Processes the selected file and updates both the database and UI table
-        with the imported names.
+        with the imported names, skipping names already in the list.
         """
+        added = None
+
         def process_file_contents(file_contents: str) -> bool:
-            if file_contents:
-                names_added = False
-                for line in file_contents.splitlines():
-                    if line.strip():
-                        names = [name.strip() for name in line.split(',')]
-                        for name in names:
-                            if name:
-                                self.db.add_name(name)
-                                names_added = True
-                return names_added
-            return False
+            nonlocal added
+            # One transaction for the whole file rather than a commit per name.
+            added = self.db.add_names(split_names(file_contents or ""))
+            return bool(added.new or added.duplicates)
 
         def after_screen_dismissed(processed: bool) -> None:
             if processed:
-                self.query_one("#output-table").clear()
-                self._load_names()
-                self.notify("Names from file have been added to the database successfully!")
+                # New IDs are larger than any in the table, so loading on from
+                # `_last_id` adds just them and whatever an earlier load had left.
+                self._show_new_names()
+                self.notify(f"Added {added.new} names from the file; "
+                            f"skipped {added.duplicates} already in the list.")
 
         self.push_screen(FileViewScreen(process_file_contents), after_screen_dismissed)
 
@@ -1,5 +1,5 @@
 """Entry point for wikipedia_name_query."""
-from wikipedia_name_query.Commands import Commands
+from wikipedia_name_query.commands import Commands
 
 def main():
     cli = Commands()
@@ -0,0 +1,89 @@
+"""
+Imported Modules:
+- numpy: Provides the datetime64 arrays ages are computed over.
+- collections.abc: Provides the Sequence type.
+- dates: Used to parse date strings.
+- instrumentation: Provides the stage timers.
+
+Exact calendar ages computed in one vectorized pass.
+
+A person's age is the number of whole years between their birth and their
+death (or `as_of` for the living): the difference in years, minus one if
+the birthday has not come round yet in the final year.
+"""
+from collections.abc import Sequence
+import numpy as np
+from wikipedia_name_query.dates import to_days
+from wikipedia_name_query.instrumentation import stage
+
+# Returned in place of an age when the birth date is missing.
+NO_AGE = -1
+
+
+def calculate_ages(births: np.ndarray | Sequence, deaths: np.ndarray | Sequence | None = None,
+                   as_of: np.datetime64 | str | None = None) -> np.ndarray:
+    '''
+    Calculates the exact age in years of many people at once.
+
+    Parameters
+    ----------
+    births : array-like
+        The dates of birth, as a `datetime64` array or a sequence of xsd:date
+        strings. Missing or unparseable dates are NaT or None.
+    deaths : array-like, optional
+        The dates of death, aligned with `births`. NaT or None for people
+        who are alive. Defaults to None (everyone is alive).
+    as_of : datetime64 or str, optional
+        The date ages of living people are computed at. Defaults to today.
+
+    Returns
+    -------
+    ages : numpy.ndarray
+        The ages as integers, with `NO_AGE` where the birth date is missing or invalid.
+    '''
+    with stage("age"):
+        births = _as_days(births)
+        as_of = np.datetime64("today" if as_of is None else as_of, "D")
+        if deaths is None:
+            ends = np.full(births.shape, as_of)
+        else:
+            deaths = _as_days(deaths)
+            ends = np.where(np.isnat(deaths), as_of, deaths)
+
+        birth_years, birth_day_of_year = _split(births)
+        end_years, end_day_of_year = _split(ends)
+        ages = end_years - birth_years - (end_day_of_year < birth_day_of_year)
+        return np.where(np.isnat(births), NO_AGE, ages)
+
+
+def _as_days(dates: np.ndarray | Sequence) -> np.ndarray:
+    '''
+    Converts `dates` to a `datetime64[D]` array, with NaT for missing or invalid dates.
+    '''
+    if isinstance(dates, np.ndarray) and np.issubdtype(dates.dtype, np.datetime64):
+        return dates.astype("datetime64[D]")
+    nat = np.datetime64("NaT").view(np.int64)
+    days = [to_days(value) for value in dates]
+    return np.array([nat if value is None else value for value in days], dtype=np.int64).view("datetime64[D]")
+
+
+def _split(dates: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    Splits `datetime64[D]` dates into calendar years and a month/day key that
+    orders dates within a year.
+
+    Uses integer civil-from-days arithmetic in int32, which is several times
+    faster than casting through `datetime64[Y]` and `datetime64[M]`. NaT
+    produces garbage here and must be masked by the caller.
+    '''
+    # Shift to days since 0000-03-01, so leap days fall at the end of a year.
+    days = dates.view(np.int64).astype(np.int32) + 719468
+    era = days // 146097
+    day_of_era = days - era * 146097
+    year_of_era = (day_of_era - day_of_era // 1460 + day_of_era // 36524 - day_of_era // 146096) // 365
+    day_of_year = day_of_era - (365 * year_of_era + year_of_era // 4 - year_of_era // 100)
+    shifted_month = (5 * day_of_year + 2) // 153
+    day = day_of_year - (153 * shifted_month + 2) // 5 + 1
+    month = np.where(shifted_month < 10, shifted_month + 3, shifted_month - 9)
+    years = year_of_era + era * 400 + (month <= 2)
+    return years, month * 32 + day
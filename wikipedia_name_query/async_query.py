@@ -0,0 +1,220 @@
+"""
+Imported Modules:
+- asyncio: Used to bound concurrency and enforce per-request timeouts.
+- logging: Allows for logging messages to the console or a file.
+- time: Used to measure the latency of each lookup tier.
+- cache: Provides the two-tier result cache shared with `Query`.
+- metrics: Records lookup and endpoint metrics.
+- normalize: Provides the name normalization used for cache keys.
+- query: Provides the lookup tiers shared with `Query`.
+- ranking: De-duplicates and orders the candidates a lookup returns.
+- resilience: Guards the endpoint with rate limiting, retries and a circuit breaker.
+- singleflight: Coalesces concurrent lookups of the same name.
+- sparql: Provides the shared, connection-pooled async SPARQL client.
+"""
+import asyncio
+import logging
+import time
+from wikipedia_name_query.cache import MISSING, ResultCache, get_default_cache
+from wikipedia_name_query.metrics import ENDPOINT_REQUESTS, record_lookup
+from wikipedia_name_query.normalize import normalize_name
+from wikipedia_name_query.query import TIER_QUERIES, TIERS
+from wikipedia_name_query.ranking import rank_bindings
+from wikipedia_name_query.resilience import ENDPOINT_ERRORS, get_policy
+from wikipedia_name_query.singleflight import AsyncSingleFlight
+from wikipedia_name_query.sparql import get_async_client
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 16
+DEFAULT_TIMEOUT = 30.0
+
+# Shared by every AsyncQuery, so concurrent lookups of one name coalesce.
+LOOKUPS = AsyncSingleFlight()
+
+
+class AsyncQuery:
+    '''
+    The asyncio counterpart of `Query`.
+
+    Lookups run on the shared non-blocking SPARQL client, so hundreds of names
+    can be resolved concurrently from one event loop without a thread per
+    request. At most `max_concurrency` requests are in flight at once, and
+    every request is cancelled if it takes longer than `timeout` seconds.
+
+        query = AsyncQuery()
+        people = await query.get_people_info(["Donald Knuth", "Alan Turing"])
+
+    Attributes
+    ----------
+    cache : ResultCache
+        The cache consulted before querying DBpedia.
+    max_concurrency : int
+        The maximum number of requests in flight at once.
+    timeout : float
+        The number of seconds a single request may take.
+    last_timings : dict
+        The latency in seconds of each tier that ran during the last DBpedia lookup.
+    '''
+
+    def __init__(self, cache: ResultCache | None = None, max_concurrency: int = DEFAULT_CONCURRENCY,
+                 timeout: float = DEFAULT_TIMEOUT) -> None:
+        '''
+        Initializes an AsyncQuery instance.
+
+        Parameters
+        ----------
+        cache : ResultCache, optional
+            The result cache to use. Defaults to the shared cache from `get_default_cache`.
+        max_concurrency : int, optional
+            The maximum number of requests in flight at once. Defaults to `DEFAULT_CONCURRENCY`.
+        timeout : float, optional
+            The number of seconds a single request may take. Defaults to `DEFAULT_TIMEOUT`.
+        '''
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.cache = cache if cache is not None else get_default_cache()
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.last_timings = {}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def get_person_info(self, person_name: str, refresh: bool = False) -> list[list[str | None]] | None:
+        '''
+        Resolves the given person, with the same tiers, caching and result
+        format as `Query.get_person_info`.
+
+        Parameters
+        ----------
+        person_name : str
+            The name of the person to query.
+        refresh : bool, optional
+            Bypass the cache and store a freshly fetched result. Defaults to False.
+
+        Returns
+        -------
+        person_info : list of lists or None
+            A list of `[full_name, birth_date, death_date, uri]` rows, or None if
+            no information is found.
+
+        Raises
+        ------
+        ValueError
+            If the `person_name` parameter is None.
+        httpx.HTTPError, TimeoutError or CircuitOpenError
+            If the endpoint cannot answer after retries, or keeps taking longer
+            than `timeout` seconds, and nothing is cached.
+        '''
+        if person_name is None:
+            logger.error("person_name is None")
+            raise ValueError("person_name cannot be None")
+
+        start = time.perf_counter()
+        key = normalize_name(person_name)
+        if not refresh:
+            person_info = self.cache.get(key)
+            if person_info is not MISSING:
+                logger.debug("Cache hit for person: %s", person_name)
+                record_lookup("hit", time.perf_counter() - start)
+                return person_info
+
+        # Concurrent lookups of the same name share one request.
+        try:
+            person_info = await LOOKUPS.do(key, self._fetch_and_cache, person_name, key)
+        except Exception:
+            record_lookup("error", time.perf_counter() - start)
+            raise
+        record_lookup("miss", time.perf_counter() - start)
+        return person_info
+
+    async def _fetch_and_cache(self, person_name: str, key: str) -> list[list[str | None]] | None:
+        '''
+        Resolves `person_name` against DBpedia and stores the result under `key`.
+
+        If the endpoint is unavailable, an expired cached result is served instead when there is one.
+        '''
+        try:
+            person_info = await self._fetch_person_info(person_name)
+        except ENDPOINT_ERRORS as error:
+            stale = self.cache.get_stale(key)
+            if stale is MISSING:
+                raise
+            logger.warning("Serving stale result for %s: %s", person_name, error)
+            return stale
+        self.cache.set(key, person_info)
+        return person_info
+
+    async def get_people_info(self, names: list[str],
+                              refresh: bool = False) -> dict[str, list[list[str | None]] | None]:
+        '''
+        Resolves many people concurrently, at most `max_concurrency` requests at a time.
+
+        If any lookup fails, the remaining ones are cancelled and the error is raised.
+
+        Parameters
+        ----------
+        names : list of str
+            The names of the people to query.
+        refresh : bool, optional
+            Bypass the cache and store freshly fetched results. Defaults to False.
+
+        Returns
+        -------
+        people_info : dict
+            Maps each input name to its result, in the same format as `get_person_info`.
+        '''
+        async with asyncio.TaskGroup() as group:
+            tasks = {
+                name: group.create_task(self.get_person_info(name, refresh=refresh))
+                for name in dict.fromkeys(names)
+            }
+        return {name: tasks[name].result() for name in names}
+
+    async def _fetch_person_info(self, person_name: str) -> list[list[str | None]] | None:
+        '''
+        Resolves `person_name` tier by tier against DBpedia, bypassing the cache.
+        '''
+        logger.debug("Querying for person: %s", person_name)
+        self.last_timings = {}
+        for tier in TIERS:
+            query = TIER_QUERIES[tier](person_name)
+            if query is None:
+                continue
+
+            start = time.perf_counter()
+            bindings = await self._run_query(query)
+            self.last_timings[tier] = time.perf_counter() - start
+            logger.info("Tier %s for %s took %.3fs (%d rows)",
+                        tier, person_name, self.last_timings[tier], len(bindings))
+
+            if bindings:
+                return rank_bindings(person_name, bindings)
+
+        logger.info("No information found for person: %s", person_name)
+        return None
+
+    async def _run_query(self, query: str) -> list[dict]:
+        '''
+        Sends a SELECT query behind the shared resilience policy.
+        '''
+        try:
+            bindings = await get_policy().acall(self._attempt, query)
+        except Exception:
+            ENDPOINT_REQUESTS.labels(outcome="error").inc()
+            raise
+        ENDPOINT_REQUESTS.labels(outcome="ok").inc()
+        return bindings
+
+    async def _attempt(self, query: str) -> list[dict]:
+        '''
+        Makes one attempt at a query once a concurrency slot is free, cancelling it after `timeout` seconds.
+        '''
+        async with self._semaphore:
+            async with asyncio.timeout(self.timeout):
+                return await self._send(query)
+
+    async def _send(self, query: str) -> list[dict]:
+        '''
+        Sends a SELECT query to DBpedia over the shared client and returns its result bindings.
+        '''
+        return await get_async_client().select(query)
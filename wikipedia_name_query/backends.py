@@ -0,0 +1,92 @@
+"""
+Imported Modules:
+- collections.abc: Provides the Iterator type used by the backend protocol.
+- typing: Provides Protocol for the backend interface.
+- local_index: Provides the offline backend built from a DBpedia dump.
+- query: Provides the DBpedia SPARQL backend.
+
+Lookup backends that `Person`, the CLI and the TUI can switch between:
+
+- dbpedia: Queries the public DBpedia SPARQL endpoint (the default).
+- local: Reads an offline index built from a DBpedia persondata dump.
+
+Any object implementing `Backend` can be passed to `Person` instead.
+"""
+from collections.abc import Iterator
+from typing import Protocol, runtime_checkable
+from wikipedia_name_query.local_index import LOCAL_INDEX_PATH, LocalIndex
+from wikipedia_name_query.query import Query
+
+DEFAULT_BACKEND = "dbpedia"
+BACKENDS = ("dbpedia", "local")
+
+_default_query = None
+_local_indexes = {}
+
+
+@runtime_checkable
+class Backend(Protocol):
+    '''
+    The interface `Person` uses to look people up.
+
+    Every method returns rows of `[full_name, birth_date, death_date, uri]`.
+    '''
+
+    def get_person_info(self, person_name: str, refresh: bool = False) -> list[list[str | None]] | None:
+        '''
+        Returns every row matching `person_name`, or None if nothing matches.
+        '''
+
+    def get_people_info(self, names: list[str], chunk_size: int = ...,
+                        refresh: bool = False) -> dict[str, list[list[str | None]] | None]:
+        '''
+        Returns the result of `get_person_info` for each of `names`.
+        '''
+
+    def iter_person_info(self, person_name: str, page_size: int = ...) -> Iterator[list[str | None]]:
+        '''
+        Lazily yields the rows matching `person_name`.
+        '''
+
+    def invalidate(self, person_name: str | None = None) -> None:
+        '''
+        Drops any cached result for `person_name`, or for everyone if it is None.
+        '''
+
+
+def get_backend(name: str = DEFAULT_BACKEND, index_path: str = LOCAL_INDEX_PATH) -> Backend:
+    '''
+    Returns the lookup backend with the given name.
+
+    The DBpedia backend is created once and shared, and local indexes are
+    opened once per path and reused, so results resolved through one
+    `Person` can be reused by the next.
+
+    Parameters
+    ----------
+    name : str, optional
+        The backend name, one of `BACKENDS`. Defaults to `DEFAULT_BACKEND`.
+    index_path : str, optional
+        The index file used by the local backend. Defaults to `LOCAL_INDEX_PATH`.
+
+    Returns
+    -------
+    backend : Backend
+        The backend.
+
+    Raises
+    ------
+    ValueError
+        If `name` is not a known backend.
+    '''
+    global _default_query
+    if name == "dbpedia":
+        if _default_query is None:
+            _default_query = Query()
+        return _default_query
+    if name == "local":
+        key = str(index_path)
+        if key not in _local_indexes:
+            _local_indexes[key] = LocalIndex(index_path)
+        return _local_indexes[key]
+    raise ValueError(f"Unknown backend {name!r}; expected one of {', '.join(BACKENDS)}")
@@ -0,0 +1,502 @@
+"""
+Imported Modules:
+- json: Used to serialize cached query results for the on-disk store.
+- os: Used to read the cache location override from the environment.
+- pathlib: Used to locate the on-disk cache file.
+- sqlite3: Used for the persistent, cross-process cache tier.
+- threading: Used to make both cache tiers safe to share between threads.
+- time: Used to timestamp entries and enforce the time-to-live.
+- collections.OrderedDict: Used to keep the in-memory tier in LRU order.
+"""
+import json
+import os
+import pathlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_PATH = pathlib.Path().home() / "wikipedia_name_query_cache.db"
+# Environment variable that moves the on-disk cache away from `CACHE_PATH`.
+CACHE_PATH_ENV = "WIKIPEDIA_NAME_QUERY_CACHE"
+DEFAULT_MAXSIZE = 1024
+DEFAULT_TTL = 7 * 24 * 60 * 60
+
+# Sentinel returned on a cache miss, so a cached `None` (no person found)
+# can be told apart from a key that was never stored.
+MISSING = object()
+
+
+class CacheStats:
+    '''
+    Counters describing how a `ResultCache` has been used.
+
+    Attributes
+    ----------
+    memory_hits : int
+        Lookups answered by the in-memory tier.
+    disk_hits : int
+        Lookups answered by the on-disk tier.
+    misses : int
+        Lookups that neither tier could answer.
+    evictions : int
+        Entries dropped from the in-memory tier to stay within its size bound.
+    '''
+
+    def __init__(self) -> None:
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def add(self, counter: str, amount: int = 1) -> None:
+        '''
+        Increments one of the counters. Safe to call from several threads.
+
+        Parameters
+        ----------
+        counter : str
+            The counter name, e.g. "misses".
+        amount : int, optional
+            The amount to add. Defaults to 1.
+        '''
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    @property
+    def hits(self) -> int:
+        '''
+        Returns the number of lookups answered by either tier.
+        '''
+        with self._lock:
+            return self.memory_hits + self.disk_hits
+
+    def as_dict(self) -> dict[str, int]:
+        '''
+        Returns the counters as a dictionary.
+
+        Returns
+        -------
+        stats : dict
+            The counters keyed by name, including the combined `hits`.
+        '''
+        with self._lock:
+            return {
+                "hits": self.memory_hits + self.disk_hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class LRUCache:
+    '''
+    A bounded, thread-safe in-memory cache that evicts the least recently used entry.
+
+    Entries older than the time-to-live, if one is set, are treated as missing
+    by `get` but are still returned by `get_stale`.
+
+    Attributes
+    ----------
+    maxsize : int
+        The maximum number of entries kept in memory.
+    ttl : float or None
+        The number of seconds an entry stays fresh, or None if entries never expire.
+    evictions : int
+        The number of entries evicted so far.
+    '''
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, ttl: float | None = None) -> None:
+        '''
+        Initializes an empty LRU cache.
+
+        Parameters
+        ----------
+        maxsize : int, optional
+            The maximum number of entries kept in memory. Defaults to `DEFAULT_MAXSIZE`.
+        ttl : float, optional
+            The number of seconds an entry stays fresh. Defaults to None (no expiry).
+        '''
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> object:
+        '''
+        Returns the fresh value stored for `key` and marks it as recently used.
+
+        Returns
+        -------
+        value : object
+            The stored value, or `MISSING` if the key is not cached or has expired.
+        '''
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return MISSING
+            value, stored_at = self._data[key]
+        if self.ttl is not None and time.time() - stored_at > self.ttl:
+            return MISSING
+        return value
+
+    def get_stale(self, key: str) -> object:
+        '''
+        Returns the value stored for `key` even if it has expired.
+
+        Returns
+        -------
+        value : object
+            The stored value, or `MISSING` if the key is not cached.
+        '''
+        with self._lock:
+            entry = self._data.get(key)
+        return MISSING if entry is None else entry[0]
+
+    def set(self, key: str, value: object, stored_at: float | None = None) -> None:
+        '''
+        Stores `value` under `key`, evicting the oldest entry if the cache is full.
+
+        Parameters
+        ----------
+        key : str
+            The cache key.
+        value : object
+            The value to store.
+        stored_at : float, optional
+            When the value was fetched, as a Unix timestamp, so a value copied
+            from another tier keeps its age. Defaults to now.
+        '''
+        if stored_at is None:
+            stored_at = time.time()
+        with self._lock:
+            self._data[key] = (value, stored_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        '''
+        Removes `key` from the cache if it is present.
+        '''
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        '''
+        Removes every entry from the cache.
+        '''
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteCache:
+    '''
+    A persistent cache stored in SQLite that can be shared between processes.
+
+    Entries older than the time-to-live are treated as missing and are
+    removed by `purge_expired`.
+
+    Attributes
+    ----------
+    path : str
+        The path to the SQLite cache file.
+    ttl : float
+        The number of seconds an entry stays fresh.
+    '''
+
+    def __init__(self, path: str | None = None, ttl: float = DEFAULT_TTL) -> None:
+        '''
+        Opens (and if needed creates) the on-disk cache.
+
+        Parameters
+        ----------
+        path : str, optional
+            The path to the SQLite cache file. Defaults to `default_cache_path()`.
+        ttl : float, optional
+            The number of seconds an entry stays fresh. Defaults to `DEFAULT_TTL`.
+        '''
+        if path is None:
+            path = default_cache_path()
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS results(
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    fetched_at REAL NOT NULL
+                );
+            """)
+
+    def get(self, key: str) -> object:
+        '''
+        Returns the fresh value stored for `key`.
+
+        Returns
+        -------
+        value : object
+            The stored value, or `MISSING` if the key is absent or expired.
+        '''
+        entry = self.get_entry(key)
+        return entry if entry is MISSING else entry[0]
+
+    def get_entry(self, key: str) -> tuple[object, float] | object:
+        '''
+        Returns the fresh value stored for `key` together with when it was fetched.
+
+        Returns
+        -------
+        entry : tuple or object
+            A `(value, fetched_at)` pair, or `MISSING` if the key is absent or expired.
+        '''
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, fetched_at FROM results WHERE key = ?;", (key,)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return MISSING
+        return json.loads(row[0]), row[1]
+
+    def get_stale(self, key: str) -> object:
+        '''
+        Returns the value stored for `key` even if it has expired.
+
+        Returns
+        -------
+        value : object
+            The stored value, or `MISSING` if the key is absent.
+        '''
+        with self._lock:
+            row = self._db.execute("SELECT value FROM results WHERE key = ?;", (key,)).fetchone()
+        return MISSING if row is None else json.loads(row[0])
+
+    def set(self, key: str, value: object) -> None:
+        '''
+        Stores `value` under `key`, replacing any previous entry.
+        '''
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (key, value, fetched_at) VALUES (?, ?, ?);",
+                (key, json.dumps(value), time.time()),
+            )
+
+    def delete(self, key: str) -> None:
+        '''
+        Removes `key` from the cache if it is present.
+        '''
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM results WHERE key = ?;", (key,))
+
+    def clear(self) -> None:
+        '''
+        Removes every entry from the cache.
+        '''
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM results;")
+
+    def purge_expired(self) -> int:
+        '''
+        Removes every entry older than the time-to-live.
+
+        Returns
+        -------
+        removed : int
+            The number of entries removed.
+        '''
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "DELETE FROM results WHERE fetched_at < ?;", (time.time() - self.ttl,)
+            )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        '''
+        Closes the cache connection.
+        '''
+        self._db.close()
+
+
+class ResultCache:
+    '''
+    A two-tier cache for query results: a bounded in-memory LRU in front of a
+    persistent SQLite store.
+
+    Lookups try the memory tier first, then the disk tier; disk hits are
+    promoted into memory. Keys should already be normalized by the caller.
+
+    Attributes
+    ----------
+    memory : LRUCache
+        The in-process tier.
+    disk : SQLiteCache or None
+        The persistent tier, or None for a memory-only cache.
+    stats : CacheStats
+        Hit, miss and eviction counters.
+    '''
+
+    def __init__(self, memory: LRUCache | None = None, disk: SQLiteCache | None = None) -> None:
+        '''
+        Initializes the cache from its two tiers.
+
+        Parameters
+        ----------
+        memory : LRUCache, optional
+            The in-process tier. Defaults to a new `LRUCache` with the same
+            time-to-live as `disk`, or `DEFAULT_TTL` without one.
+        disk : SQLiteCache, optional
+            The persistent tier. Defaults to None (memory only).
+        '''
+        if memory is None:
+            memory = LRUCache(ttl=disk.ttl if disk is not None else DEFAULT_TTL)
+        self.memory = memory
+        self.disk = disk
+        self.stats = CacheStats()
+
+    def get(self, key: str) -> object:
+        '''
+        Returns the cached value for `key` from the fastest tier that has it.
+
+        Returns
+        -------
+        value : object
+            The cached value, or `MISSING` if no tier has it.
+        '''
+        value = self.memory.get(key)
+        if value is not MISSING:
+            self.stats.add("memory_hits")
+            return value
+
+        if self.disk is not None:
+            entry = self.disk.get_entry(key)
+            if entry is not MISSING:
+                value, fetched_at = entry
+                self.stats.add("disk_hits")
+                self._set_memory(key, value, fetched_at)
+                return value
+
+        self.stats.add("misses")
+        return MISSING
+
+    def get_stale(self, key: str) -> object:
+        '''
+        Returns any value stored for `key`, ignoring the time-to-live. Used to
+        serve stale data while the endpoint is unavailable.
+
+        Returns
+        -------
+        value : object
+            The stored value, or `MISSING` if no tier has it.
+        '''
+        value = self.memory.get_stale(key)
+        if value is MISSING and self.disk is not None:
+            value = self.disk.get_stale(key)
+        return value
+
+    def set(self, key: str, value: object) -> None:
+        '''
+        Stores `value` under `key` in both tiers.
+        '''
+        self._set_memory(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def invalidate(self, key: str | None = None) -> None:
+        '''
+        Removes `key` from both tiers, or every entry if `key` is None.
+        '''
+        if key is None:
+            self.memory.clear()
+            if self.disk is not None:
+                self.disk.clear()
+        else:
+            self.memory.delete(key)
+            if self.disk is not None:
+                self.disk.delete(key)
+
+    def close(self) -> None:
+        '''
+        Closes the persistent tier, if there is one.
+        '''
+        if self.disk is not None:
+            self.disk.close()
+
+    def _set_memory(self, key: str, value: object, stored_at: float | None = None) -> None:
+        evictions = self.memory.evictions
+        self.memory.set(key, value, stored_at)
+        self.stats.add("evictions", self.memory.evictions - evictions)
+
+
+_default_cache = None
+_default_cache_path = None
+_default_cache_lock = threading.Lock()
+
+
+def default_cache_path() -> str:
+    '''
+    Returns where the on-disk cache is kept.
+
+    The path set with `configure_cache` is used first, then the
+    `CACHE_PATH_ENV` environment variable, then `CACHE_PATH`.
+
+    Returns
+    -------
+    path : str
+        The path to the SQLite cache file.
+    '''
+    if _default_cache_path is not None:
+        return _default_cache_path
+    return os.environ.get(CACHE_PATH_ENV) or str(CACHE_PATH)
+
+
+def configure_cache(path: str | None = None) -> None:
+    '''
+    Changes where the shared cache keeps its on-disk tier.
+
+    The current shared cache is closed and a new one is created at the
+    given path on next use, so this should be called before any backend
+    has picked up the shared cache.
+
+    Parameters
+    ----------
+    path : str, optional
+        The path to the SQLite cache file. Defaults to None, which goes back
+        to the `CACHE_PATH_ENV` environment variable or `CACHE_PATH`.
+    '''
+    global _default_cache, _default_cache_path
+    with _default_cache_lock:
+        _default_cache_path = None if path is None else str(path)
+        if _default_cache is not None:
+            _default_cache.close()
+        _default_cache = None
+
+
+def get_default_cache() -> ResultCache:
+    '''
+    Returns the process-wide result cache shared by the CLI and the TUI.
+
+    The cache is created on first use with a persistent tier at
+    `default_cache_path()`.
+
+    Returns
+    -------
+    cache : ResultCache
+        The shared cache.
+    '''
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResultCache(disk=SQLiteCache())
+        return _default_cache
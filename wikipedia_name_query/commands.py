@@ -1,5 +1,44 @@
 import argparse
-from wikipedia_name_query.person import Person
+import asyncio
+import sys
+from wikipedia_name_query.async_query import AsyncQuery, DEFAULT_CONCURRENCY
+from wikipedia_name_query.backends import BACKENDS, DEFAULT_BACKEND, Backend, get_backend
+from wikipedia_name_query.cache import CACHE_PATH_ENV, configure_cache
+from wikipedia_name_query.input_database import DATABASE_PATH, RESOLVED_MAX_AGE, SEARCH_LIMIT, Database
+from wikipedia_name_query.instrumentation import LOG_PATH, TIMERS, configure_logging
+from wikipedia_name_query.local_index import LOCAL_INDEX_PATH
+from wikipedia_name_query.metrics import start_http_server, write_metrics
+from wikipedia_name_query.resilience import ENDPOINT_ERRORS
+from wikipedia_name_query.sparql import ENDPOINT, configure_client
+from wikipedia_name_query.normalize import split_names
+from wikipedia_name_query.person import DEFAULT_TOP_K, Person
+from wikipedia_name_query.profiling import DEFAULT_PROFILE_PATH, Profiler
+from wikipedia_name_query.refresh import (
+    DEFAULT_BATCH_SIZE, DEFAULT_MAX_NAMES, DEFAULT_MAX_REQUESTS, RefreshResult, RefreshScheduler,
+)
+
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR")
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Adds the `--profile` and `--profile-top` options to `parser`.
+    """
+    parser.add_argument("--profile", type=str, nargs="?", const=DEFAULT_PROFILE_PATH, default=None,
+                        metavar="PATH",
+                        help=f"Profile the run, writing PATH (default {DEFAULT_PROFILE_PATH}) "
+                             "and PATH.collapsed for flame graphs")
+    parser.add_argument("--profile-top", type=int, default=None, metavar="N",
+                        help="Profile the run and print the N functions with the most cumulative time")
+
+
+def profiler_from_args(args: argparse.Namespace) -> Profiler | None:
+    """
+    Returns the profiler asked for by the profiling options, or None.
+    """
+    if args.profile is None and args.profile_top is None:
+        return None
+    return Profiler(args.profile, top=args.profile_top)
 
 
 class Commands:
@@ -20,12 +59,49 @@ class Commands:
         DOB : Retrieves the date of birth of the person.
         DOD : Retrieves the date of death of the person.
         Load : Loads and prints all data collected about the person.
+        candidates : Lists the best matches for an ambiguous name.
+        search : Finds stored names (and their resolved full names) by words or prefixes.
+        refresh : Looks up stored names again whose resolved data is missing or stale.
+        batch : Prints data about every person named in a text file.
+        ingest : Builds the local backend's index from a DBpedia dump.
         setfname : Sets a new full name for the person.
         setage : Sets a new age for the person.
         setdob : Sets a new date of birth for the person.
         setdod : Sets a new date of death for the person.
+
+        The global `--backend` option selects where people are looked up:
+        `dbpedia` (the default) or `local`, the offline index at `--index`.
+        `--endpoint` points the dbpedia backend at another SPARQL endpoint,
+        such as the stand-in server in `stub_server`. `--cache` moves the
+        on-disk result cache (also settable with the
+        `WIKIPEDIA_NAME_QUERY_CACHE` environment variable). Nothing is logged
+        unless `--log-level` is given, and `--timings` prints how long each
+        lookup stage took. `--metrics-file` writes the metrics in the
+        Prometheus text format when the command finishes, and
+        `--metrics-port` serves them at `/metrics` while it runs.
+        `--profile` writes a pstats file and a collapsed-stack file for
+        flame graphs, and `--profile-top N` prints the N functions with the
+        most cumulative time when the command finishes.
         """
         parser = argparse.ArgumentParser(description="Find data about someone")
+        parser.add_argument("--backend", choices=BACKENDS, default=DEFAULT_BACKEND,
+                            help="Where to look people up")
+        parser.add_argument("--index", type=str, default=str(LOCAL_INDEX_PATH),
+                            help="Index file used by the local backend")
+        parser.add_argument("--endpoint", type=str, default=ENDPOINT,
+                            help="SPARQL endpoint used by the dbpedia backend")
+        parser.add_argument("--cache", type=str, default=None,
+                            help=f"On-disk result cache file (default: ${CACHE_PATH_ENV} or ~/wikipedia_name_query_cache.db)")
+        parser.add_argument("--log-level", choices=LOG_LEVELS, default=None,
+                            help="Write log messages at this level and above to --log-file")
+        parser.add_argument("--log-file", type=str, default=LOG_PATH, help="File log messages are written to")
+        parser.add_argument("--timings", action="store_true",
+                            help="Print the time spent in each lookup stage when done")
+        parser.add_argument("--metrics-file", type=str, default=None,
+                            help="Write metrics in the Prometheus text format to this file when done")
+        parser.add_argument("--metrics-port", type=int, default=None,
+                            help="Serve metrics at http://127.0.0.1:PORT/metrics while running")
+        add_profile_arguments(parser)
         subparsers = parser.add_subparsers(help="commands", dest="command")
 
         name_parser = subparsers.add_parser("name", help="Retrieves the person's name")
@@ -43,38 +119,260 @@ class Commands:
         load_parser = subparsers.add_parser("Load", help="Prints all data collected about the person")
         load_parser.add_argument("--Name", type=str, required=True, help="Selects person")
 
+        candidates_parser = subparsers.add_parser("candidates", help="Lists the best matches for a name")
+        candidates_parser.add_argument("--Name", type=str, required=True, help="Name to match")
+        candidates_parser.add_argument("--Top", type=int, default=DEFAULT_TOP_K,
+                                       help="Maximum number of matches to list")
+
+        for command, field in (("setfname", "name"), ("setage", "age"),
+                               ("setdob", "date of birth"), ("setdod", "date of death")):
+            set_parser = subparsers.add_parser(command, help=f"Sets a new {field} for the person")
+            set_parser.add_argument("--Name", type=str, required=True, help="Selects person")
+
+        search_parser = subparsers.add_parser("search", help="Finds stored names by words or prefixes")
+        search_parser.add_argument("--Text", type=str, required=True, help="Words or word prefixes to find")
+        search_parser.add_argument("--Limit", type=int, default=SEARCH_LIMIT,
+                                   help="Maximum number of names to list")
+        search_parser.add_argument("--Database", type=str, default=str(DATABASE_PATH),
+                                   help="Database of stored names")
+
+        refresh_parser = subparsers.add_parser("refresh", help="Looks up stale stored names again")
+        refresh_parser.add_argument("--Database", type=str, default=str(DATABASE_PATH),
+                                    help="Database of stored names")
+        refresh_parser.add_argument("--TTL", type=float, default=RESOLVED_MAX_AGE,
+                                    help="Seconds after which resolved data is looked up again")
+        refresh_parser.add_argument("--MaxNames", type=int, default=DEFAULT_MAX_NAMES,
+                                    help="Maximum number of names looked up per run")
+        refresh_parser.add_argument("--MaxRequests", type=int, default=DEFAULT_MAX_REQUESTS,
+                                    help="Number of endpoint requests after which a run stops")
+        refresh_parser.add_argument("--BatchSize", type=int, default=DEFAULT_BATCH_SIZE,
+                                    help="Number of names per batched lookup")
+        refresh_parser.add_argument("--Interval", type=float, default=None,
+                                    help="Keep running, every this many seconds, instead of once")
+
+        batch_parser = subparsers.add_parser("batch", help="Prints data about every person named in a file")
+        batch_parser.add_argument("--File", type=str, required=True,
+                                  help="Text file of comma or newline separated names")
+        batch_parser.add_argument("--Concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                                  help="Maximum number of lookups in flight at once")
+
+        ingest_parser = subparsers.add_parser("ingest", help="Builds the local index from a DBpedia dump")
+        ingest_parser.add_argument("--File", type=str, required=True,
+                                   help="N-Triples dump file, optionally .gz or .bz2 compressed")
+
         args = parser.parse_args()
-        person = Person(args.Name)
-        person.load()
+        if args.log_level is not None:
+            configure_logging(args.log_level, args.log_file)
+        server = start_http_server(args.metrics_port) if args.metrics_port is not None else None
+        profiler = profiler_from_args(args)
+        try:
+            if profiler is not None:
+                with profiler:
+                    self._run(args)
+            else:
+                self._run(args)
+        finally:
+            if args.timings:
+                self._print_timings()
+            if args.metrics_file is not None:
+                write_metrics(args.metrics_file)
+            if server is not None:
+                server.shutdown()
+
+    def _run(self, args: argparse.Namespace) -> None:
+        """
+        Runs the command selected on the command line.
+        """
+        if args.command == "ingest":
+            count = get_backend("local", args.index).ingest(args.File)
+            print(f"Ingested {count} triples into {args.index}")
+            return
 
-        if args.command == "name":
+        if args.command == "search":
+            self.search(args.Text, args.Limit, args.Database)
+            return
+
+        configure_client(endpoint=args.endpoint)
+        if args.cache is not None:
+            configure_cache(args.cache)
+        backend = get_backend(args.backend, args.index)
+        if args.command == "refresh":
+            self.refresh(args, backend)
+            return
+        if args.command == "batch":
+            self.batch(args.File, args.Concurrency, backend)
+            return
+
+        # Person loads lazily, so only the commands that read its data query the backend.
+        person = Person(args.Name, backend)
+        try:
+            if args.command == "candidates":
+                self.candidates(person, args.Top)
+            else:
+                self._dispatch(args.command, person)
+        except ENDPOINT_ERRORS as error:
+            print(f"Could not look up {args.Name}: {error}")
+
+    @staticmethod
+    def _dispatch(command: str, person: Person) -> None:
+        """
+        Runs a single-person command.
+        """
+        if command == "name":
             print(person.get_fname())
 
-        elif args.command == "age":
+        elif command == "age":
             print(person.get_age())
 
-        elif args.command == "DOB":
+        elif command == "DOB":
             print(person.get_dob())
 
-        elif args.command == "DOD":
+        elif command == "DOD":
             print(person.get_dod())
 
-        elif args.command == "setfname":
+        elif command == "Load":
+            print(f"Name={person.fullname}, DOB={person.dob}, DOD={person.dod}, Age={person.age}")
+
+        elif command == "setfname":
             fullname = person.set_fullname()
             print("You set the name to:", fullname)
 
-        elif args.command == "setage":
+        elif command == "setage":
             age = person.set_age()
             print("You set the age to:", age)
 
-        elif args.command == "setdob":
+        elif command == "setdob":
             dob = person.set_dob()
             print("You set the date of birth to:", dob)
 
-        elif args.command == "setdod":
+        elif command == "setdod":
             dod = person.set_dod()
             print("You set the date of death to:", dod)
 
         else:
             print("No such command. Please try again.")
 
+
+    @staticmethod
+    def _print_timings() -> None:
+        """
+        Prints the totals of the stage timers to standard error.
+        """
+        for name, totals in sorted(TIMERS.stats().items()):
+            print(f"{name}: {totals['count']} runs, {totals['total'] * 1000:.1f} ms total, "
+                  f"{totals['mean'] * 1000:.3f} ms mean", file=sys.stderr)
+
+    @staticmethod
+    def candidates(person: Person, top_k: int = DEFAULT_TOP_K) -> None:
+        """
+        Prints the best matches for the person's name, one numbered line each.
+
+        Parameters
+        ----------
+        person : Person
+            The person whose name is matched.
+        top_k : int, optional
+            The maximum number of matches to print.
+        """
+        records = person.candidates(top_k)
+        if not records:
+            print(f"No matches for {person.name}")
+        for rank, record in enumerate(records, 1):
+            print(f"{rank}. {record.full_name}: DOB={record.birth_date}, DOD={record.death_date}")
+
+    @staticmethod
+    def search(text: str, limit: int = SEARCH_LIMIT, path: str = DATABASE_PATH) -> None:
+        """
+        Prints the stored names matching `text`, best match first, one per line.
+
+        Parameters
+        ----------
+        text : str
+            Words or word prefixes to find in stored names and resolved full names.
+        limit : int, optional
+            The maximum number of names to print.
+        path : str, optional
+            The database of stored names. Defaults to `DATABASE_PATH`.
+        """
+        db = Database(path)
+        try:
+            results = db.search(text, limit)
+        finally:
+            db.close()
+        if not results:
+            print(f"No stored names match {text}")
+        for id, name in results:
+            print(f"{id}: {name}")
+
+    @staticmethod
+    def refresh(args: argparse.Namespace, backend: Backend) -> None:
+        """
+        Looks up the stored names whose resolved data is missing or stale,
+        once or every `--Interval` seconds until interrupted.
+
+        Parameters
+        ----------
+        args : argparse.Namespace
+            The `refresh` command's options.
+        backend : Backend
+            The backend to look people up in.
+        """
+        def report(result: RefreshResult) -> None:
+            print(f"Refreshed {result.refreshed} names ({result.not_found} not found, {result.failed} failed)")
+
+        db = Database(args.Database)
+        scheduler = RefreshScheduler(db, backend, max_age=args.TTL, max_names=args.MaxNames,
+                                     batch_size=args.BatchSize, max_requests=args.MaxRequests)
+        try:
+            if args.Interval is None:
+                report(scheduler.refresh_once())
+            else:
+                scheduler.run(args.Interval, on_refresh=report)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            db.close()
+
+    def batch(self, path: str, concurrency: int = DEFAULT_CONCURRENCY, backend: Backend | None = None) -> None:
+        """
+        Resolves every name in a text file concurrently and prints one line per person.
+
+        Parameters
+        ----------
+        path : str
+            Path to a text file of comma or newline separated names.
+        concurrency : int, optional
+            Maximum number of lookups in flight at once.
+        backend : Backend, optional
+            The backend to look people up in. Defaults to DBpedia.
+        """
+        with open(path, "r") as file:
+            names = split_names(file.read())
+
+        backend = backend if backend is not None else get_backend()
+        people = [Person(name, backend) for name in names]
+        errors = asyncio.run(self._load_people(people, concurrency))
+        for person, error in zip(people, errors):
+            if error is not None:
+                print(f"{person.name}: Could not look up: {error}")
+            else:
+                print(f"{person.name}: Name={person.fullname}, DOB={person.dob}, "
+                      f"DOD={person.dod}, Age={person.age}")
+
+    @staticmethod
+    async def _load_people(people: list[Person], concurrency: int) -> list[Exception | None]:
+        """
+        Loads every person through one shared `AsyncQuery`, returning the
+        endpoint error for each person whose lookup failed, or None.
+        """
+        query = AsyncQuery(max_concurrency=concurrency)
+        results = await asyncio.gather(*(person.aload(query) for person in people), return_exceptions=True)
+        errors = []
+        for result in results:
+            if isinstance(result, ENDPOINT_ERRORS):
+                errors.append(result)
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                errors.append(None)
+        return errors
@@ -0,0 +1,169 @@
+"""
+Imported Modules:
+- re: Used by the tolerant parser for the less common xsd forms.
+- functools: Provides the bounded memo cache.
+- typing: Provides the NamedTuple type.
+
+Parsing of the xsd:date values DBpedia returns for birth and death dates.
+
+Most values are plain `YYYY-MM-DD` and are handled by a hand-written fast
+path. The fallback also accepts BCE years (`-0384-01-01`), timezone
+suffixes (`1938-01-10Z`, `1938-01-10+02:00`), dateTimes, gYearMonth
+(`1938-01`), gYear (`1938`) and gMonthDay (`--01-10`) values. Anything
+else parses to None, so a malformed date never aborts a lookup.
+
+Years are astronomical, as in XSD 1.1: year 0 is 1 BCE and -1 is 2 BCE.
+Results are memoized, since the same dates recur across a batch.
+"""
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+DATE_CACHE_SIZE = 65536
+# Larger years are rejected, which keeps day counts well within 32 bits.
+MAX_YEAR = 999999
+
+# Days from 0000-03-01 to 1970-01-01 in the proleptic Gregorian calendar.
+EPOCH_SHIFT = 719468
+
+TIMEZONE = r"(?:Z|[+-]\d{2}:\d{2})?"
+XSD_DATE = re.compile(
+    r"^(-?)(\d{4,})(?:-(\d{2})(?:-(\d{2})(?:T\d{2}:\d{2}:\d{2}(?:\.\d+)?)?)?)?" + TIMEZONE + "$", re.ASCII
+)
+XSD_MONTH_DAY = re.compile(r"^--(\d{2})-(\d{2})" + TIMEZONE + "$", re.ASCII)
+
+
+class XSDDate(NamedTuple):
+    '''
+    A parsed date. Parts missing from the source value are None.
+
+    Attributes
+    ----------
+    year : int or None
+        The astronomical year, or None for a gMonthDay value.
+    month : int or None
+        The month (1-12), or None for a gYear value.
+    day : int or None
+        The day of the month, or None for gYear and gYearMonth values.
+    '''
+    year: int | None
+    month: int | None
+    day: int | None
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_date(value: str | None) -> XSDDate | None:
+    '''
+    Parses an xsd:date (or related) value.
+
+    Parameters
+    ----------
+    value : str or None
+        The value to parse.
+
+    Returns
+    -------
+    date : XSDDate or None
+        The parsed date, or None if `value` is None or not a valid date.
+    '''
+    if not value:
+        return None
+    # Fast path for plain YYYY-MM-DD, which is almost every value.
+    if len(value) == 10 and value[4] == "-" and value[7] == "-":
+        year, month, day = value[:4], value[5:7], value[8:]
+        # isdecimal alone also accepts non-ASCII digits such as '٣'.
+        if value.isascii() and year.isdecimal() and month.isdecimal() and day.isdecimal():
+            return _checked(int(year), int(month), int(day))
+        return None
+
+    if match := XSD_DATE.match(value):
+        sign, year, month, day = match.groups()
+        year = -int(year) if sign else int(year)
+        return _checked(year, int(month) if month else None, int(day) if day else None)
+    if match := XSD_MONTH_DAY.match(value):
+        return _checked(None, int(match.group(1)), int(match.group(2)))
+    return None
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def to_days(value: str | None) -> int | None:
+    '''
+    Converts a date value to days since 1970-01-01.
+
+    Missing months and days are taken to be the first, so a gYear value
+    maps to the first of January.
+
+    Parameters
+    ----------
+    value : str or None
+        The value to convert.
+
+    Returns
+    -------
+    days : int or None
+        The number of days, or None if the value has no year or is not a valid date.
+    '''
+    date = parse_date(value)
+    if date is None or date.year is None:
+        return None
+    return days_from_civil(date.year, date.month or 1, date.day or 1)
+
+
+def days_from_civil(year: int, month: int, day: int) -> int:
+    '''
+    Returns the number of days from 1970-01-01 to the given proleptic Gregorian date.
+    '''
+    # Count from 0000-03-01, so the leap day falls at the end of each year.
+    year -= month <= 2
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - EPOCH_SHIFT
+
+
+def civil_from_days(days: int) -> tuple[int, int, int]:
+    '''
+    Returns the proleptic Gregorian `(year, month, day)` that is `days` after 1970-01-01.
+    '''
+    days += EPOCH_SHIFT
+    era = days // 146097
+    day_of_era = days - era * 146097
+    year_of_era = (day_of_era - day_of_era // 1460 + day_of_era // 36524 - day_of_era // 146096) // 365
+    day_of_year = day_of_era - (365 * year_of_era + year_of_era // 4 - year_of_era // 100)
+    shifted_month = (5 * day_of_year + 2) // 153
+    day = day_of_year - (153 * shifted_month + 2) // 5 + 1
+    month = shifted_month + 3 if shifted_month < 10 else shifted_month - 9
+    return year_of_era + era * 400 + (month <= 2), month, day
+
+
+def format_days(days: int) -> str:
+    '''
+    Formats days since 1970-01-01 as an xsd:date, with a leading minus for BCE years.
+    '''
+    year, month, day = civil_from_days(days)
+    sign = "-" if year < 0 else ""
+    return f"{sign}{abs(year):04d}-{month:02d}-{day:02d}"
+
+
+def _checked(year: int | None, month: int | None, day: int | None) -> XSDDate | None:
+    '''
+    Returns the date if its year, month and day are in range, otherwise None.
+    '''
+    if year is not None and abs(year) > MAX_YEAR:
+        return None
+    if month is not None and not 1 <= month <= 12:
+        return None
+    if day is not None and not 1 <= day <= _days_in_month(year, month):
+        return None
+    return XSDDate(year, month, day)
+
+
+def _days_in_month(year: int | None, month: int) -> int:
+    '''
+    Returns the length of `month`, allowing 29 February when the year is unknown.
+    '''
+    if month == 2:
+        leap = year is None or (year % 4 == 0 and (year % 100 != 0 or year % 400 == 0))
+        return 29 if leap else 28
+    return 30 if month in (4, 6, 9, 11) else 31
@@ -1,12 +1,317 @@
 '''
 Imported Modules:
+- json: Used to pass a batch of IDs to one statement.
+- logging: Allows for logging messages to the console or a file.
 - Pathlib: Used in connecting to the database.
 - SQLite3: Used to create the database and perform queries.
+- threading: Used to give each thread its own connection.
+- time: Used to timestamp resolved results.
+- collections.abc: Provides the Iterable and Iterator types.
+- itertools: Used to split rows into batches.
+- re: Used to split search text into words.
+- dataclasses: Used to define the resolved result record.
+- metrics: Records the latency of each database operation.
+- normalize: Provides the name normalization used for the unique name key.
+- records: Provides the person record resolved results convert to.
+
+The schema is versioned with SQLite's `user_version` pragma: each entry of
+`MIGRATIONS` upgrades the database by one version, and opening a database
+applies any it has not had yet.
+
+Connections use WAL journaling, so readers never wait for a writer, and
+each thread gets its own connection, so the CLI, the TUI and background
+workers can all share the same `List.db`.
 '''
+import json
+import logging
 import pathlib
+import re
 import sqlite3
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from itertools import islice
+from wikipedia_name_query.metrics import DB_OPERATION_SECONDS
+from wikipedia_name_query.normalize import normalize_name
+from wikipedia_name_query.records import PersonRecord
+
+logger = logging.getLogger(__name__)
 
 DATABASE_PATH = pathlib.Path().home() / "List.db"
+# Rows passed to each executemany call by the bulk methods.
+BATCH_SIZE = 10000
+# Rows fetched per query by `iter_names`.
+PAGE_SIZE = 1000
+SEARCH_LIMIT = 50
+# Matches ranked per search; ranking every match of a short prefix over a
+# large table would take far longer than typing the next character.
+SEARCH_CANDIDATES = 1000
+# Seconds a connection waits for another one's write lock before failing.
+BUSY_TIMEOUT = 5.0
+MMAP_SIZE = 64 * 1024 * 1024
+CACHE_SIZE_KIB = 16 * 1024
+
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL;",
+    # Durable at every checkpoint, without an fsync per commit.
+    "PRAGMA synchronous = NORMAL;",
+    "PRAGMA foreign_keys = ON;",
+    "PRAGMA temp_store = MEMORY;",
+    f"PRAGMA mmap_size = {MMAP_SIZE};",
+    f"PRAGMA cache_size = -{CACHE_SIZE_KIB};",
+)
+
+STATUS_FOUND = "found"
+STATUS_NOT_FOUND = "not_found"
+# Resolved results older than this many seconds are refreshed.
+RESOLVED_MAX_AGE = 7 * 24 * 60 * 60
+
+MIGRATIONS = (
+    # 1: the original list of names.
+    '''
+    CREATE TABLE IF NOT EXISTS names(
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL
+    );
+    ''',
+    # 2: the resolved data for each name, so stored names display without a lookup.
+    '''
+    CREATE TABLE resolved(
+        name_id INTEGER PRIMARY KEY REFERENCES names(id) ON DELETE CASCADE,
+        fullname TEXT,
+        dob TEXT,
+        dod TEXT,
+        uri TEXT,
+        fetched_at REAL NOT NULL,
+        status TEXT NOT NULL
+    );
+    CREATE INDEX resolved_fetched_at ON resolved(fetched_at);
+    CREATE INDEX resolved_uri ON resolved(uri);
+    ''',
+    # 3: a unique normalized key per name. Duplicates are merged into the
+    # oldest row, which takes the most recent resolved result of the group,
+    # replacing its own only when a duplicate's is newer.
+    '''
+    ALTER TABLE names ADD COLUMN name_key TEXT;
+    UPDATE names SET name_key = normalize_name(name);
+    CREATE TEMP TABLE keepers AS
+        SELECT name_key, min(id) AS id FROM names GROUP BY name_key;
+    INSERT INTO resolved (name_id, fullname, dob, dod, uri, fetched_at, status)
+        SELECT keepers.id, resolved.fullname, resolved.dob, resolved.dod, resolved.uri,
+               resolved.fetched_at, resolved.status
+        FROM resolved
+        JOIN names ON names.id = resolved.name_id
+        JOIN keepers ON keepers.name_key = names.name_key
+        WHERE names.id != keepers.id
+    ON CONFLICT(name_id) DO UPDATE SET
+        fullname = excluded.fullname, dob = excluded.dob, dod = excluded.dod, uri = excluded.uri,
+        fetched_at = excluded.fetched_at, status = excluded.status
+    WHERE excluded.fetched_at > resolved.fetched_at;
+    DELETE FROM names WHERE id NOT IN (SELECT id FROM keepers);
+    DROP TABLE keepers;
+    CREATE UNIQUE INDEX names_name_key ON names(name_key);
+    ''',
+    # 4: a full-text index over stored names and resolved full names, with
+    # prefix indexes for search-as-you-type. Its rowid is the name's ID.
+    '''
+    CREATE VIRTUAL TABLE names_fts USING fts5(
+        name, fullname, tokenize = 'unicode61 remove_diacritics 2', prefix = '1 2 3'
+    );
+    INSERT INTO names_fts (rowid, name, fullname)
+        SELECT names.id, names.name, resolved.fullname
+        FROM names LEFT JOIN resolved ON resolved.name_id = names.id;
+    -- Bulk inserts set `deferred` for their own transaction and index their
+    -- rows in one statement, which is several times faster than the trigger.
+    CREATE TABLE search_control(deferred INTEGER NOT NULL);
+    INSERT INTO search_control VALUES (0);
+    CREATE TRIGGER names_fts_insert AFTER INSERT ON names
+    WHEN (SELECT deferred FROM search_control) = 0 BEGIN
+        INSERT INTO names_fts (rowid, name) VALUES (new.id, new.name);
+    END;
+    CREATE TRIGGER names_fts_update AFTER UPDATE OF name ON names BEGIN
+        UPDATE names_fts SET name = new.name WHERE rowid = new.id;
+    END;
+    CREATE TRIGGER names_fts_delete AFTER DELETE ON names BEGIN
+        DELETE FROM names_fts WHERE rowid = old.id;
+    END;
+    CREATE TRIGGER resolved_fts_insert AFTER INSERT ON resolved BEGIN
+        UPDATE names_fts SET fullname = new.fullname WHERE rowid = new.name_id;
+    END;
+    CREATE TRIGGER resolved_fts_update AFTER UPDATE OF fullname ON resolved BEGIN
+        UPDATE names_fts SET fullname = new.fullname WHERE rowid = new.name_id;
+    END;
+    CREATE TRIGGER resolved_fts_delete AFTER DELETE ON resolved BEGIN
+        UPDATE names_fts SET fullname = NULL WHERE rowid = old.name_id;
+    END;
+    ''',
+    # 5: per-row triggers made bulk deletes and saved results many times
+    # slower, so `remove_names`, `clear_all_names` and `save_resolved` update
+    # names_fts themselves with one statement per batch.
+    '''
+    DROP TRIGGER names_fts_delete;
+    DROP TRIGGER resolved_fts_insert;
+    DROP TRIGGER resolved_fts_update;
+    DROP TRIGGER resolved_fts_delete;
+    ''',
+)
+
+# Keep names_fts in step with a batch of names removed or resolved. Each is
+# run once per batch with the batch's name IDs as a JSON array.
+FTS_DELETE = "DELETE FROM names_fts WHERE rowid IN (SELECT value FROM json_each(?));"
+FTS_SET_FULLNAME = '''
+    UPDATE names_fts SET fullname = resolved.fullname
+    FROM resolved
+    WHERE names_fts.rowid = resolved.name_id
+        AND resolved.name_id IN (SELECT value FROM json_each(?))
+        AND names_fts.fullname IS NOT resolved.fullname;
+'''
+
+
+@dataclass(frozen=True, slots=True)
+class Added:
+    '''
+    The outcome of adding names.
+
+    Attributes
+    ----------
+    ids : list of int
+        The IDs of the names that were new, in order.
+    new : int
+        How many names were new.
+    duplicates : int
+        How many names were already stored (or repeated), and so skipped.
+    '''
+    ids: list[int]
+    new: int
+    duplicates: int
+
+
+@dataclass(frozen=True, slots=True)
+class Resolved:
+    '''
+    The stored lookup result for one name.
+
+    Attributes
+    ----------
+    name_id : int
+        The ID of the name in the `names` table.
+    fullname : str or None
+        The full name found, or None if nobody matched.
+    dob : str or None
+        The date of birth found.
+    dod : str or None
+        The date of death found.
+    uri : str or None
+        The URI of the entity found, when the backend reports one.
+    fetched_at : float
+        When the lookup was made, in seconds since the epoch.
+    status : str
+        `STATUS_FOUND` or `STATUS_NOT_FOUND`.
+    '''
+    name_id: int
+    fullname: str | None
+    dob: str | None
+    dod: str | None
+    uri: str | None
+    fetched_at: float
+    status: str
+
+    @classmethod
+    def from_record(cls, name_id: int, record: PersonRecord | None,
+                    fetched_at: float | None = None) -> "Resolved":
+        '''
+        Builds the result of a lookup, where a record of None means nobody matched.
+        '''
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        if record is None:
+            return cls(name_id, None, None, None, None, fetched_at, STATUS_NOT_FOUND)
+        return cls(name_id, record.full_name, record.birth_date, record.death_date, record.uri,
+                   fetched_at, STATUS_FOUND)
+
+    @property
+    def record(self) -> PersonRecord | None:
+        '''
+        The person found, or None if nobody matched.
+        '''
+        if self.status != STATUS_FOUND:
+            return None
+        return PersonRecord(self.fullname, self.dob, self.dod, self.uri)
+
+    def is_stale(self, max_age: float = RESOLVED_MAX_AGE, now: float | None = None) -> bool:
+        '''
+        Returns whether the result is older than `max_age` seconds.
+        '''
+        now = time.time() if now is None else now
+        return now - self.fetched_at > max_age
+
+
+class ConnectionManager:
+    '''
+    Hands each thread its own tuned connection to one SQLite file.
+
+    Every connection is kept in a registry with the thread that opened it.
+    Connections of threads that have finished are closed the next time a
+    connection is opened, and `close` closes all the others.
+
+    Attributes
+    ----------
+    path : str
+        The path to the SQLite database file.
+    '''
+
+    def __init__(self, path: str) -> None:
+        '''
+        Parameters
+        ----------
+        path : str
+            The path to the SQLite database file.
+        '''
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = {}
+
+    def connection(self) -> sqlite3.Connection:
+        '''
+        Returns the calling thread's connection, opening it on first use.
+        '''
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # Only this thread uses the connection; `close` may close it from another.
+            connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+            for pragma in PRAGMAS:
+                connection.execute(pragma)
+            connection.create_function("normalize_name", 1, normalize_name, deterministic=True)
+            self._local.connection = connection
+            self._local.cursor = connection.cursor()
+            with self._lock:
+                finished = [thread for thread in self._connections if not thread.is_alive()]
+                dead = [self._connections.pop(thread) for thread in finished]
+                self._connections[threading.current_thread()] = connection
+            for old in dead:
+                old.close()
+        return connection
+
+    def __len__(self) -> int:
+        return len(self._connections)
+
+    def cursor(self) -> sqlite3.Cursor:
+        '''
+        Returns the calling thread's cursor.
+        '''
+        self.connection()
+        return self._local.cursor
+
+    def close(self) -> None:
+        '''
+        Closes every connection opened so far, whichever thread opened it.
+        '''
+        with self._lock:
+            connections, self._connections = self._connections, {}
+        for connection in connections.values():
+            connection.close()
+        self._local = threading.local()
 
 
 class Database:
@@ -17,12 +322,17 @@ class Database:
     and viewing items in a database table. It can also be imported into other
     scripts for its functionality.
 
+    A `Database` can be shared between threads: each thread reads and
+    writes through its own connection.
+
     Attributes
     ----------
+    connections : ConnectionManager
+        The per-thread connections to the SQLite database.
     db : sqlite3.Connection
-        A connection object to the SQLite database.
+        The calling thread's connection to the SQLite database.
     cursor : sqlite3.Cursor
-        A cursor object to execute database queries.
+        The calling thread's cursor to execute database queries.
     '''
 
     def __init__(self, db_path: str = DATABASE_PATH) -> None:
@@ -34,25 +344,45 @@ class Database:
         db_path : str, optional
             The path to the SQLite database file. Defaults to `DATABASE_PATH`.
         '''
-        self.db = sqlite3.connect(db_path)
-        self.cursor = self.db.cursor()
-        self._create_table()
+        self.connections = ConnectionManager(db_path)
+        self._migrate()
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        return self.connections.connection()
 
-    def _create_table(self) -> None:
+    @property
+    def cursor(self) -> sqlite3.Cursor:
+        return self.connections.cursor()
+
+    @property
+    def version(self) -> int:
+        '''
+        The schema version of the database.
         '''
-        Creates the `names` table if it doesn't already exist.
+        return self.cursor.execute("PRAGMA user_version;").fetchone()[0]
 
-        The table contains the following columns:
-        - id : INTEGER (Primary Key)
-        - name : TEXT (Non-Null)
+    def _migrate(self) -> None:
         '''
-        query = """
-            CREATE TABLE IF NOT EXISTS names(
-                id INTEGER PRIMARY KEY,
-                name TEXT NOT NULL
-            );
-        """
-        self._run_query(query)
+        Applies every migration the database has not had yet, each in its own transaction.
+
+        The tables are:
+        - names : id INTEGER (Primary Key), name TEXT (Non-Null)
+        - resolved : the lookup result for each name, see `Resolved`
+        - names_fts : the full-text index used by `search`, kept in sync by
+          an insert trigger and by the bulk methods that change names
+        '''
+        while (version := self.version) < len(MIGRATIONS):
+            try:
+                with DB_OPERATION_SECONDS.labels(operation="migrate").time():
+                    self.db.executescript(
+                        f"BEGIN IMMEDIATE; {MIGRATIONS[version]} PRAGMA user_version = {version + 1}; COMMIT;"
+                    )
+            except sqlite3.OperationalError:
+                self.db.rollback()
+                # Another process may have applied the migration while this one waited for the lock.
+                if self.version == version:
+                    raise
 
     def _run_query(self, query: str, *query_args) -> sqlite3.Cursor | None:
         '''
@@ -70,27 +400,119 @@ class Database:
         sqlite3.Cursor or None
             The result of the executed query. Returns None if an error occurs.
         '''
+        operation = query.split(None, 1)[0].lower()
         try:
-            result = self.cursor.execute(query, query_args)
-            self.db.commit()
+            with DB_OPERATION_SECONDS.labels(operation=operation).time():
+                result = self.cursor.execute(query, query_args)
+                self.db.commit()
             return result
         except Exception as e:
-            print(f"An error occurred while executing the query: {e}")
+            logger.error("An error occurred while executing the query: %s", e)
             return None
 
-    def add_name(self, name: str) -> None:
+    def _run_many(self, query: str, rows: Iterable[tuple], batch_size: int = BATCH_SIZE,
+                  sync: str | None = None) -> int | None:
         '''
-        Adds a new name to the `names` table.
+        Executes a query once per row of arguments, `batch_size` rows per
+        `executemany` call, all in a single transaction.
+
+        Parameters
+        ----------
+        query : str
+            The SQL query to execute.
+        rows : iterable of tuple
+            The arguments for each execution. They are read lazily, one batch at a time.
+        batch_size : int, optional
+            The number of rows per `executemany` call. Defaults to `BATCH_SIZE`.
+        sync : str, optional
+            A query run after each batch with the batch's name IDs (the first
+            argument of each row) as a JSON array, such as `FTS_DELETE`.
+            Defaults to None.
+
+        Returns
+        -------
+        int or None
+            The number of rows changed. Returns None if an error occurs, in
+            which case nothing is changed.
+        '''
+        operation = query.split(None, 1)[0].lower()
+        changed = 0
+        try:
+            with DB_OPERATION_SECONDS.labels(operation=operation).time(), self.db:
+                for batch in _batches(rows, batch_size):
+                    changed += self.cursor.executemany(query, batch).rowcount
+                    if sync is not None:
+                        self.cursor.execute(sync, (json.dumps([row[0] for row in batch]),))
+            return changed
+        except Exception as e:
+            logger.error("An error occurred while executing the query: %s", e)
+            return None
+
+    def add_name(self, name: str) -> bool:
+        '''
+        Adds a new name to the `names` table, unless an equivalent name
+        (the same after `normalize_name`) is already stored.
 
         Parameters
         ----------
         name : str
             The name to be added to the database.
+
+        Returns
+        -------
+        bool
+            Whether the name was new.
+        '''
+        if name and name.strip():
+            return self.add_names([name]).new == 1
+        print("Cannot add an empty name.")
+        return False
+
+    def add_names(self, names: Iterable[str], batch_size: int = BATCH_SIZE) -> Added:
         '''
-        if name:
-            self._run_query("INSERT INTO names (name) VALUES (?);", name)
-        else:
-            print("Cannot add an empty name.")
+        Adds many names to the `names` table in a single transaction.
+
+        Names equivalent to one already stored, or to an earlier one in
+        `names`, are skipped: the unique `name_key` index holds the result
+        of `normalize_name`, and inserts that would repeat it do nothing.
+
+        Parameters
+        ----------
+        names : iterable of str
+            The names to add. Empty names are skipped. They are read lazily,
+            so a large file can be streamed in.
+        batch_size : int, optional
+            The number of names per `executemany` call. Defaults to `BATCH_SIZE`.
+
+        Returns
+        -------
+        Added
+            The IDs assigned to the new names and the counts of new and
+            duplicate names. No names are added if an error occurs.
+        '''
+        ids = []
+        total = 0
+        rows = ((name, key) for name in names if name for key in (normalize_name(name),) if key)
+        try:
+            with DB_OPERATION_SECONDS.labels(operation="insert").time(), self.db:
+                self.cursor.execute("UPDATE search_control SET deferred = 1;")
+                for batch in _batches(rows, batch_size):
+                    # Within one transaction, new rowids continue on from the largest one.
+                    first = self.cursor.execute("SELECT coalesce(max(id), 0) + 1 FROM names;").fetchone()[0]
+                    new = self.cursor.executemany(
+                        "INSERT INTO names (name, name_key) VALUES (?, ?) ON CONFLICT(name_key) DO NOTHING;",
+                        batch,
+                    ).rowcount
+                    self.cursor.execute(
+                        "INSERT INTO names_fts (rowid, name) SELECT id, name FROM names WHERE id >= ?;", (first,)
+                    )
+                    ids.extend(range(first, first + new))
+                    total += len(batch)
+                self.cursor.execute("UPDATE search_control SET deferred = 0;")
+        except Exception as e:
+            logger.error("An error occurred while executing the query: %s", e)
+            return Added([], 0, 0)
+        return Added(ids, len(ids), total - len(ids))
 
     def remove_name(self, id: int) -> None:
         '''
@@ -101,13 +523,39 @@ class Database:
         id : int
             The ID of the name to be removed.
         '''
-        self._run_query("DELETE FROM names WHERE id = ?;", (id,))
+        self.remove_names([id])
+
+    def remove_names(self, ids: Iterable[int], batch_size: int = BATCH_SIZE) -> int:
+        '''
+        Removes many names from the `names` table, and their resolved results,
+        in a single transaction.
+
+        Parameters
+        ----------
+        ids : iterable of int
+            The IDs of the names to be removed.
+        batch_size : int, optional
+            The number of IDs per `executemany` call. Defaults to `BATCH_SIZE`.
+
+        Returns
+        -------
+        int
+            The number of names removed.
+        '''
+        return self._run_many(
+            "DELETE FROM names WHERE id = ?;", ((id,) for id in ids), batch_size, sync=FTS_DELETE
+        ) or 0
 
     def clear_all_names(self) -> None:
         '''
         Removes all names from the `names` table.
         '''
-        self._run_query("DELETE FROM names;")
+        try:
+            with DB_OPERATION_SECONDS.labels(operation="delete").time(), self.db:
+                self.cursor.execute("DELETE FROM names;")
+                self.cursor.execute("DELETE FROM names_fts;")
+        except Exception as e:
+            logger.error("An error occurred while executing the query: %s", e)
 
     def get_all_names(self) -> list[tuple[int, str]]:
         '''
@@ -120,9 +568,91 @@ class Database:
             - id (int): The ID of the name.
             - name (str): The name.
         '''
-        result = self._run_query("SELECT * FROM names;")
+        result = self._run_query("SELECT id, name FROM names ORDER BY id;")
+        return result.fetchall() if result else []
+
+    def iter_names(self, page_size: int = PAGE_SIZE, after_id: int = 0) -> Iterator[tuple[int, str]]:
+        '''
+        Streams the names in the `names` table in ID order, one page at a time.
+
+        Each page is a separate query that resumes after the last ID seen
+        (keyset pagination), so no page costs more than the first, and
+        names added while iterating are picked up at the end.
+
+        Parameters
+        ----------
+        page_size : int, optional
+            The number of names fetched per query. Defaults to `PAGE_SIZE`.
+        after_id : int, optional
+            Only names with a larger ID are returned. Defaults to 0 (every name).
+
+        Yields
+        ------
+        tuple
+            `(id, name)` for each name.
+        '''
+        while True:
+            result = self._run_query(
+                "SELECT id, name FROM names WHERE id > ? ORDER BY id LIMIT ?;", after_id, page_size
+            )
+            page = result.fetchall() if result else []
+            yield from page
+            if len(page) < page_size:
+                return
+            after_id = page[-1][0]
+
+    def search(self, text: str, limit: int = SEARCH_LIMIT) -> list[tuple[int, str]]:
+        '''
+        Finds the names whose stored name or resolved full name contains
+        every word of `text`, treating each word as a prefix.
+
+        Matching ignores case and diacritics, so "ada lov" finds "Ada
+        Lovelace" and "godel" finds "Kurt Gödel".
+
+        Parameters
+        ----------
+        text : str
+            The words to search for.
+        limit : int, optional
+            The maximum number of names returned. Defaults to `SEARCH_LIMIT`.
+
+        Returns
+        -------
+        list of tuple
+            `(id, name)` for each match, best match (by BM25 rank) first.
+            When more than `SEARCH_CANDIDATES` names match, only the first
+            that many by ID are ranked. Empty if `text` has no words.
+        '''
+        words = re.findall(r"\w+", text)
+        if not words:
+            return []
+        # Quoting each word keeps FTS5 query syntax in the text from being interpreted.
+        query = " ".join(f'"{word}"*' for word in words)
+        result = self._run_query(
+            '''
+            SELECT names.id, names.name FROM (
+                SELECT rowid, rank FROM names_fts WHERE names_fts MATCH ? LIMIT ?
+            ) AS matches
+            JOIN names ON names.id = matches.rowid
+            ORDER BY matches.rank
+            LIMIT ?;
+            ''',
+            query, max(limit, SEARCH_CANDIDATES), limit,
+        )
         return result.fetchall() if result else []
 
+    def count_names(self) -> int:
+        '''
+        Counts the names in the `names` table without reading them.
+
+        Returns
+        -------
+        int
+            The number of names.
+        '''
+        result = self._run_query("SELECT count(*) FROM names;")
+        return result.fetchone()[0] if result else 0
+
     def get_last_name(self) -> tuple[int, str] | None:
         '''
         Retrieves the last name added to the `names` table.
@@ -136,12 +666,114 @@ class Database:
             Returns None if the table is empty.
         '''
         result = self._run_query(
-            "SELECT * FROM names ORDER BY id DESC LIMIT 1;"
+            "SELECT id, name FROM names ORDER BY id DESC LIMIT 1;"
         )
         return result.fetchone() if result else None
 
+    def save_resolved(self, results: Iterable[Resolved]) -> int | None:
+        '''
+        Stores lookup results, replacing any earlier result for the same name.
+
+        Results for names that no longer exist, such as names removed while
+        they were being looked up, are skipped.
+
+        Parameters
+        ----------
+        results : iterable of Resolved
+            The results to store, written in one transaction.
+
+        Returns
+        -------
+        int or None
+            The number of results stored. Returns None if an error occurs, in
+            which case nothing is stored.
+        '''
+        return self._run_many(
+            '''
+            INSERT INTO resolved (name_id, fullname, dob, dod, uri, fetched_at, status)
+            SELECT ?, ?, ?, ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM names WHERE id = ?)
+            ON CONFLICT(name_id) DO UPDATE SET
+                fullname = excluded.fullname, dob = excluded.dob, dod = excluded.dod,
+                uri = excluded.uri, fetched_at = excluded.fetched_at, status = excluded.status;
+            ''',
+            ((result.name_id, result.fullname, result.dob, result.dod, result.uri,
+              result.fetched_at, result.status, result.name_id) for result in results),
+            sync=FTS_SET_FULLNAME,
+        )
+
+    def get_resolved(self, ids: Iterable[int]) -> dict[int, Resolved]:
+        '''
+        Retrieves the stored lookup results for many names at once.
+
+        Parameters
+        ----------
+        ids : iterable of int
+            The IDs of the names.
+
+        Returns
+        -------
+        dict
+            Maps the ID of each name that has a stored result to that result.
+        '''
+        ids = list(ids)
+        results = {}
+        # Stay well below SQLite's limit on the number of query parameters.
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            result = self._run_query(
+                f"SELECT name_id, fullname, dob, dod, uri, fetched_at, status FROM resolved "
+                f"WHERE name_id IN ({placeholders});",
+                *chunk,
+            )
+            for row in result.fetchall() if result else []:
+                results[row[0]] = Resolved(*row)
+        return results
+
+    def get_stale_names(self, max_age: float = RESOLVED_MAX_AGE, now: float | None = None,
+                        limit: int | None = None) -> list[tuple[int, str]]:
+        '''
+        Retrieves the names that have no stored result, or one older than `max_age` seconds.
+
+        Parameters
+        ----------
+        max_age : float, optional
+            The age in seconds after which a result is stale. Defaults to `RESOLVED_MAX_AGE`.
+        now : float, optional
+            The current time in seconds since the epoch. Defaults to now.
+        limit : int, optional
+            The maximum number of names returned. Defaults to None (every stale name).
+
+        Returns
+        -------
+        list of tuple
+            `(id, name)` for each name to look up again: names never looked
+            up first, in ID order, then the rest from the oldest result.
+        '''
+        now = time.time() if now is None else now
+        result = self._run_query(
+            '''
+            SELECT names.id, names.name FROM names
+            LEFT JOIN resolved ON resolved.name_id = names.id
+            WHERE resolved.name_id IS NULL OR resolved.fetched_at < ?
+            ORDER BY resolved.fetched_at IS NOT NULL, resolved.fetched_at, names.id
+            LIMIT ?;
+            ''',
+            now - max_age, -1 if limit is None else limit,
+        )
+        return result.fetchall() if result else []
+
     def close(self) -> None:
         '''
-        Closes the database connection.
+        Closes every connection to the database.
         '''
-        self.db.close()
+        self.connections.close()
+
+
+def _batches(rows: Iterable[tuple], batch_size: int) -> Iterator[list[tuple]]:
+    '''
+    Splits `rows` into lists of at most `batch_size` rows.
+    '''
+    rows = iter(rows)
+    while batch := list(islice(rows, batch_size)):
+        yield batch
@@ -0,0 +1,149 @@
+"""
+Imported Modules:
+- atexit: Used to flush queued log records when the process exits.
+- logging, logging.handlers: Provide the queue-based log handler and listener.
+- queue: Provides the queue log records are handed off through.
+- threading: Used to make the stage timers safe to share between threads.
+- time: Used for the stage timers' clock.
+- contextlib: Used to write the stage timer context manager.
+- collections.abc: Provides the Iterator type.
+
+Opt-in logging and timing for the package.
+
+Modules only create loggers with `logging.getLogger(__name__)` and never
+attach handlers, so nothing is written unless an application calls
+`configure_logging`. When it does, records are put on an in-memory queue
+and written to disk by a background thread, so a lookup never waits on the
+log file. Messages use %-style arguments, which are only formatted if the
+level is enabled.
+
+`stage` times the phases of a lookup (HTTP, JSON decoding, row building,
+age computation) into the shared `TIMERS`:
+
+    with stage("http"):
+        response = client.post(...)
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+LOG_PATH = "app.log"
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+PACKAGE_LOGGER = "wikipedia_name_query"
+
+_listener = None
+_queue_handler = None
+_logging_lock = threading.Lock()
+
+
+def configure_logging(level: int | str = logging.INFO, path: str = LOG_PATH) -> None:
+    '''
+    Sends the package's log records at `level` and above to `path`, through
+    a queue drained by a background thread.
+
+    Calling it again changes the level; the first call's file is kept.
+
+    Parameters
+    ----------
+    level : int or str, optional
+        The minimum level logged, e.g. `logging.DEBUG` or "DEBUG". Defaults to INFO.
+    path : str, optional
+        The log file. Defaults to `LOG_PATH`.
+    '''
+    global _listener, _queue_handler
+    logger = logging.getLogger(PACKAGE_LOGGER)
+    with _logging_lock:
+        logger.setLevel(level)
+        if _listener is not None:
+            return
+        records = queue.SimpleQueue()
+        file_handler = logging.FileHandler(path, encoding="utf8", delay=True)
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        _queue_handler = logging.handlers.QueueHandler(records)
+        _listener = logging.handlers.QueueListener(records, file_handler)
+        _listener.start()
+        logger.addHandler(_queue_handler)
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    '''
+    Writes out any queued records and detaches the handler added by `configure_logging`.
+    '''
+    global _listener, _queue_handler
+    with _logging_lock:
+        if _listener is None:
+            return
+        logging.getLogger(PACKAGE_LOGGER).removeHandler(_queue_handler)
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+        _queue_handler = None
+
+
+class StageTimers:
+    '''
+    Thread-safe running totals of the time spent in each stage of a lookup.
+    '''
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._totals = {}
+
+    @contextmanager
+    def time(self, name: str) -> Iterator[None]:
+        '''
+        Times the body of a `with` block as one run of stage `name`.
+        '''
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float) -> None:
+        '''
+        Adds one run of stage `name` that took `seconds`.
+        '''
+        with self._lock:
+            totals = self._totals.setdefault(name, [0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        '''
+        Returns the totals so far.
+
+        Returns
+        -------
+        stats : dict
+            Maps each stage to its `count`, `total` seconds and `mean` seconds.
+        '''
+        with self._lock:
+            return {
+                name: {"count": count, "total": total, "mean": total / count}
+                for name, (count, total) in self._totals.items()
+            }
+
+    def reset(self) -> None:
+        '''
+        Clears every total.
+        '''
+        with self._lock:
+            self._totals.clear()
+
+
+TIMERS = StageTimers()
+
+
+def stage(name: str):
+    '''
+    Times the body of a `with` block as one run of stage `name` in `TIMERS`.
+    '''
+    return TIMERS.time(name)
@@ -0,0 +1,330 @@
+"""
+Imported Modules:
+- bz2, gzip: Used to stream compressed dump files.
+- logging: Allows for logging messages to the console or a file.
+- pathlib: Used to locate the index file.
+- re: Used to parse N-Triples lines.
+- sqlite3: Used to store the index.
+- threading: Used to share one connection safely between threads.
+- collections.abc: Provides the Iterable and Iterator types.
+- itertools: Used to cap the number of rows read from a lookup.
+- normalize: Provides the name normalization used for lookup keys.
+- ranking: De-duplicates and orders the candidates a lookup returns.
+
+An offline lookup backend built from a DBpedia persondata dump.
+
+The dump is streamed line by line into a SQLite index of English names,
+birth dates and death dates, so lookups need no network at all.
+"""
+import bz2
+import gzip
+import logging
+import pathlib
+import re
+import sqlite3
+import threading
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from wikipedia_name_query.normalize import normalize_name
+from wikipedia_name_query.ranking import rank_candidates
+
+logger = logging.getLogger(__name__)
+
+LOCAL_INDEX_PATH = pathlib.Path().home() / "persons_index.db"
+DEFAULT_LIMIT = 100
+INGEST_BATCH_SIZE = 10000
+
+FOAF_NAME = "http://xmlns.com/foaf/0.1/name"
+BIRTH_DATE = "http://dbpedia.org/ontology/birthDate"
+DEATH_DATE = "http://dbpedia.org/ontology/deathDate"
+
+TRIPLE = re.compile(r'^<([^>]*)>\s+<([^>]*)>\s+"((?:[^"\\]|\\.)*)"(?:@([\w-]+)|\^\^<[^>]*>)?\s*\.\s*$')
+ESCAPE = re.compile(r'\\(u[0-9A-Fa-f]{4}|U[0-9A-Fa-f]{8}|.)')
+ESCAPES = {"t": "\t", "b": "\b", "n": "\n", "r": "\r", "f": "\f", '"': '"', "'": "'", "\\": "\\"}
+
+
+class LocalIndex:
+    '''
+    A local, offline index of people with the same lookup methods as `Query`.
+
+    Lookups try an exact match on the normalized name, then a prefix match,
+    then a match on later words of the name, all answered from SQLite indexes.
+
+    Attributes
+    ----------
+    path : str
+        The path to the SQLite index file.
+    '''
+
+    def __init__(self, path: str = LOCAL_INDEX_PATH) -> None:
+        '''
+        Opens (and if needed creates) the index.
+
+        Parameters
+        ----------
+        path : str, optional
+            The path to the SQLite index file. Defaults to `LOCAL_INDEX_PATH`.
+        '''
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            has_words = self._db.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'person_name_words';"
+            ).fetchone() is not None
+            self._db.executescript("""
+                CREATE TABLE IF NOT EXISTS persons(
+                    uri TEXT PRIMARY KEY,
+                    birth_date TEXT,
+                    death_date TEXT
+                );
+                CREATE TABLE IF NOT EXISTS person_names(
+                    name_key TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    uri TEXT NOT NULL,
+                    UNIQUE (name_key, uri)
+                );
+                -- A full-text index over the words of each name key, so the
+                -- last lookup tier does not have to scan every name.
+                CREATE VIRTUAL TABLE IF NOT EXISTS person_name_words USING fts5(
+                    name_key, content = 'person_names'
+                );
+            """)
+            if not has_words:
+                # Indexes built before the word index existed get it filled in once.
+                self._db.execute("INSERT INTO person_name_words (person_name_words) VALUES ('rebuild');")
+
+    def ingest(self, dump_path: str, batch_size: int = INGEST_BATCH_SIZE) -> int:
+        '''
+        Streams a DBpedia N-Triples dump (optionally .gz or .bz2 compressed) into the index.
+
+        Only English `foaf:name`, `dbo:birthDate` and `dbo:deathDate` triples
+        are kept. Rows are written in batches inside a single transaction, so
+        the dump never has to fit in memory.
+
+        Parameters
+        ----------
+        dump_path : str
+            The path to the dump file.
+        batch_size : int, optional
+            The number of rows written per batch. Defaults to `INGEST_BATCH_SIZE`.
+
+        Returns
+        -------
+        count : int
+            The number of triples stored.
+        '''
+        with _open_dump(dump_path) as lines:
+            count = self.ingest_lines(lines, batch_size)
+        logger.info("Ingested %d triples from %s", count, dump_path)
+        return count
+
+    def ingest_lines(self, lines: Iterable[str], batch_size: int = INGEST_BATCH_SIZE) -> int:
+        '''
+        Stores the relevant triples from an iterable of N-Triples lines.
+
+        Parameters
+        ----------
+        lines : iterable of str
+            The N-Triples lines.
+        batch_size : int, optional
+            The number of rows written per batch. Defaults to `INGEST_BATCH_SIZE`.
+
+        Returns
+        -------
+        count : int
+            The number of triples stored.
+        '''
+        names, births, deaths = [], [], []
+        count = 0
+        with self._lock, self._db:
+            self._db.execute("DROP INDEX IF EXISTS person_names_key;")
+            for line in lines:
+                match = TRIPLE.match(line)
+                if match is None:
+                    continue
+                subject, predicate, value, lang = match.groups()
+                if predicate == FOAF_NAME and lang in (None, "en"):
+                    name = _unescape(value)
+                    names.append((normalize_name(name), name, subject))
+                elif predicate == BIRTH_DATE:
+                    births.append((subject, value))
+                elif predicate == DEATH_DATE:
+                    deaths.append((subject, value))
+                else:
+                    continue
+
+                count += 1
+                if len(names) + len(births) + len(deaths) >= batch_size:
+                    self._write_batch(names, births, deaths)
+                    names, births, deaths = [], [], []
+
+            self._write_batch(names, births, deaths)
+            # Building the indexes once after the bulk load is much faster than
+            # maintaining them row by row.
+            self._db.execute("CREATE INDEX IF NOT EXISTS person_names_key ON person_names (name_key);")
+            self._db.execute("INSERT INTO person_name_words (person_name_words) VALUES ('rebuild');")
+        return count
+
+    def get_person_info(self, person_name: str, refresh: bool = False) -> list[list[str | None]] | None:
+        '''
+        Looks up the given person in the index.
+
+        Parameters
+        ----------
+        person_name : str
+            The name of the person to look up.
+        refresh : bool, optional
+            Accepted for compatibility with `Query`; the index is always current.
+
+        Returns
+        -------
+        person_info : list of lists or None
+            A list of `[full_name, birth_date, death_date, uri]` rows, one per
+            person and best match first, or None if no information is found.
+
+        Raises
+        ------
+        ValueError
+            If the `person_name` parameter is None.
+        '''
+        if person_name is None:
+            logger.error("person_name is None")
+            raise ValueError("person_name cannot be None")
+
+        candidates = islice(self._iter_candidates(person_name), DEFAULT_LIMIT)
+        person_info = rank_candidates(person_name, ((uri, row, 0) for uri, row in candidates))
+        return person_info or None
+
+    def get_people_info(self, names: list[str], chunk_size: int = DEFAULT_LIMIT,
+                        refresh: bool = False) -> dict[str, list[list[str | None]] | None]:
+        '''
+        Looks up many people in the index.
+
+        Parameters
+        ----------
+        names : list of str
+            The names of the people to look up.
+        chunk_size : int, optional
+            Accepted for compatibility with `Query`.
+        refresh : bool, optional
+            Accepted for compatibility with `Query`.
+
+        Returns
+        -------
+        people_info : dict
+            Maps each input name to its result, in the same format as `get_person_info`.
+        '''
+        return {name: self.get_person_info(name) for name in names}
+
+    def iter_person_info(self, person_name: str, page_size: int = DEFAULT_LIMIT) -> Iterator[list[str | None]]:
+        '''
+        Lazily yields the rows matching the given person from the first
+        matching tier: exact, prefix, then later words of the name. Each
+        person is yielded once.
+
+        Parameters
+        ----------
+        person_name : str
+            The name of the person to look up.
+        page_size : int, optional
+            The number of rows fetched from SQLite at a time. Defaults to `DEFAULT_LIMIT`.
+
+        Yields
+        ------
+        row : list
+            The full name (str), birth date (str), death date (str or None) and entity URI (str).
+        '''
+        for uri, row in self._iter_candidates(person_name, page_size):
+            yield [*row, uri]
+
+    def _iter_candidates(self, person_name: str,
+                         page_size: int = DEFAULT_LIMIT) -> Iterator[tuple[str, list[str | None]]]:
+        '''
+        Lazily yields `(uri, row)` for each person matching the first matching
+        tier, skipping people already yielded under another of their names.
+        '''
+        key = normalize_name(person_name)
+        tiers = [
+            ("n.name_key = ?", (key,)),
+            # A range scan over the key index; the upper bound sorts after
+            # every string that starts with the key.
+            ("n.name_key > ? AND n.name_key < ?", (key, key + "\U0010ffff")),
+        ]
+        words = re.findall(r"\w+", key)
+        if words:
+            # The words of the key, in order and anywhere in the name, the last one as a prefix.
+            tiers.append((
+                "n.rowid IN (SELECT rowid FROM person_name_words WHERE person_name_words MATCH ?)",
+                (f'"{" ".join(words)}"*',),
+            ))
+        seen = set()
+        for condition, args in tiers:
+            with self._lock:
+                cursor = self._db.execute(f"""
+                    SELECT n.uri, n.name, p.birth_date, p.death_date
+                    FROM person_names AS n JOIN persons AS p ON p.uri = n.uri
+                    WHERE {condition} AND p.birth_date IS NOT NULL
+                    ORDER BY n.name_key;
+                """, args)
+                rows = cursor.fetchmany(page_size)
+            found = False
+            while rows:
+                found = True
+                for uri, *row in rows:
+                    if uri not in seen:
+                        seen.add(uri)
+                        yield uri, row
+                with self._lock:
+                    rows = cursor.fetchmany(page_size)
+            if found:
+                return
+
+    def invalidate(self, person_name: str | None = None) -> None:
+        '''
+        Accepted for compatibility with `Query`; the index keeps no cache.
+        '''
+
+    def close(self) -> None:
+        '''
+        Closes the index connection.
+        '''
+        self._db.close()
+
+    def _write_batch(self, names: list[tuple], births: list[tuple], deaths: list[tuple]) -> None:
+        self._db.executemany(
+            "INSERT OR IGNORE INTO person_names (name_key, name, uri) VALUES (?, ?, ?);", names
+        )
+        self._db.executemany("""
+            INSERT INTO persons (uri, birth_date) VALUES (?, ?)
+            ON CONFLICT (uri) DO UPDATE SET birth_date = excluded.birth_date;
+        """, births)
+        self._db.executemany("""
+            INSERT INTO persons (uri, death_date) VALUES (?, ?)
+            ON CONFLICT (uri) DO UPDATE SET death_date = excluded.death_date;
+        """, deaths)
+
+
+def _open_dump(dump_path: str):
+    '''
+    Opens a dump file for line-by-line text reading, decompressing .gz and .bz2 files.
+    '''
+    suffix = pathlib.Path(dump_path).suffix
+    if suffix == ".gz":
+        return gzip.open(dump_path, "rt", encoding="utf8")
+    if suffix == ".bz2":
+        return bz2.open(dump_path, "rt", encoding="utf8")
+    return open(dump_path, "r", encoding="utf8")
+
+
+def _unescape(value: str) -> str:
+    '''
+    Decodes the escape sequences allowed in N-Triples string literals.
+    '''
+    def replace(match: re.Match) -> str:
+        escape = match.group(1)
+        if escape[0] in "uU":
+            return chr(int(escape[1:], 16))
+        return ESCAPES.get(escape, escape)
+
+    return ESCAPE.sub(replace, value)
@@ -0,0 +1,468 @@
+"""
+Imported Modules:
+- abc: Used to declare the child factory every metric type provides.
+- bisect: Used to find a histogram bucket.
+- os: Used to replace the metrics file atomically.
+- threading: Used to make metrics safe to update from many threads and to serve them.
+- time: Used to time operations.
+- collections: Provides the bounded sample window used for percentiles.
+- contextlib: Used to write the timing context manager.
+- collections.abc: Provides the Callable and Iterator types.
+- http.server: Provides the optional local metrics endpoint.
+- resilience: Provides the circuit breaker state and the retry, failure, rejection and throttle counts.
+
+A small metrics registry: counters, gauges and latency histograms, with
+optional labels, exported in the Prometheus text format.
+
+The metrics below cover lookups, endpoint requests and how the resilience
+policy guarded them, `Person` loads and `Database` operations. `dashboard` summarises the ones watched most
+(lookup p50/p99 latency, lookups, errors and cache hit ratio). Export
+them with `write_metrics` or `start_http_server`:
+
+    server = start_http_server(9464)   # http://127.0.0.1:9464/metrics
+"""
+import abc
+import bisect
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from wikipedia_name_query.resilience import CLOSED, get_policy
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Percentiles are computed over this many of the most recent observations.
+WINDOW_SIZE = 1024
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _CounterValue:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        '''
+        Adds `amount` to the counter.
+        '''
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeValue:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._value = 0.0
+        self._function = None
+
+    @property
+    def value(self) -> float:
+        return float(self._function()) if self._function is not None else self._value
+
+    def set(self, value: float) -> None:
+        '''
+        Sets the gauge to `value`.
+        '''
+        with self._lock:
+            self._value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        '''
+        Adds `amount` to the gauge.
+        '''
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        '''
+        Subtracts `amount` from the gauge.
+        '''
+        self.inc(-amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        '''
+        Makes the gauge report `function()` whenever it is read.
+        '''
+        self._function = function
+
+
+class _HistogramValue:
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._window = deque(maxlen=WINDOW_SIZE)
+
+    def observe(self, value: float) -> None:
+        '''
+        Records one observation.
+        '''
+        with self._lock:
+            self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+            self._window.append(value)
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        '''
+        Observes how many seconds the body of a `with` block took.
+        '''
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def percentile(self, q: float) -> float | None:
+        '''
+        Returns the `q`-th percentile (0-100) of the recent observations, or None if there are none.
+        '''
+        with self._lock:
+            window = sorted(self._window)
+        if not window:
+            return None
+        index = min(len(window) - 1, max(0, round(q / 100 * len(window)) - 1))
+        return window[index]
+
+
+class _Metric(abc.ABC):
+    '''
+    A named metric family with optional labels.
+    '''
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        self._children = {}
+
+    def labels(self, **labels: str) -> object:
+        '''
+        Returns the child metric for the given label values, creating it on first use.
+        '''
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = self._new_child()
+        return child
+
+    def children(self) -> list[tuple[dict[str, str], object]]:
+        '''
+        Returns `(labels, child)` for every child created so far.
+        '''
+        with self._lock:
+            items = list(self._children.items())
+        return [(dict(zip(self.labelnames, key)), child) for key, child in items]
+
+    @abc.abstractmethod
+    def _new_child(self) -> object:
+        '''
+        Creates the value object for one set of label values.
+        '''
+
+    def _unlabelled(self) -> object:
+        if self.labelnames:
+            raise ValueError(f"{self.name} has labels; use .labels(...)")
+        return self.labels()
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {_escape(self.help, help=True)}", f"# TYPE {self.name} {self.type}"]
+        for labels, child in self.children():
+            lines += self._render_child(labels, child)
+        return lines
+
+    def _render_child(self, labels: dict[str, str], child: object) -> list[str]:
+        return [f"{self.name}{_format_labels(labels)} {_format_value(child.value)}"]
+
+
+class Counter(_Metric):
+    '''
+    A value that only goes up, such as the number of requests.
+    '''
+    type = "counter"
+
+    def _new_child(self) -> _CounterValue:
+        return _CounterValue()
+
+    def inc(self, amount: float = 1.0) -> None:
+        '''
+        Adds `amount` to an unlabelled counter.
+        '''
+        self._unlabelled().inc(amount)
+
+    @property
+    def value(self) -> float:
+        '''
+        Returns the total over every label combination.
+        '''
+        return sum(child.value for _, child in self.children())
+
+
+class Gauge(_Metric):
+    '''
+    A value that can go up and down, such as the number of open connections.
+    '''
+    type = "gauge"
+
+    def _new_child(self) -> _GaugeValue:
+        return _GaugeValue()
+
+    def set(self, value: float) -> None:
+        '''
+        Sets an unlabelled gauge to `value`.
+        '''
+        self._unlabelled().set(value)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        '''
+        Makes an unlabelled gauge report `function()` whenever it is read.
+        '''
+        self._unlabelled().set_function(function)
+
+    @property
+    def value(self) -> float:
+        '''
+        Returns the value of an unlabelled gauge.
+        '''
+        return self._unlabelled().value
+
+
+class Histogram(_Metric):
+    '''
+    A distribution of observations, such as request latencies, in cumulative buckets.
+    '''
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        '''
+        Records one observation in an unlabelled histogram.
+        '''
+        self._unlabelled().observe(value)
+
+    def time(self):
+        '''
+        Observes how many seconds the body of a `with` block took.
+        '''
+        return self._unlabelled().time()
+
+    def percentile(self, q: float) -> float | None:
+        '''
+        Returns the `q`-th percentile (0-100) of an unlabelled histogram's recent observations.
+        '''
+        return self._unlabelled().percentile(q)
+
+    def _render_child(self, labels: dict[str, str], child: _HistogramValue) -> list[str]:
+        lines = []
+        cumulative = 0
+        bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+        for bound, count in zip(bounds, child.bucket_counts):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': bound})} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{_format_labels(labels)} {child.count}")
+        return lines
+
+
+class MetricsRegistry:
+    '''
+    A collection of metrics that can be rendered together.
+    '''
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def counter(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        '''
+        Returns the counter called `name`, registering it on first use.
+        '''
+        return self._register(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        '''
+        Returns the gauge called `name`, registering it on first use.
+        '''
+        return self._register(Gauge, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames: tuple[str, ...] = (),
+                  buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        '''
+        Returns the histogram called `name`, registering it on first use.
+        '''
+        return self._register(Histogram, name, help, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        '''
+        Returns every metric in the Prometheus text exposition format.
+        '''
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "".join(line + "\n" for metric in metrics for line in metric.render())
+
+    def _register(self, cls: type, name: str, help: str, labelnames: tuple[str, ...], **kwargs) -> _Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, labelnames, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"{name} is already registered as a {metric.type}")
+            return metric
+
+
+REGISTRY = MetricsRegistry()
+
+LOOKUPS = REGISTRY.counter(
+    "wnq_lookups_total", "Person lookups by result: hit (cache), miss (fetched) or error.", ("result",))
+LOOKUP_SECONDS = REGISTRY.histogram("wnq_lookup_seconds", "Latency of person lookups in seconds.")
+ENDPOINT_REQUESTS = REGISTRY.counter(
+    "wnq_endpoint_requests_total", "SPARQL queries sent, by outcome: ok or error.", ("outcome",))
+PERSON_LOAD_SECONDS = REGISTRY.histogram("wnq_person_load_seconds", "Latency of Person.load in seconds.")
+DB_OPERATION_SECONDS = REGISTRY.histogram(
+    "wnq_db_operation_seconds", "Latency of Database operations in seconds, by SQL statement.", ("operation",))
+CIRCUIT_OPEN = REGISTRY.gauge("wnq_circuit_open", "1 while the endpoint circuit breaker is not closed.")
+CIRCUIT_OPEN.set_function(lambda: get_policy().breaker.state != CLOSED)
+# The resilience counts are read from the current policy when rendered, so
+# they start again from zero when a new policy is configured.
+ENDPOINT_RETRIES = REGISTRY.gauge(
+    "wnq_endpoint_retries", "Endpoint calls retried after a transient failure by the current policy.")
+ENDPOINT_RETRIES.set_function(lambda: get_policy().retries)
+ENDPOINT_FAILURES = REGISTRY.gauge(
+    "wnq_endpoint_failures", "Endpoint attempts that failed with a retryable error under the current policy.")
+ENDPOINT_FAILURES.set_function(lambda: get_policy().failures)
+CIRCUIT_REJECTIONS = REGISTRY.gauge(
+    "wnq_circuit_rejections", "Endpoint calls rejected by the open circuit breaker of the current policy.")
+CIRCUIT_REJECTIONS.set_function(lambda: get_policy().breaker.rejected)
+THROTTLE_WAITS = REGISTRY.gauge(
+    "wnq_throttle_waits", "Endpoint calls that waited for the rate limiter of the current policy.")
+THROTTLE_WAITS.set_function(lambda: get_policy().limiter.waits)
+
+
+def record_lookup(result: str, seconds: float) -> None:
+    '''
+    Records one person lookup.
+
+    Parameters
+    ----------
+    result : str
+        `hit` if it was answered from the cache, `miss` if it was fetched, or `error`.
+    seconds : float
+        How long the lookup took.
+    '''
+    LOOKUPS.labels(result=result).inc()
+    LOOKUP_SECONDS.observe(seconds)
+
+
+def dashboard() -> dict[str, float | None]:
+    '''
+    Returns the headline lookup metrics.
+
+    Returns
+    -------
+    summary : dict
+        `p50` and `p99` lookup latency in seconds (None before any lookup),
+        `lookups` and `errors` totals, and the cache `hit_ratio` (None before any lookup).
+    '''
+    results = {labels["result"]: child.value for labels, child in LOOKUPS.children()}
+    lookups = sum(results.values())
+    hits = results.get("hit", 0.0)
+    return {
+        "p50": LOOKUP_SECONDS.percentile(50),
+        "p99": LOOKUP_SECONDS.percentile(99),
+        "lookups": lookups,
+        "errors": results.get("error", 0.0),
+        "hit_ratio": hits / lookups if lookups else None,
+    }
+
+
+def write_metrics(path: str, registry: MetricsRegistry = REGISTRY) -> None:
+    '''
+    Writes the metrics to `path` in the Prometheus text format, replacing
+    the file atomically so a collector never reads a partial file.
+
+    Parameters
+    ----------
+    path : str
+        The file to write, e.g. one read by node_exporter's textfile collector.
+    registry : MetricsRegistry, optional
+        The metrics to write. Defaults to `REGISTRY`.
+    '''
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf8") as file:
+        file.write(registry.render())
+    os.replace(temp_path, path)
+
+
+def start_http_server(port: int, host: str = "127.0.0.1",
+                      registry: MetricsRegistry = REGISTRY) -> ThreadingHTTPServer:
+    '''
+    Serves the metrics at `http://host:port/metrics` from a background thread.
+
+    Parameters
+    ----------
+    port : int
+        The port to listen on; 0 picks a free port.
+    host : str, optional
+        The interface to listen on. Defaults to 127.0.0.1.
+    registry : MetricsRegistry, optional
+        The metrics to serve. Defaults to `REGISTRY`.
+
+    Returns
+    -------
+    server : ThreadingHTTPServer
+        The running server; call `shutdown()` to stop it.
+    '''
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _escape(value: str, help: bool = False) -> str:
+    escaped = value.replace("\\", "\\\\").replace("\n", "\\n")
+    return escaped if help else escaped.replace('"', '\\"')
@@ -0,0 +1,53 @@
+"""
+Imported Modules:
+- unicodedata: Used to apply Unicode NFKC normalization to names.
+
+Helpers for cleaning up names before they are queried or stored.
+"""
+import unicodedata
+
+
+def normalize_name(name: str) -> str:
+    '''
+    Normalizes a person's name so equivalent spellings share one key.
+
+    The name is Unicode NFKC normalized, case-folded and has its whitespace
+    collapsed to single spaces, so "  Donald   KNUTH " and "donald knuth"
+    produce the same key.
+
+    Parameters
+    ----------
+    name : str
+        The name to normalize.
+
+    Returns
+    -------
+    key : str
+        The normalized name.
+    '''
+    return " ".join(unicodedata.normalize("NFKC", name).casefold().split())
+
+
+def split_names(contents: str) -> list[str]:
+    '''
+    Splits the contents of a names file into individual names.
+
+    Names are separated by commas and/or newlines; surrounding whitespace and
+    empty entries are dropped.
+
+    Parameters
+    ----------
+    contents : str
+        The text to split.
+
+    Returns
+    -------
+    names : list of str
+        The names in the order they appear.
+    '''
+    return [
+        name.strip()
+        for line in contents.splitlines()
+        for name in line.split(',')
+        if name.strip()
+    ]
@@ -1,20 +1,66 @@
 import logging
-from datetime import datetime
+from wikipedia_name_query.ages import NO_AGE, calculate_ages
+from wikipedia_name_query.async_query import AsyncQuery
+from wikipedia_name_query.backends import DEFAULT_BACKEND, Backend, get_backend
+from wikipedia_name_query.cache import DEFAULT_TTL, MISSING, LRUCache
+from wikipedia_name_query.metrics import PERSON_LOAD_SECONDS
+from wikipedia_name_query.normalize import normalize_name
 from wikipedia_name_query.query import Query
+from wikipedia_name_query.records import PersonRecord
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-file_handler = logging.FileHandler('app.log')
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(formatter)
-file_handler.flush()
-logger.addHandler(file_handler)
+
+DEFAULT_TOP_K = 5
+
+# Resolved records shared by every Person, keyed by backend and normalized
+# name, so creating a new Person for someone already looked up costs nothing.
+# Entries expire with the result cache and are dropped when a name is refreshed.
+RECORDS = LRUCache(ttl=DEFAULT_TTL)
+
+
+def invalidate_record(name: str, backend: str | Backend = DEFAULT_BACKEND) -> None:
+    '''
+    Drops the shared record for `name`, so the next `Person` created for it
+    reads the backend again.
+
+    Parameters
+    ----------
+    name : str
+        The name whose record is dropped.
+    backend : str or Backend, optional
+        The backend the record was resolved with. Defaults to `DEFAULT_BACKEND`.
+    '''
+    backend = get_backend(backend) if isinstance(backend, str) else backend
+    RECORDS.delete((backend, normalize_name(name)))
+
+
+def _lazy(field: str, doc: str) -> property:
+    '''
+    Builds a property that loads the person on first access, unless the
+    field has already been set.
+    '''
+    def get(self: "Person") -> object:
+        if field not in self._values:
+            self._ensure_loaded()
+        return self._values.get(field)
+
+    def set(self: "Person", value: object) -> None:
+        self._values[field] = value
+
+    return property(get, set, doc=doc)
 
 
 class Person:
     """
     A class to represent an individual and retrieve, manage, and manipulate their data.
 
+    A name can match several people; the person's data is taken from the
+    best-ranked match, and `candidates` lists the others.
+
+    The person's data is loaded lazily: the first access to `fullname`,
+    `dob`, `dod` or `age` looks the person up once, and the result is kept
+    in a cache shared by every `Person`.
+
     Attributes
     ----------
     name : str
@@ -27,50 +73,236 @@ class Person:
         The date of birth of the person (format: YYYY-MM-DD).
     dod : str or None
         The date of death of the person (format: YYYY-MM-DD).
+    backend : Backend
+        The backend the person's data is looked up in.
     """
 
-    def __init__(self, name: str) -> None:
+    fullname = _lazy("fullname", "The full name of the person.")
+    dob = _lazy("dob", "The date of birth of the person (format: YYYY-MM-DD).")
+    dod = _lazy("dod", "The date of death of the person (format: YYYY-MM-DD).")
+    age = _lazy("age", "The age of the person.")
+
+    def __init__(self, name: str, backend: str | Backend = DEFAULT_BACKEND) -> None:
         '''
-        Initializes a Person instance.
+        Initializes a Person instance without looking them up.
 
         Parameters
         ----------
         name : str
             The name or identifier for the person.
+        backend : str or Backend, optional
+            The backend to look the person up in, either a backend name
+            accepted by `get_backend` or a backend instance. Defaults to `DEFAULT_BACKEND`.
         '''
         self.name = name
-        self.fullname = None
-        self.age = None
-        self.dob = None
-        self.dod = None
+        self.backend = get_backend(backend) if isinstance(backend, str) else backend
+        self.loaded = False
+        self._values = {}
 
-    def load(self) -> dict | None:
+    @classmethod
+    def prefetch(cls, names: list[str], backend: str | Backend = DEFAULT_BACKEND) -> list["Person"]:
         '''
-        Loads the person's data using the `Query` interface and assigns it to instance attributes.
-        
+        Looks up many people with one batched backend call and warms the
+        shared record cache with the results.
+
+        Parameters
+        ----------
+        names : list of str
+            The names of the people to look up.
+        backend : str or Backend, optional
+            The backend to look the people up in. Defaults to `DEFAULT_BACKEND`.
+
+        Returns
+        -------
+        people : list of Person
+            One loaded `Person` per name, in the same order.
+        '''
+        backend = get_backend(backend) if isinstance(backend, str) else backend
+        people = [cls(name, backend) for name in names]
+        # Records are collected here rather than read back from RECORDS, which
+        # may already have evicted some of them when there are many names.
+        records = {}
+        for person in people:
+            key = person._record_key()
+            if key not in records:
+                records[key] = RECORDS.get(key)
+        missing = [person.name for person in people if records[person._record_key()] is MISSING]
+        if missing:
+            people_info = backend.get_people_info(missing)
+            for name, person_info in people_info.items():
+                key = (backend, normalize_name(name))
+                records[key] = _first_record(person_info)
+                RECORDS.set(key, records[key])
+        for person in people:
+            person._assign(records[person._record_key()])
+        return people
+
+    @classmethod
+    def from_record(cls, name: str, record: PersonRecord | None,
+                    backend: str | Backend = DEFAULT_BACKEND) -> "Person":
+        '''
+        Creates a loaded Person from data resolved earlier, such as a stored
+        lookup result, without querying the backend.
+
+        Parameters
+        ----------
+        name : str
+            The name or identifier for the person.
+        record : PersonRecord or None
+            The person's data, or None if nobody matched the name.
+        backend : str or Backend, optional
+            The backend used if the person is loaded again. Defaults to `DEFAULT_BACKEND`.
+
         Returns
         -------
-        person_info : dict or None
+        person : Person
+            The loaded person.
+        '''
+        person = cls(name, backend)
+        person._assign(record)
+        return person
+
+    def candidates(self, top_k: int = DEFAULT_TOP_K) -> list[PersonRecord]:
+        '''
+        Returns the best matches for the person's name, best first.
+
+        Backends return every match ranked and de-duplicated by person, so
+        this is a single lookup, shared with `load` through the backend's cache.
+
+        Parameters
+        ----------
+        top_k : int, optional
+            The maximum number of matches returned. Defaults to `DEFAULT_TOP_K`.
+
+        Returns
+        -------
+        candidates : list of PersonRecord
+            The matches, empty if nobody matches.
+        '''
+        return self._candidates_from(self.backend.get_person_info(self.name), top_k)
+
+    async def acandidates(self, top_k: int = DEFAULT_TOP_K, query: AsyncQuery | None = None) -> list[PersonRecord]:
+        '''
+        Returns the best matches for the person's name, best first, without
+        blocking the event loop, using the `AsyncQuery` interface.
+
+        Backends other than DBpedia are local and fast, so they are read directly.
+
+        Parameters
+        ----------
+        top_k : int, optional
+            The maximum number of matches returned. Defaults to `DEFAULT_TOP_K`.
+        query : AsyncQuery, optional
+            The query instance to use. Defaults to a new `AsyncQuery`.
+
+        Returns
+        -------
+        candidates : list of PersonRecord
+            The matches, empty if nobody matches.
+        '''
+        if not isinstance(self.backend, Query):
+            return self.candidates(top_k)
+        query = query if query is not None else AsyncQuery(cache=self.backend.cache)
+        return self._candidates_from(await query.get_person_info(self.name), top_k)
+
+    def _candidates_from(self, person_info: list[list[str | None]] | None, top_k: int) -> list[PersonRecord]:
+        '''
+        Converts the first `top_k` rows of a lookup result to records and
+        shares the best one through the record cache.
+        '''
+        records = [PersonRecord.from_row(row) for row in (person_info or [])[:top_k]]
+        RECORDS.set(self._record_key(), records[0] if records else None)
+        return records
+
+    def load(self, refresh: bool = False) -> PersonRecord | None:
+        '''
+        Loads the person's data and assigns it to instance attributes.
+
+        The shared record cache is used unless `refresh` is True.
+
+        Parameters
+        ----------
+        refresh : bool, optional
+            Whether to skip every cache and query the backend again. Defaults to False.
+
+        Returns
+        -------
+        record : PersonRecord or None
             The data retrieved for the person. None if no data is found.
         '''
-        logging.debug(f"Loading data for {self.name}")
-        x = Query()
-        person_info = x.get_person_info(self.name)
+        with PERSON_LOAD_SECONDS.time():
+            key = self._record_key()
+            if refresh:
+                RECORDS.delete(key)
+            record = RECORDS.get(key)
+            if record is MISSING:
+                logger.debug("Loading data for %s", self.name)
+                record = _first_record(self.backend.get_person_info(self.name, refresh=refresh))
+                RECORDS.set(key, record)
+            self._assign(record)
+        return record
+
+    async def aload(self, query: AsyncQuery | None = None) -> PersonRecord | None:
+        '''
+        Loads the person's data without blocking the event loop, using the `AsyncQuery` interface.
+
+        Backends other than DBpedia are local and fast, so they are read directly.
+
+        Parameters
+        ----------
+        query : AsyncQuery, optional
+            The query instance to use, so many people can share its concurrency
+            limit. Defaults to a new `AsyncQuery`.
 
-        if person_info is None:
-            self.fullname = None
-            self.dob = None
-            self.dod = None
-            self.age = None
-            logging.debug(f"No information found for {self.name}")
+        Returns
+        -------
+        record : PersonRecord or None
+            The data retrieved for the person. None if no data is found.
+        '''
+        if not isinstance(self.backend, Query):
+            return self.load()
+
+        with PERSON_LOAD_SECONDS.time():
+            key = self._record_key()
+            record = RECORDS.get(key)
+            if record is MISSING:
+                logger.debug("Loading data for %s", self.name)
+                x = query if query is not None else AsyncQuery(cache=self.backend.cache)
+                record = _first_record(await x.get_person_info(self.name))
+                RECORDS.set(key, record)
+            self._assign(record)
+        return record
+
+    def _ensure_loaded(self) -> None:
+        '''
+        Loads the person once, keeping any field that was set explicitly.
+        '''
+        if self.loaded:
+            return
+        explicit = dict(self._values)
+        self.load()
+        self._values.update(explicit)
+
+    def _record_key(self) -> tuple[Backend, str]:
+        return self.backend, normalize_name(self.name)
+
+    def _assign(self, record: PersonRecord | None) -> None:
+        '''
+        Assigns a resolved record to the instance attributes.
+        '''
+        self.loaded = True
+        if record is None:
+            self._values = dict.fromkeys(("fullname", "dob", "dod", "age"))
+            logger.debug("No information found for %s", self.name)
         else:
-            self.fullname = person_info[0][0]
-            self.dob = person_info[0][1]
-            self.dod = person_info[0][2]
-            self.age = self.calculate_age(self.dob, self.dod)
-            logging.debug(f"Loaded data for {self.fullname}: DOB={self.dob}, DOD={self.dod}, Age={self.age}")
-        
-        return person_info
+            self._values = {
+                "fullname": record.full_name,
+                "dob": record.birth_date,
+                "dod": record.death_date,
+                "age": self.calculate_age(record.birth_date, record.death_date),
+            }
+            logger.debug("Loaded data for %s: DOB=%s, DOD=%s, Age=%s",
+                         self.fullname, self.dob, self.dod, self.age)
 
     def get_fname(self) -> str | None:
         '''
@@ -127,7 +359,7 @@ class Person:
         '''
         name = input("What would you like to set the name as? ")
         self.fullname = name
-        logging.debug(f"Set fullname to {self.fullname}")
+        logger.debug("Set fullname to %s", self.fullname)
         return self.fullname
 
     def set_age(self) -> int:
@@ -141,7 +373,7 @@ class Person:
         '''
         age = input("What would you like to set the age as? ")
         self.age = int(age)
-        logging.debug(f"Set age to {self.age}")
+        logger.debug("Set age to %s", self.age)
         return self.age
 
     def set_dob(self) -> str:
@@ -155,7 +387,7 @@ class Person:
         '''
         dob = input("What would you like to set the DOB as? ")
         self.dob = dob
-        logging.debug(f"Set DOB to {self.dob}")
+        logger.debug("Set DOB to %s", self.dob)
         return self.dob
 
     def set_dod(self) -> str:
@@ -169,39 +401,40 @@ class Person:
         '''
         dod = input("What would you like to set the DOD as? ")
         self.dod = dod
-        logging.debug(f"Set DOD to {self.dod}")
+        logger.debug("Set DOD to %s", self.dod)
         return self.dod
 
     @staticmethod
-    def calculate_age(birth_date: str, death_date: str | None = None) -> int:
+    def calculate_age(birth_date: str, death_date: str | None = None) -> int | None:
         '''
         Calculates the person's age based on their birth date and optionally their death date.
+
+        This is a thin wrapper around `calculate_ages`, which should be used
+        directly for many people at once.
         
         Parameters
         ----------
         birth_date : str
-            The person's date of birth in the format YYYY-MM-DD.
+            The person's date of birth as an xsd:date, usually YYYY-MM-DD.
         death_date : str, optional
-            The person's date of death in the format YYYY-MM-DD. Defaults to None.
+            The person's date of death as an xsd:date. Defaults to None.
         
         Returns
         -------
-        age : int
-            The calculated age in years.
-        
-        Raises
-        ------
-        ValueError
-            If the date format is invalid or the birth date is in the future.
+        age : int or None
+            The calculated age in whole calendar years, or None if the birth
+            date cannot be parsed.
         '''
-        logging.debug(f"Calculating age for birth_date={birth_date}, death_date={death_date}")
-        birth_date = datetime.strptime(birth_date, "%Y-%m-%d")
-        
-        if death_date:
-            death_date = datetime.strptime(death_date, "%Y-%m-%d")
-            age = (death_date - birth_date).days // 365
-        else:
-            age = (datetime.now() - birth_date).days // 365
-        
-        logging.debug(f"Calculated age: {age}")
+        logger.debug("Calculating age for birth_date=%s, death_date=%s", birth_date, death_date)
+        age = int(calculate_ages([birth_date], [death_date])[0])
+        if age == NO_AGE:
+            return None
+        logger.debug("Calculated age: %s", age)
         return age
+
+
+def _first_record(person_info: list[list[str | None]] | None) -> PersonRecord | None:
+    '''
+    Returns the first row of a lookup result as a record, or None if nothing was found.
+    '''
+    return PersonRecord.from_row(person_info[0]) if person_info else None
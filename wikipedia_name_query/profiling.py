@@ -0,0 +1,145 @@
+"""
+Imported Modules:
+- cProfile, pstats: Record the deterministic profile and summarise it.
+- io: Used to capture the text summary.
+- os: Used to name the collapsed-stack file after the pstats file.
+- sys: Provides the frames of running threads for the stack sampler.
+- threading: Runs the stack sampler in the background.
+- collections: Provides the counter the sampled stacks are tallied in.
+
+Built-in profiling for the command line and the TUI.
+
+`Profiler` runs cProfile on the calling thread and, alongside it, samples
+that thread's call stack every `SAMPLE_INTERVAL` seconds. On exit it
+writes the cProfile data as a pstats file, the sampled stacks as a
+collapsed-stack file (`<path>.collapsed`, one `frame;frame;... count`
+line per stack, as read by flamegraph.pl, speedscope and inferno) and
+optionally prints the `top` functions by cumulative time:
+
+    with Profiler("wnq.pstats", top=20):
+        person.load()
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+
+DEFAULT_PROFILE_PATH = "wnq.pstats"
+COLLAPSED_SUFFIX = ".collapsed"
+# Seconds between stack samples.
+SAMPLE_INTERVAL = 0.001
+
+
+class Profiler:
+    '''
+    Profiles the thread that starts it, with cProfile and a stack sampler.
+
+    Parameters
+    ----------
+    path : str or None, optional
+        The pstats file to write; the collapsed stacks go to `path` plus
+        `COLLAPSED_SUFFIX`. None writes no files. Defaults to `DEFAULT_PROFILE_PATH`.
+    top : int or None, optional
+        Print this many functions, by cumulative time, to standard error on
+        stop. Defaults to None (no summary).
+    interval : float, optional
+        Seconds between stack samples. Defaults to `SAMPLE_INTERVAL`.
+    '''
+
+    def __init__(self, path: str | None = DEFAULT_PROFILE_PATH, top: int | None = None,
+                 interval: float = SAMPLE_INTERVAL) -> None:
+        self.path = path
+        self.top = top
+        self.interval = interval
+        self.stacks = Counter()
+        self._profile = cProfile.Profile()
+        self._stopped = threading.Event()
+        self._sampler = None
+
+    @property
+    def collapsed_path(self) -> str | None:
+        '''
+        The collapsed-stack file written next to the pstats file.
+        '''
+        return None if self.path is None else self.path + COLLAPSED_SUFFIX
+
+    def __enter__(self) -> "Profiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        '''
+        Starts profiling the calling thread.
+        '''
+        target = threading.get_ident()
+        self._stopped.clear()
+        self._sampler = threading.Thread(target=self._sample, args=(target,), name="profiler", daemon=True)
+        self._sampler.start()
+        self._profile.enable()
+
+    def stop(self) -> None:
+        '''
+        Stops profiling, writes the files and prints the summary if one was asked for.
+        '''
+        self._profile.disable()
+        self._stopped.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+        if self.path is not None:
+            self.write()
+        if self.top:
+            print(self.summary(self.top), file=sys.stderr)
+
+    def write(self) -> None:
+        '''
+        Writes the pstats file and the collapsed-stack file.
+        '''
+        self._profile.dump_stats(self.path)
+        with open(self.collapsed_path, "w", encoding="utf8") as file:
+            file.write(self.collapsed())
+
+    def collapsed(self) -> str:
+        '''
+        Returns the sampled stacks in the collapsed-stack format, most frequent first.
+        '''
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self, top: int) -> str:
+        '''
+        Returns the `top` functions by cumulative time as a text table.
+        '''
+        output = io.StringIO()
+        stats = pstats.Stats(self._profile, stream=output)
+        stats.strip_dirs().sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+        return output.getvalue()
+
+    def _sample(self, target: int) -> None:
+        '''
+        Tallies the call stack of thread `target` until stopped.
+        '''
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(target)
+            if frame is None:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_label(frame))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(labels))] += 1
+
+
+def _label(frame) -> str:
+    '''
+    Names a frame `module:function`, without the characters the collapsed format reserves.
+    '''
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", os.path.basename(code.co_filename))
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{module}:{name}".replace(";", ":").replace(" ", "_")
@@ -1,91 +1,590 @@
 """
 Imported Modules:
 - logging: Allows for logging messages to the console or a file.
-- SPARQLWrapper: A Python library for querying SPARQL endpoints.
+- re: Used to split names into words for the full-text tier.
+- time: Used to measure the latency of each lookup tier.
+- collections.abc: Provides the Iterator type for the paged result generator.
+- cache: Provides the two-tier result cache shared by the CLI and the TUI.
+- metrics: Records lookup and endpoint metrics.
+- normalize: Provides the name normalization used for cache keys.
+- ranking: De-duplicates and orders the candidates a lookup returns.
+- resilience: Guards the endpoint with rate limiting, retries and a circuit breaker.
+- singleflight: Coalesces concurrent lookups of the same name.
+- sparql: Provides the shared, connection-pooled SPARQL client.
 """
 import logging
-from SPARQLWrapper import SPARQLWrapper, JSON
+import re
+import time
+from collections.abc import Iterator
+from wikipedia_name_query.cache import MISSING, ResultCache, get_default_cache
+from wikipedia_name_query.metrics import ENDPOINT_REQUESTS, record_lookup
+from wikipedia_name_query.normalize import normalize_name
+from wikipedia_name_query.ranking import rank_bindings
+from wikipedia_name_query.resilience import ENDPOINT_ERRORS, get_policy
+from wikipedia_name_query.singleflight import SingleFlight
+from wikipedia_name_query.sparql import get_client
 
-# Configure logging
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
 
-file_handler = logging.FileHandler('app.log')
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(formatter)
-file_handler.flush()
-logger.addHandler(file_handler)
+DEFAULT_CHUNK_SIZE = 50
+DEFAULT_LIMIT = 100
+DEFAULT_PAGE_SIZE = 25
+
+# Lookup tiers, cheapest first: an exact label match answered from the
+# endpoint's index, a full-text word/prefix match, and a bounded regex scan.
+TIERS = ("exact", "contains", "regex")
+
+# Shared by every Query, so concurrent lookups from different threads or
+# Query instances coalesce.
+LOOKUPS = SingleFlight()
+
+PREFIXES = """
+    PREFIX foaf: <http://xmlns.com/foaf/0.1/>
+    PREFIX dbo: <http://dbpedia.org/ontology/>
+"""
 
 
 class Query:
     '''
     A class for executing SPARQL queries to retrieve information about a person.
 
+    Results are cached by normalized name, so repeat lookups are answered from
+    memory or from the on-disk cache instead of DBpedia.
+
+    Attributes
+    ----------
+    cache : ResultCache
+        The cache consulted before querying DBpedia.
+    last_timings : dict
+        The latency in seconds of each tier that ran during the last DBpedia lookup.
+
     Methods
     -------
-    get_person_info(person_name: str) -> list[list[str | None]] | None
+    get_person_info(person_name: str, refresh: bool = False) -> list[list[str | None]] | None
         Queries DBpedia for the given person and retrieves relevant data, such as their
         name, birth date, and (optionally) death date.
+    get_people_info(names: list[str], chunk_size: int = DEFAULT_CHUNK_SIZE, refresh: bool = False)
+        Queries DBpedia for many people at once, a chunk of names per request.
+    iter_person_info(person_name: str, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[list[str | None]]
+        Lazily yields matching rows, fetching one page of results at a time.
+    invalidate(person_name: str | None = None) -> None
+        Drops cached results for a person, or for everyone.
     '''
 
-    @staticmethod
-    def get_person_info(person_name: str) -> list[list[str | None]] | None:
+    def __init__(self, cache: ResultCache | None = None) -> None:
+        '''
+        Initializes a Query instance.
+
+        Parameters
+        ----------
+        cache : ResultCache, optional
+            The result cache to use. Defaults to the shared cache from `get_default_cache`.
+        '''
+        self.cache = cache if cache is not None else get_default_cache()
+        self.last_timings = {}
+
+    def get_person_info(self, person_name: str, refresh: bool = False) -> list[list[str | None]] | None:
         '''
         Queries DBpedia for the given person and retrieves relevant data, 
         such as their name, birth date, and (optionally) death date.
+
+        The lookup tries an exact label match first, then a full-text match,
+        and only falls back to a bounded regex scan when both find nothing.
+        Each person appears once, and rows are ranked best match first by
+        `ranking.score`, so the first row is the most likely person meant.
+        Cached results are returned without contacting DBpedia unless `refresh` is set.
         
         Parameters
         ----------
         person_name : str
             The name of the person to query.
+        refresh : bool, optional
+            Bypass the cache and store a freshly fetched result. Defaults to False.
 
         Returns
         -------
         person_info : list of lists or None
             A list of lists where each inner list contains the full name (str),
-            birth date (str), and optionally the death date (str or None). 
+            birth date (str), death date (str or None) and entity URI (str or None).
             Returns None if no information is found.
 
         Raises
         ------
         ValueError
             If the `person_name` parameter is None.
+        httpx.HTTPError, TimeoutError or CircuitOpenError
+            If the endpoint cannot answer after retries and nothing is cached.
+        '''
+        if person_name is None:
+            logger.error("person_name is None")
+            raise ValueError("person_name cannot be None")
+
+        start = time.perf_counter()
+        key = normalize_name(person_name)
+        if not refresh:
+            person_info = self.cache.get(key)
+            if person_info is not MISSING:
+                logger.debug("Cache hit for person: %s", person_name)
+                record_lookup("hit", time.perf_counter() - start)
+                return person_info
+
+        # Concurrent lookups of the same name share one request.
+        try:
+            person_info = LOOKUPS.do(key, self._fetch_and_cache, person_name, key)
+        except Exception:
+            record_lookup("error", time.perf_counter() - start)
+            raise
+        record_lookup("miss", time.perf_counter() - start)
+        return person_info
+
+    def _fetch_and_cache(self, person_name: str, key: str) -> list[list[str | None]] | None:
+        '''
+        Resolves `person_name` against DBpedia and stores the result under `key`.
+
+        If the endpoint is unavailable, an expired cached result is served instead when there is one.
+        '''
+        try:
+            person_info = self._fetch_person_info(person_name)
+        except ENDPOINT_ERRORS as error:
+            stale = self.cache.get_stale(key)
+            if stale is MISSING:
+                raise
+            logger.warning("Serving stale result for %s: %s", person_name, error)
+            return stale
+        self.cache.set(key, person_info)
+        return person_info
+
+    def iter_person_info(self, person_name: str,
+                         page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[list[str | None]]:
+        '''
+        Lazily yields every row matching the given person, one page at a time.
+
+        Pages are fetched with LIMIT/OFFSET only as the caller consumes rows,
+        so a caller that stops after the first match sends a single request,
+        and memory does not grow with the number of matches. The lookup tiers
+        are tried in the same order as `get_person_info`, and only the first
+        tier with results is paged through. Rows come in name order rather
+        than ranked, but each person is yielded only once. Rows are not cached.
+
+        Parameters
+        ----------
+        person_name : str
+            The name of the person to query.
+        page_size : int, optional
+            The number of rows fetched per request. Defaults to `DEFAULT_PAGE_SIZE`.
+
+        Yields
+        ------
+        row : list
+            The full name (str), birth date (str), death date (str or None) and entity URI (str or None).
+
+        Raises
+        ------
+        ValueError
+            If the `person_name` parameter is None or `page_size` is less than 1.
         '''
         if person_name is None:
             logger.error("person_name is None")
             raise ValueError("person_name cannot be None")
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+
+        seen = set()
+        for tier in TIERS:
+            found = False
+            offset = 0
+            while True:
+                query = TIER_QUERIES[tier](person_name, limit=page_size, offset=offset)
+                if query is None:
+                    break
+                bindings = _run_query(query)
+                logger.debug("Tier %s page at offset %d for %s returned %d rows",
+                             tier, offset, person_name, len(bindings))
+                for binding in bindings:
+                    found = True
+                    entity = binding["person"]["value"] if "person" in binding else None
+                    if entity is not None and entity in seen:
+                        continue
+                    seen.add(entity)
+                    yield _binding_to_row(binding)
+                if len(bindings) < page_size:
+                    break
+                offset += page_size
+            if found:
+                return
+
+    def invalidate(self, person_name: str | None = None) -> None:
+        '''
+        Drops the cached result for `person_name`, or every cached result if it is None.
+
+        Parameters
+        ----------
+        person_name : str, optional
+            The name whose cached result should be dropped. Defaults to None.
+        '''
+        self.cache.invalidate(normalize_name(person_name) if person_name is not None else None)
+
+    def get_people_info(self, names: list[str], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                        refresh: bool = False) -> dict[str, list[list[str | None]] | None]:
+        '''
+        Queries DBpedia for many people at once, packing up to `chunk_size` names
+        into each SPARQL request.
+
+        Names are de-duplicated by their normalized form and cached results are
+        reused, so only uncached names are sent to DBpedia. Like
+        `get_person_info`, names already being looked up by another caller
+        are waited for rather than fetched again, and expired cached results
+        are served if the endpoint is unavailable, except with `refresh`.
+
+        Parameters
+        ----------
+        names : list of str
+            The names of the people to query.
+        chunk_size : int, optional
+            The maximum number of names per request. Defaults to `DEFAULT_CHUNK_SIZE`.
+        refresh : bool, optional
+            Bypass the cache and store freshly fetched results. Defaults to False.
+
+        Returns
+        -------
+        people_info : dict
+            Maps each input name to its result, in the same format as `get_person_info`.
+
+        Raises
+        ------
+        ValueError
+            If any name is None or `chunk_size` is less than 1.
+        httpx.HTTPError, TimeoutError or CircuitOpenError
+            If the endpoint cannot answer after retries and a name has no cached result.
+        '''
+        if any(name is None for name in names):
+            logger.error("names contains None")
+            raise ValueError("names cannot contain None")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+
+        start = time.perf_counter()
+        keys = {name: normalize_name(name) for name in names}
+        found = {}
+        pending = {}
+        for name, key in keys.items():
+            if key in found or key in pending:
+                continue
+            cached = MISSING if refresh else self.cache.get(key)
+            if cached is MISSING:
+                pending[key] = name
+            else:
+                found[key] = cached
+                record_lookup("hit", time.perf_counter() - start)
+
+        pending_items = list(pending.items())
+        for index in range(0, len(pending_items), chunk_size):
+            chunk = dict(pending_items[index:index + chunk_size])
+            chunk_start = time.perf_counter()
+            # Names another caller is already fetching share its request.
+            try:
+                found.update(LOOKUPS.do_many(list(chunk), self._fetch_and_cache_many, chunk, not refresh))
+            except Exception:
+                for _ in chunk:
+                    record_lookup("error", time.perf_counter() - chunk_start)
+                raise
+            for _ in chunk:
+                record_lookup("miss", time.perf_counter() - chunk_start)
+
+        return {name: found[key] for name, key in keys.items()}
+
+    def _fetch_and_cache_many(self, keys: list[str], names: dict[str, str],
+                              stale: bool) -> dict[str, list[list[str | None]] | None]:
+        '''
+        Resolves the names stored under `keys` in `names` with one batched
+        lookup and caches each result under its key.
+
+        If the endpoint is unavailable and `stale` is set, expired cached
+        results are served instead when every name has one.
+        '''
+        chunk = {key: names[key] for key in keys}
+        try:
+            fetched = self._fetch_people_info(list(chunk.values()))
+        except ENDPOINT_ERRORS as error:
+            cached = {key: self.cache.get_stale(key) for key in keys} if stale else {}
+            if not stale or any(value is MISSING for value in cached.values()):
+                raise
+            logger.warning("Serving stale results for %d people: %s", len(keys), error)
+            return cached
+
+        people_info = {}
+        for key, name in chunk.items():
+            people_info[key] = fetched.get(name)
+            self.cache.set(key, people_info[key])
+        return people_info
 
-        sparql = SPARQLWrapper("http://dbpedia.org/sparql")
-        sparql.setQuery(f"""
-            PREFIX foaf: <http://xmlns.com/foaf/0.1/>
-            PREFIX dbo: <http://dbpedia.org/ontology/>
+    def _fetch_person_info(self, person_name: str) -> list[list[str | None]] | None:
+        '''
+        Resolves `person_name` against DBpedia, bypassing the cache.
+
+        Each tier is tried in order and the first one with results wins. The
+        latency of every tier that ran is stored in `last_timings`.
+        '''
+        logger.debug("Querying for person: %s", person_name)
+        self.last_timings = {}
+        for tier in TIERS:
+            query = TIER_QUERIES[tier](person_name)
+            if query is None:
+                continue
+
+            start = time.perf_counter()
+            bindings = _run_query(query)
+            self.last_timings[tier] = time.perf_counter() - start
+            logger.info("Tier %s for %s took %.3fs (%d rows)",
+                        tier, person_name, self.last_timings[tier], len(bindings))
+
+            if bindings:
+                logger.info("Retrieved information for person: %s", person_name)
+                return rank_bindings(person_name, bindings)
+
+        logger.info("No information found for person: %s", person_name)
+        return None
+
+    def _fetch_people_info(self, names: list[str]) -> dict[str, list[list[str | None]]]:
+        '''
+        Resolves all of `names` against DBpedia, bypassing the cache.
 
-            SELECT ?name ?birthDate ?deathDate
+        Each tier is answered for the whole chunk in one query: the exact-label
+        tier for every name, then the full-text tier for the names it left
+        unmatched, then the regex tier for the names neither matched, so a
+        chunk costs at most three requests. Each binding carries the input
+        name it matched in `?query`, which is used to split the results back
+        out per name. Names with no match at all are left out of the returned
+        dictionary.
+        '''
+        logger.debug("Querying for %d people", len(names))
+        values = " ".join(
+            f"({_sparql_string(name)} {_sparql_string(label)}@en)"
+            for name in names for label in _exact_labels(name)
+        )
+        bindings = _run_query(f"""
+            {PREFIXES}
+            SELECT ?query ?person ?name ?birthDate ?deathDate ?popularity
             WHERE {{
+                VALUES (?query ?name) {{ {values} }}
                 ?person foaf:name ?name ;
                         dbo:birthDate ?birthDate .
                 OPTIONAL {{ ?person dbo:deathDate ?deathDate }}
-                FILTER (lang(?name) = 'en')
-                FILTER (regex(?name, "{person_name}", "i"))
+                OPTIONAL {{ ?person dbo:wikiPageLength ?popularity }}
             }}
         """)
 
-        sparql.setReturnFormat(JSON)
-        results = sparql.query().convert()
+        people_info = _rank_by_query(bindings)
 
-        logger.debug("Querying for person: %s", person_name)
-        logger.debug("Query results: %s", results)
+        for batch_query in (_batch_contains_query, _batch_regex_query):
+            query = batch_query([name for name in names if name not in people_info])
+            if query is not None:
+                people_info.update(_rank_by_query(_run_query(query)))
 
-        person_info = []
-        for result in results["results"]["bindings"]:
-            full_name = result["name"]["value"]
-            birth_date = result["birthDate"]["value"]
-            death_date = result["deathDate"]["value"] if "deathDate" in result else None
-            person_info.append([full_name, birth_date, death_date])
+        logger.info("Retrieved information for %d of %d people", len(people_info), len(names))
+        return people_info
 
-        if not person_info:
-            logger.info("No information found for person: %s", person_name)
-            return None
 
-        logger.info("Retrieved information for person: %s", person_name)
-        return person_info
+def _exact_labels(person_name: str) -> list[str]:
+    '''
+    Returns the label spellings tried by the exact tier: the name as given and in title case.
+    '''
+    label = " ".join(person_name.split())
+    return list(dict.fromkeys([label, label.title()]))
+
+
+def _exact_query(person_name: str, limit: int = DEFAULT_LIMIT, offset: int | None = None) -> str:
+    '''
+    Builds the exact-label query, which the endpoint answers from its label index.
+    '''
+    labels = " ".join(f"{_sparql_string(label)}@en" for label in _exact_labels(person_name))
+    return f"""
+        {PREFIXES}
+        SELECT ?person ?name ?birthDate ?deathDate ?popularity
+        WHERE {{
+            VALUES ?name {{ {labels} }}
+            ?person foaf:name ?name ;
+                    dbo:birthDate ?birthDate .
+            OPTIONAL {{ ?person dbo:deathDate ?deathDate }}
+            OPTIONAL {{ ?person dbo:wikiPageLength ?popularity }}
+        }}
+        {_page_clause(limit, offset)}
+    """
+
+
+def _contains_terms(person_name: str) -> str | None:
+    '''
+    Builds the full-text expression matching every word of the name, with the
+    last one as a prefix. Returns None if the name has no usable words.
+    '''
+    words = re.findall(r"\w+", person_name)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    # The endpoint only accepts prefix wildcards after at least four characters.
+    if len(words[-1]) >= 4:
+        terms[-1] = f'"{words[-1]}*"'
+    return " AND ".join(terms)
+
+
+def _contains_query(person_name: str, limit: int = DEFAULT_LIMIT, offset: int | None = None) -> str | None:
+    '''
+    Builds the full-text query. Returns None if the name has no usable words.
+    '''
+    terms = _contains_terms(person_name)
+    if terms is None:
+        return None
+    return f"""
+        {PREFIXES}
+        SELECT ?person ?name ?birthDate ?deathDate ?popularity
+        WHERE {{
+            ?person foaf:name ?name ;
+                    dbo:birthDate ?birthDate .
+            ?name bif:contains '{terms}' .
+            OPTIONAL {{ ?person dbo:deathDate ?deathDate }}
+            OPTIONAL {{ ?person dbo:wikiPageLength ?popularity }}
+            FILTER (lang(?name) = 'en')
+        }}
+        {_page_clause(limit, offset)}
+    """
+
+
+def _batch_contains_query(names: list[str], limit: int = DEFAULT_LIMIT) -> str | None:
+    '''
+    Builds one full-text query for many names: a sub-select per name, limited
+    like `_contains_query` and tagged with the name in `?query`. Returns None
+    if none of the names has usable words.
+    '''
+    blocks = []
+    for name in names:
+        terms = _contains_terms(name)
+        if terms is not None:
+            blocks.append(_batch_block(name, f"?name bif:contains '{terms}' .", limit))
+    return _batch_query(blocks)
+
+
+def _batch_regex_query(names: list[str], limit: int = DEFAULT_LIMIT) -> str | None:
+    '''
+    Builds one regex query for many names, a sub-select per name like
+    `_batch_contains_query`. Returns None if `names` is empty.
+    '''
+    return _batch_query([
+        _batch_block(name, f'FILTER (regex(?name, {_sparql_string(name)}, "i"))', limit) for name in names
+    ])
+
+
+def _batch_block(person_name: str, condition: str, limit: int) -> str:
+    '''
+    Builds the sub-select of a batched query matching one name with `condition`,
+    limited to `limit` rows and tagged with the name in `?query`.
+    '''
+    return f"""{{
+        SELECT ?query ?person ?name ?birthDate
+        WHERE {{
+            ?person foaf:name ?name ;
+                    dbo:birthDate ?birthDate .
+            {condition}
+            FILTER (lang(?name) = 'en')
+            BIND ({_sparql_string(person_name)} AS ?query)
+        }}
+        LIMIT {limit}
+    }}"""
+
+
+def _batch_query(blocks: list[str]) -> str | None:
+    '''
+    Joins the sub-selects of a batched query. Returns None if there are none.
+    '''
+    if not blocks:
+        return None
+    return f"""
+        {PREFIXES}
+        SELECT ?query ?person ?name ?birthDate ?deathDate ?popularity
+        WHERE {{
+            {" UNION ".join(blocks)}
+            OPTIONAL {{ ?person dbo:deathDate ?deathDate }}
+            OPTIONAL {{ ?person dbo:wikiPageLength ?popularity }}
+        }}
+    """
+
+
+def _regex_query(person_name: str, limit: int = DEFAULT_LIMIT, offset: int | None = None) -> str:
+    '''
+    Builds the last-resort case-insensitive regex query.
+    '''
+    return f"""
+        {PREFIXES}
+        SELECT ?person ?name ?birthDate ?deathDate ?popularity
+        WHERE {{
+            ?person foaf:name ?name ;
+                    dbo:birthDate ?birthDate .
+            OPTIONAL {{ ?person dbo:deathDate ?deathDate }}
+            OPTIONAL {{ ?person dbo:wikiPageLength ?popularity }}
+            FILTER (lang(?name) = 'en')
+            FILTER (regex(?name, {_sparql_string(person_name)}, "i"))
+        }}
+        {_page_clause(limit, offset)}
+    """
+
+
+def _page_clause(limit: int, offset: int | None) -> str:
+    '''
+    Builds the solution modifiers of a tier query. Paged queries are ordered so
+    consecutive offsets never skip or repeat a row.
+    '''
+    if offset is None:
+        return f"LIMIT {limit}"
+    return f"ORDER BY ?name ?birthDate LIMIT {limit} OFFSET {offset}"
+
+
+TIER_QUERIES = {
+    "exact": _exact_query,
+    "contains": _contains_query,
+    "regex": _regex_query,
+}
+
+
+def _run_query(query: str) -> list[dict]:
+    '''
+    Sends a SELECT query to DBpedia over the shared client, behind the shared
+    resilience policy, and returns its result bindings.
+    '''
+    try:
+        bindings = get_policy().call(get_client().select, query)
+    except Exception:
+        ENDPOINT_REQUESTS.labels(outcome="error").inc()
+        raise
+    ENDPOINT_REQUESTS.labels(outcome="ok").inc()
+    logger.debug("Query returned %d rows", len(bindings))
+    return bindings
+
+
+def _rank_by_query(bindings: list[dict]) -> dict[str, list[list[str | None]]]:
+    '''
+    Splits the bindings of a batched query by the input name in `?query` and
+    ranks each name's matches.
+    '''
+    grouped = {}
+    for binding in bindings:
+        grouped.setdefault(binding["query"]["value"], []).append(binding)
+    return {name: rank_bindings(name, matches) for name, matches in grouped.items()}
+
+
+def _binding_to_row(binding: dict) -> list[str | None]:
+    '''
+    Converts one SPARQL result binding into a `[full_name, birth_date, death_date, uri]` row.
+    '''
+    full_name = binding["name"]["value"]
+    birth_date = binding["birthDate"]["value"]
+    death_date = binding["deathDate"]["value"] if "deathDate" in binding else None
+    uri = binding["person"]["value"] if "person" in binding else None
+    return [full_name, birth_date, death_date, uri]
+
+
+def _sparql_string(value: str) -> str:
+    '''
+    Quotes `value` as a SPARQL string literal, escaping backslashes, quotes and newlines.
+    '''
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"')
+               .replace("\n", "\\n").replace("\r", "\\r"))
+    return f'"{escaped}"'
@@ -0,0 +1,119 @@
+"""
+Imported Modules:
+- math: Used to dampen the popularity signal.
+- re: Used to split names into words.
+- collections.abc: Provides the Iterable type.
+- instrumentation: Provides the stage timers.
+- normalize: Provides the name normalization used to compare names.
+
+Ranking of the candidates a lookup returns.
+
+Endpoints return matches in no useful order, and the same person can
+appear several times (one row per matching label or date value). The
+candidates are de-duplicated by entity URI and sorted by a score that
+combines how well the name matches with how prominent the person is, so
+the first row is the most likely person meant.
+"""
+import math
+import re
+from collections.abc import Iterable
+from wikipedia_name_query.instrumentation import stage
+from wikipedia_name_query.normalize import normalize_name
+
+EXACT_WEIGHT = 4.0
+PREFIX_WEIGHT = 2.0
+OVERLAP_WEIGHT = 1.0
+POPULARITY_WEIGHT = 1.0
+# A popularity of this much or more earns the full popularity weight.
+POPULARITY_SCALE = 1_000_000
+
+
+def score(person_name: str, full_name: str, popularity: int = 0) -> float:
+    '''
+    Scores how likely `full_name` is to be the person meant by `person_name`.
+
+    Parameters
+    ----------
+    person_name : str
+        The name that was looked up.
+    full_name : str
+        The candidate's full name.
+    popularity : int, optional
+        A popularity signal for the candidate, such as its Wikipedia page
+        length. Defaults to 0.
+
+    Returns
+    -------
+    score : float
+        The score; higher is better.
+    '''
+    wanted = normalize_name(person_name)
+    candidate = normalize_name(full_name)
+    total = 0.0
+    if candidate == wanted:
+        total += EXACT_WEIGHT
+    elif candidate.startswith(wanted):
+        total += PREFIX_WEIGHT
+
+    wanted_words = set(re.findall(r"\w+", wanted))
+    candidate_words = set(re.findall(r"\w+", candidate))
+    if wanted_words and candidate_words:
+        total += OVERLAP_WEIGHT * len(wanted_words & candidate_words) / len(wanted_words | candidate_words)
+
+    if popularity > 0:
+        total += POPULARITY_WEIGHT * min(1.0, math.log1p(popularity) / math.log1p(POPULARITY_SCALE))
+    return total
+
+
+def rank_candidates(person_name: str,
+                    candidates: Iterable[tuple[str | None, list[str | None], int]]) -> list[list[str | None]]:
+    '''
+    De-duplicates candidates by entity and sorts them best first.
+
+    Parameters
+    ----------
+    person_name : str
+        The name that was looked up.
+    candidates : iterable of tuples
+        `(uri, row, popularity)` for each match, where `row` is
+        `[full_name, birth_date, death_date]`. Candidates without a URI are
+        de-duplicated by their row instead.
+
+    Returns
+    -------
+    rows : list of lists
+        A `[full_name, birth_date, death_date, uri]` row for each distinct
+        candidate, best first. Ties keep their original order.
+    '''
+    best = {}
+    for uri, row, popularity in candidates:
+        entity = uri if uri is not None else tuple(row)
+        if entity not in best:
+            best[entity] = (score(person_name, row[0], popularity), [*row, uri])
+    ranked = sorted(best.values(), key=lambda scored: scored[0], reverse=True)
+    return [row for _, row in ranked]
+
+
+def rank_bindings(person_name: str, bindings: Iterable[dict]) -> list[list[str | None]]:
+    '''
+    Ranks SPARQL result bindings with `person`, `name`, `birthDate` and the
+    optional `deathDate` and `popularity` variables.
+
+    Returns
+    -------
+    rows : list of lists
+        The rows of the distinct candidates, best first.
+    '''
+    with stage("row_building"):
+        return rank_candidates(person_name, (
+            (_value(binding, "person"), _row(binding), int(_value(binding, "popularity") or 0))
+            for binding in bindings
+        ))
+
+
+def _row(binding: dict) -> list[str | None]:
+    return [binding["name"]["value"], binding["birthDate"]["value"], _value(binding, "deathDate")]
+
+
+def _value(binding: dict, name: str) -> str | None:
+    return binding[name]["value"] if name in binding else None
@@ -0,0 +1,270 @@
+"""
+Imported Modules:
+- array: Provides the compact integer columns of `PersonTable`.
+- dataclasses: Used to define the immutable, slotted `PersonRecord`.
+- sys: Used to intern names and measure memory use.
+- collections.abc: Provides the Iterable and Iterator types.
+- numpy: Used to expose the date columns as datetime64 arrays.
+- ages: Provides the vectorized age calculation.
+- dates: Used to convert dates to and from days since the epoch.
+
+Compact representations of lookup results.
+
+`PersonRecord` is an immutable, slotted stand-in for one
+`[full_name, birth_date, death_date, uri]` row. `PersonTable` stores many
+rows column by column: names as indexes into an interned string pool and
+dates as days since 1970-01-01 in integer arrays, which is far smaller than
+a list of lists of strings for large batches. It does not keep URIs.
+"""
+import sys
+from array import array
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+import numpy as np
+from wikipedia_name_query.ages import calculate_ages
+from wikipedia_name_query.dates import format_days, to_days
+
+# Stored in a date column when the date is absent or cannot be parsed.
+NO_DATE = -2 ** 31
+
+
+@dataclass(frozen=True, slots=True)
+class PersonRecord:
+    '''
+    One lookup result.
+
+    Attributes
+    ----------
+    full_name : str
+        The full name of the person.
+    birth_date : str or None
+        The date of birth (format: YYYY-MM-DD).
+    death_date : str or None
+        The date of death (format: YYYY-MM-DD), or None if the person is alive.
+    uri : str or None
+        The URI of the person's entity, when the backend reports one.
+    '''
+    full_name: str
+    birth_date: str | None
+    death_date: str | None = None
+    uri: str | None = None
+
+    @classmethod
+    def from_row(cls, row: list[str | None]) -> "PersonRecord":
+        '''
+        Creates a record from a `[full_name, birth_date, death_date, uri]` row.
+        Rows cached before URIs were kept have no `uri`.
+        '''
+        return cls(*row)
+
+    @classmethod
+    def from_binding(cls, binding: dict) -> "PersonRecord":
+        '''
+        Creates a record from one SPARQL result binding.
+        '''
+        death_date = binding["deathDate"]["value"] if "deathDate" in binding else None
+        uri = binding["person"]["value"] if "person" in binding else None
+        return cls(binding["name"]["value"], binding["birthDate"]["value"], death_date, uri)
+
+    def to_row(self) -> list[str | None]:
+        '''
+        Returns the record as a `[full_name, birth_date, death_date, uri]` row.
+        '''
+        return [self.full_name, self.birth_date, self.death_date, self.uri]
+
+
+class StringPool:
+    '''
+    Stores each distinct string once and hands out small integer ids for it.
+    '''
+
+    def __init__(self) -> None:
+        self._ids = {}
+        self._strings = []
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    def add(self, value: str) -> int:
+        '''
+        Returns the id of `value`, adding it to the pool if it is new.
+        '''
+        string_id = self._ids.get(value)
+        if string_id is None:
+            value = sys.intern(value)
+            string_id = self._ids[value] = len(self._strings)
+            self._strings.append(value)
+        return string_id
+
+    def get(self, string_id: int) -> str:
+        '''
+        Returns the string with the given id.
+        '''
+        return self._strings[string_id]
+
+
+class PersonTable:
+    '''
+    A columnar table of lookup results.
+
+    Attributes
+    ----------
+    names : StringPool
+        The pool holding every distinct full name.
+    name_ids : array
+        The pool id of each row's full name.
+    birth_days : array
+        Each row's date of birth in days since 1970-01-01, or `NO_DATE`.
+    death_days : array
+        Each row's date of death in days since 1970-01-01, or `NO_DATE`.
+    '''
+
+    def __init__(self) -> None:
+        self.names = StringPool()
+        self.name_ids = array("I")
+        self.birth_days = array("i")
+        self.death_days = array("i")
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[list[str | None]]) -> "PersonTable":
+        '''
+        Builds a table from `[full_name, birth_date, death_date, uri]` rows.
+
+        Parameters
+        ----------
+        rows : iterable of lists
+            The rows, for example the result of `Query.get_person_info`.
+
+        Returns
+        -------
+        table : PersonTable
+            The new table.
+        '''
+        table = cls()
+        table.extend(rows)
+        return table
+
+    @classmethod
+    def from_bindings(cls, bindings: Iterable[dict]) -> "PersonTable":
+        '''
+        Builds a table from SPARQL result bindings with `name`, `birthDate`
+        and optional `deathDate` variables.
+
+        Parameters
+        ----------
+        bindings : iterable of dict
+            The bindings, i.e. `results["results"]["bindings"]`.
+
+        Returns
+        -------
+        table : PersonTable
+            The new table.
+        '''
+        table = cls()
+        table.extend(
+            (binding["name"]["value"], binding["birthDate"]["value"],
+             binding["deathDate"]["value"] if "deathDate" in binding else None)
+            for binding in bindings
+        )
+        return table
+
+    def __len__(self) -> int:
+        return len(self.name_ids)
+
+    def __getitem__(self, index: int) -> PersonRecord:
+        return PersonRecord(
+            self.names.get(self.name_ids[index]),
+            days_to_date(self.birth_days[index]),
+            days_to_date(self.death_days[index]),
+        )
+
+    def __iter__(self) -> Iterator[PersonRecord]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def append(self, full_name: str, birth_date: str | None, death_date: str | None = None) -> None:
+        '''
+        Adds one row to the table.
+        '''
+        self.name_ids.append(self.names.add(full_name))
+        self.birth_days.append(date_to_days(birth_date))
+        self.death_days.append(date_to_days(death_date))
+
+    def extend(self, rows: Iterable[list[str | None]]) -> None:
+        '''
+        Adds every `[full_name, birth_date, death_date, uri]` row to the
+        table, leaving out the URI.
+        '''
+        for full_name, birth_date, death_date, *_ in rows:
+            self.append(full_name, birth_date, death_date)
+
+    def rows(self) -> list[list[str | None]]:
+        '''
+        Returns the table as `[full_name, birth_date, death_date, uri]` rows, with no URIs.
+        '''
+        return [record.to_row() for record in self]
+
+    def dates(self) -> tuple[np.ndarray, np.ndarray]:
+        '''
+        Returns the birth and death columns as `datetime64[D]` arrays, with NaT for missing dates.
+        '''
+        return _to_datetime64(self.birth_days), _to_datetime64(self.death_days)
+
+    def ages(self, as_of: np.datetime64 | str | None = None) -> np.ndarray:
+        '''
+        Calculates every row's age in one vectorized pass.
+
+        Parameters
+        ----------
+        as_of : datetime64 or str, optional
+            The date ages of living people are computed at. Defaults to today.
+
+        Returns
+        -------
+        ages : numpy.ndarray
+            The ages, with `NO_AGE` where the birth date is missing.
+        '''
+        births, deaths = self.dates()
+        return calculate_ages(births, deaths, as_of)
+
+    @property
+    def nbytes(self) -> int:
+        '''
+        Returns the approximate memory used by the columns and the name pool.
+        '''
+        columns = sum(column.itemsize * len(column)
+                      for column in (self.name_ids, self.birth_days, self.death_days))
+        pool = sum(sys.getsizeof(name) for name in self.names._strings)
+        return columns + pool
+
+
+def date_to_days(value: str | None) -> int:
+    '''
+    Converts an xsd:date value to days since 1970-01-01.
+
+    Returns
+    -------
+    days : int
+        The number of days, or `NO_DATE` if `value` is None or has no valid year.
+    '''
+    days = to_days(value)
+    return NO_DATE if days is None else days
+
+
+def _to_datetime64(days: array) -> np.ndarray:
+    '''
+    Converts a days-since-epoch column to a `datetime64[D]` array without copying it per element.
+    '''
+    values = np.frombuffer(days, dtype=np.int32).astype(np.int64)
+    dates = values.view("datetime64[D]")
+    dates[values == NO_DATE] = np.datetime64("NaT")
+    return dates
+
+
+def days_to_date(days: int) -> str | None:
+    '''
+    Converts days since 1970-01-01 back to a YYYY-MM-DD date, or None for `NO_DATE`.
+    '''
+    if days == NO_DATE:
+        return None
+    return format_days(days)
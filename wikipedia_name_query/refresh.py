@@ -0,0 +1,219 @@
+"""
+Imported Modules:
+- logging: Allows for logging messages to the console or a file.
+- threading: Provides the event a running scheduler is stopped with.
+- time: Used to timestamp refreshed results.
+- collections.abc: Provides the Callable type.
+- dataclasses: Used to define the refresh result.
+- backends: Provides the backends names are resolved with.
+- input_database: Provides the stored names and their resolved results.
+- person: Provides the conversion of a lookup result to the record that is stored,
+  and the shared record cache refreshed names are dropped from.
+- resilience: Provides the endpoint errors a refresh can fail with.
+- sparql: Provides the count of endpoint requests a run has sent.
+
+Background re-resolution of stored names.
+
+`RefreshScheduler` finds the names in a `Database` whose resolved data is
+missing or older than `max_age`, most overdue first, and looks them up
+again in batches, at most `max_names` names and about `max_requests`
+endpoint requests per run. It runs once with
+`refresh_once`, or repeatedly with `run`, which the TUI uses as a worker
+thread and the `refresh` command runs in the foreground:
+
+    RefreshScheduler(Database()).run(interval=15 * 60)
+"""
+import logging
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from wikipedia_name_query.backends import DEFAULT_BACKEND, Backend, get_backend
+from wikipedia_name_query.input_database import RESOLVED_MAX_AGE, STATUS_FOUND, Database, Resolved
+from wikipedia_name_query.person import _first_record, invalidate_record
+from wikipedia_name_query.resilience import ENDPOINT_ERRORS
+from wikipedia_name_query.sparql import requests_sent
+
+logger = logging.getLogger(__name__)
+
+# Seconds between runs.
+DEFAULT_INTERVAL = 15 * 60
+# Names looked up per run.
+DEFAULT_MAX_NAMES = 100
+# Endpoint requests sent per run.
+DEFAULT_MAX_REQUESTS = 100
+# Names per batched backend call.
+DEFAULT_BATCH_SIZE = 25
+
+
+@dataclass(frozen=True, slots=True)
+class RefreshResult:
+    '''
+    The outcome of one refresh run.
+
+    Attributes
+    ----------
+    found : int
+        Names resolved to a person.
+    not_found : int
+        Names that matched nobody.
+    failed : int
+        Names not refreshed because the endpoint failed or their results could
+        not be stored; they are tried again next run.
+    '''
+    found: int = 0
+    not_found: int = 0
+    failed: int = 0
+
+    @property
+    def refreshed(self) -> int:
+        '''
+        The number of names whose stored result was replaced.
+        '''
+        return self.found + self.not_found
+
+
+class RefreshScheduler:
+    '''
+    Keeps the resolved data of stored names fresh.
+
+    Attributes
+    ----------
+    db : Database
+        The database of names and resolved results.
+    backend : Backend
+        The backend names are resolved with.
+    max_age : float
+        Seconds after which a resolved result is refreshed.
+    max_names : int
+        The maximum number of names looked up per run.
+    max_requests : int
+        The number of endpoint requests after which a run stops.
+    batch_size : int
+        The number of names per batched backend call.
+    '''
+
+    def __init__(self, db: Database, backend: str | Backend = DEFAULT_BACKEND, max_age: float = RESOLVED_MAX_AGE,
+                 max_names: int = DEFAULT_MAX_NAMES, batch_size: int = DEFAULT_BATCH_SIZE,
+                 max_requests: int = DEFAULT_MAX_REQUESTS) -> None:
+        '''
+        Parameters
+        ----------
+        db : Database
+            The database of names and resolved results.
+        backend : str or Backend, optional
+            The backend, or the name of one, to resolve names with. Defaults to `DEFAULT_BACKEND`.
+        max_age : float, optional
+            Seconds after which a resolved result is refreshed. Defaults to `RESOLVED_MAX_AGE`.
+        max_names : int, optional
+            The maximum number of names looked up per run. Defaults to `DEFAULT_MAX_NAMES`.
+        batch_size : int, optional
+            The number of names per batched backend call. Defaults to `DEFAULT_BATCH_SIZE`.
+        max_requests : int, optional
+            The number of endpoint requests after which a run stops. Defaults to `DEFAULT_MAX_REQUESTS`.
+
+        Raises
+        ------
+        ValueError
+            If `max_names`, `batch_size` or `max_requests` is less than 1.
+        '''
+        if max_names < 1 or batch_size < 1 or max_requests < 1:
+            raise ValueError("max_names, batch_size and max_requests must be at least 1")
+        self.db = db
+        self.backend = get_backend(backend) if isinstance(backend, str) else backend
+        self.max_age = max_age
+        self.max_names = max_names
+        self.batch_size = batch_size
+        self.max_requests = max_requests
+
+    def due(self, now: float | None = None) -> list[tuple[int, str]]:
+        '''
+        Returns the names to refresh this run: those never resolved first,
+        then the stalest, at most `max_names` of them.
+
+        Parameters
+        ----------
+        now : float, optional
+            The current time in seconds since the epoch. Defaults to now.
+
+        Returns
+        -------
+        list of tuple
+            `(id, name)` for each name, in priority order.
+        '''
+        return self.db.get_stale_names(self.max_age, now, limit=self.max_names)
+
+    def refresh_once(self, now: float | None = None) -> RefreshResult:
+        '''
+        Looks up the names that are due, one batch at a time, and stores the results.
+
+        The run stops at the first endpoint error, so an unavailable
+        endpoint does not use up `max_names`, and before the next batch once
+        it has sent `max_requests` endpoint requests, so the batch that spends
+        the budget is the last one. The remaining names stay due.
+
+        Parameters
+        ----------
+        now : float, optional
+            The current time in seconds since the epoch. Defaults to now.
+
+        Returns
+        -------
+        RefreshResult
+            How many names were refreshed, and how many failed.
+        '''
+        due = self.due(now)
+        found = not_found = failed = 0
+        sent = requests_sent()
+        for start in range(0, len(due), self.batch_size):
+            if requests_sent() - sent >= self.max_requests:
+                logger.info("Refresh used its %d requests after %d of %d names",
+                            self.max_requests, start, len(due))
+                break
+            batch = due[start:start + self.batch_size]
+            try:
+                people_info = self.backend.get_people_info(
+                    [name for _, name in batch], chunk_size=self.batch_size, refresh=True
+                )
+            except ENDPOINT_ERRORS as error:
+                logger.warning("Refresh stopped after %d of %d names: %s", start, len(due), error)
+                return RefreshResult(found, not_found, failed + len(due) - start)
+
+            fetched_at = time.time()
+            results = [
+                Resolved.from_record(id, _first_record(people_info.get(name)), fetched_at=fetched_at)
+                for id, name in batch
+            ]
+            if self.db.save_resolved(results) is None:
+                logger.warning("Could not store the refreshed results for %d names", len(batch))
+                failed += len(batch)
+                continue
+            for _, name in batch:
+                invalidate_record(name, self.backend)
+            batch_found = sum(result.status == STATUS_FOUND for result in results)
+            found += batch_found
+            not_found += len(results) - batch_found
+        logger.debug("Refreshed %d names (%d not found, %d failed)", found + not_found, not_found, failed)
+        return RefreshResult(found, not_found, failed)
+
+    def run(self, interval: float = DEFAULT_INTERVAL, stop: threading.Event | None = None,
+            on_refresh: Callable[[RefreshResult], None] | None = None) -> None:
+        '''
+        Refreshes due names every `interval` seconds until `stop` is set.
+
+        Parameters
+        ----------
+        interval : float, optional
+            Seconds between runs. Defaults to `DEFAULT_INTERVAL`.
+        stop : threading.Event, optional
+            Set to stop the scheduler, even while it waits. Defaults to
+            None (run until the process exits).
+        on_refresh : callable, optional
+            Called with the result of each run.
+        '''
+        stop = stop if stop is not None else threading.Event()
+        while not stop.is_set():
+            result = self.refresh_once()
+            if on_refresh is not None:
+                on_refresh(result)
+            stop.wait(interval)
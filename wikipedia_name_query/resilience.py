@@ -0,0 +1,399 @@
+"""
+Imported Modules:
+- asyncio: Used to wait without blocking the event loop.
+- logging: Allows for logging messages to the console or a file.
+- random: Used to add jitter to retry delays.
+- threading: Used to make the limiter and breaker safe to share between threads.
+- time: Used for the monotonic clock and blocking waits.
+- collections.abc: Provides the Awaitable and Callable types.
+- httpx: Provides the HTTP errors that are worth retrying.
+
+Protection for the SPARQL endpoint and for callers when it misbehaves:
+
+- TokenBucket: limits the request rate, so batch load does not get throttled.
+- CircuitBreaker: fails fast while the endpoint keeps failing.
+- ResiliencePolicy: combines both with jittered exponential backoff on
+  429/5xx responses, timeouts and connection errors.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections.abc import Awaitable, Callable
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATE = 10.0
+DEFAULT_BURST = 20
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_CAP = 10.0
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30.0
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    '''
+    Raised instead of sending a request while the circuit breaker is open.
+    '''
+
+
+# Errors that mean the endpoint could not answer; callers may fall back to
+# cached data when they see one of these.
+ENDPOINT_ERRORS = (httpx.HTTPError, TimeoutError, CircuitOpenError)
+
+
+class TokenBucket:
+    '''
+    A thread-safe token bucket rate limiter.
+
+    Attributes
+    ----------
+    rate : float
+        Tokens added per second, i.e. the sustained request rate.
+    capacity : int
+        The maximum number of tokens, i.e. the largest burst.
+    waits : int
+        The number of acquisitions that had to wait for a token.
+    '''
+
+    def __init__(self, rate: float = DEFAULT_RATE, capacity: int = DEFAULT_BURST) -> None:
+        '''
+        Initializes a full bucket.
+
+        Parameters
+        ----------
+        rate : float, optional
+            Tokens added per second. Defaults to `DEFAULT_RATE`.
+        capacity : int, optional
+            The maximum number of tokens. Defaults to `DEFAULT_BURST`.
+        '''
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate must be positive and capacity at least 1")
+        self.rate = rate
+        self.capacity = capacity
+        self.waits = 0
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        '''
+        Takes a token, borrowing against the future if none is available.
+
+        Returns
+        -------
+        delay : float
+            The number of seconds the caller must wait before using the token.
+        '''
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            self.waits += 1
+            return -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        '''
+        Blocks until a token is available.
+        '''
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def aacquire(self) -> None:
+        '''
+        Waits, without blocking the event loop, until a token is available.
+        '''
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class CircuitBreaker:
+    '''
+    A thread-safe circuit breaker.
+
+    After `failure_threshold` consecutive failures the breaker opens and
+    rejects calls for `reset_timeout` seconds. It then lets a single trial
+    call through (half-open): success closes it, failure opens it again.
+
+    Attributes
+    ----------
+    failure_threshold : int
+        Consecutive failures that open the breaker.
+    reset_timeout : float
+        Seconds the breaker stays open before allowing a trial call.
+    rejected : int
+        The number of calls rejected while open.
+    '''
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT) -> None:
+        '''
+        Initializes a closed breaker.
+
+        Parameters
+        ----------
+        failure_threshold : int, optional
+            Consecutive failures that open the breaker. Defaults to `DEFAULT_FAILURE_THRESHOLD`.
+        reset_timeout : float, optional
+            Seconds the breaker stays open. Defaults to `DEFAULT_RESET_TIMEOUT`.
+        '''
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.rejected = 0
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_started = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        '''
+        Returns the current state: `closed`, `open` or `half_open`.
+        '''
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> None:
+        '''
+        Checks that a call may proceed.
+
+        Raises
+        ------
+        CircuitOpenError
+            If the breaker is open, or half-open with a trial call already running.
+        '''
+        with self._lock:
+            now = time.monotonic()
+            if self._state == OPEN and now - self._opened_at >= self.reset_timeout:
+                self._state = HALF_OPEN
+                self._trial_started = None
+            # A trial that never reported back (e.g. it was cancelled) is
+            # given up on after another reset_timeout.
+            trial_running = (self._trial_started is not None
+                             and now - self._trial_started < self.reset_timeout)
+            if self._state == OPEN or (self._state == HALF_OPEN and trial_running):
+                self.rejected += 1
+                raise CircuitOpenError("The SPARQL endpoint is unavailable; try again later")
+            if self._state == HALF_OPEN:
+                self._trial_started = now
+
+    def record_success(self) -> None:
+        '''
+        Records a successful call, closing the breaker.
+        '''
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info("Circuit breaker closed")
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_started = None
+
+    def record_failure(self) -> None:
+        '''
+        Records a failed call, opening the breaker once the threshold is reached.
+        '''
+        with self._lock:
+            self._failures += 1
+            self._trial_started = None
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    logger.warning("Circuit breaker opened after %d failures", self._failures)
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+
+class ResiliencePolicy:
+    '''
+    Runs endpoint calls behind a rate limiter and circuit breaker, retrying
+    transient failures with jittered exponential backoff.
+
+    Attributes
+    ----------
+    limiter : TokenBucket
+        Limits the request rate.
+    breaker : CircuitBreaker
+        Fails fast while the endpoint is unhealthy.
+    max_retries : int
+        Retries after the first attempt.
+    backoff_base : float
+        The delay ceiling in seconds for the first retry; it doubles per retry.
+    backoff_cap : float
+        The largest delay ceiling in seconds.
+    retries : int
+        The number of retries made so far.
+    failures : int
+        The number of attempts that failed with a retryable error.
+    '''
+
+    def __init__(self, limiter: TokenBucket | None = None, breaker: CircuitBreaker | None = None,
+                 max_retries: int = DEFAULT_MAX_RETRIES, backoff_base: float = DEFAULT_BACKOFF_BASE,
+                 backoff_cap: float = DEFAULT_BACKOFF_CAP) -> None:
+        '''
+        Initializes the policy.
+
+        Parameters
+        ----------
+        limiter : TokenBucket, optional
+            The rate limiter. Defaults to a new `TokenBucket`.
+        breaker : CircuitBreaker, optional
+            The circuit breaker. Defaults to a new `CircuitBreaker`.
+        max_retries : int, optional
+            Retries after the first attempt. Defaults to `DEFAULT_MAX_RETRIES`.
+        backoff_base : float, optional
+            The delay ceiling for the first retry. Defaults to `DEFAULT_BACKOFF_BASE`.
+        backoff_cap : float, optional
+            The largest delay ceiling. Defaults to `DEFAULT_BACKOFF_CAP`.
+        '''
+        self.limiter = limiter if limiter is not None else TokenBucket()
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.retries = 0
+        self.failures = 0
+
+    def call(self, fn: Callable, *args, **kwargs) -> object:
+        '''
+        Calls `fn(*args, **kwargs)` with rate limiting, retries and the circuit breaker.
+
+        Raises
+        ------
+        CircuitOpenError
+            If the breaker is open.
+        Exception
+            The last error once retries are exhausted, or any non-retryable error.
+        '''
+        attempt = 0
+        while True:
+            self.breaker.allow()
+            self.limiter.acquire()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as error:
+                time.sleep(self._on_error(error, attempt))
+                attempt += 1
+            else:
+                self.breaker.record_success()
+                return result
+
+    async def acall(self, fn: Callable[..., Awaitable], *args, **kwargs) -> object:
+        '''
+        The asyncio counterpart of `call`, for coroutine functions.
+        '''
+        attempt = 0
+        while True:
+            self.breaker.allow()
+            await self.limiter.aacquire()
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as error:
+                await asyncio.sleep(self._on_error(error, attempt))
+                attempt += 1
+            else:
+                self.breaker.record_success()
+                return result
+
+    def stats(self) -> dict[str, object]:
+        '''
+        Returns the policy's counters and breaker state.
+
+        Returns
+        -------
+        stats : dict
+            `state`, `retries`, `failures`, `rejected` and `throttled`.
+        '''
+        return {
+            "state": self.breaker.state,
+            "retries": self.retries,
+            "failures": self.failures,
+            "rejected": self.breaker.rejected,
+            "throttled": self.limiter.waits,
+        }
+
+    def _on_error(self, error: Exception, attempt: int) -> float:
+        '''
+        Records a failed attempt and returns how long to wait before retrying.
+        Re-raises the error if it is not retryable or retries are exhausted.
+        '''
+        if not _is_retryable(error):
+            # The endpoint responded, so it is healthy even though this request failed.
+            self.breaker.record_success()
+            raise error
+
+        self.failures += 1
+        self.breaker.record_failure()
+        if attempt >= self.max_retries:
+            raise error
+
+        self.retries += 1
+        delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_cap))
+        logger.warning("Retrying endpoint call in %.2fs after: %s", delay, error)
+        return delay
+
+
+def _is_retryable(error: Exception) -> bool:
+    '''
+    Returns whether `error` is transient: a 429 or 5xx response, a timeout or a connection error.
+    '''
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(error, (httpx.TransportError, TimeoutError))
+
+
+def _retry_after(error: Exception) -> float | None:
+    '''
+    Returns the delay in seconds requested by a response's Retry-After header, if any.
+    '''
+    if not isinstance(error, httpx.HTTPStatusError):
+        return None
+    try:
+        return float(error.response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+
+_policy = ResiliencePolicy()
+
+
+def get_policy() -> ResiliencePolicy:
+    '''
+    Returns the process-wide policy that guards the SPARQL endpoint.
+
+    Returns
+    -------
+    policy : ResiliencePolicy
+        The shared policy.
+    '''
+    return _policy
+
+
+def configure_policy(policy: ResiliencePolicy) -> None:
+    '''
+    Replaces the process-wide policy, for example to change the rate limit.
+
+    Parameters
+    ----------
+    policy : ResiliencePolicy
+        The new policy.
+    '''
+    global _policy
+    _policy = policy
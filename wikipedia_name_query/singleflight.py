@@ -0,0 +1,215 @@
+"""
+Imported Modules:
+- asyncio: Used to share one in-flight task between coroutines.
+- threading: Used to make threads wait on one in-flight call.
+- collections.abc: Provides the Awaitable and Callable types.
+
+Request coalescing ("single flight"): concurrent callers asking for the same
+key wait on one in-flight call and share its result or error, instead of
+each sending their own request.
+"""
+import asyncio
+import threading
+from collections.abc import Awaitable, Callable
+
+
+class _Call:
+    '''
+    One in-flight call and the outcome its waiters will share.
+    '''
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    '''
+    Coalesces concurrent calls for the same key across threads.
+
+    Attributes
+    ----------
+    calls : int
+        The number of calls that actually ran.
+    shared : int
+        The number of calls that waited on another caller's result instead of running.
+    '''
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.shared = 0
+        self._lock = threading.Lock()
+        self._in_flight = {}
+
+    def do(self, key: object, fn: Callable, *args, **kwargs) -> object:
+        '''
+        Runs `fn(*args, **kwargs)` unless a call for `key` is already running,
+        in which case waits for that call and returns its result.
+
+        Parameters
+        ----------
+        key : object
+            The key identifying equivalent calls.
+        fn : callable
+            The function to run.
+        *args
+            Positional arguments for `fn`.
+        **kwargs
+            Keyword arguments for `fn`.
+
+        Returns
+        -------
+        result : object
+            The result of the call, shared by every concurrent caller.
+
+        Raises
+        ------
+        Exception
+            Whatever the call raised, re-raised in every concurrent caller.
+        '''
+        with self._lock:
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _Call()
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+
+    def do_many(self, keys: list, fn: Callable[[list], dict], *args, **kwargs) -> dict:
+        '''
+        Runs one call of `fn(own_keys, *args, **kwargs)` for the keys no call is
+        already running for, and waits for the calls running for the others.
+
+        `fn` must return a dictionary with a result for each key it was given.
+        Callers of `do` and `do_many` asking for the same key share its result.
+
+        Parameters
+        ----------
+        keys : list
+            The keys identifying the wanted results.
+        fn : callable
+            The function to run for the keys nobody is working on yet.
+        *args
+            Further positional arguments for `fn`.
+        **kwargs
+            Keyword arguments for `fn`.
+
+        Returns
+        -------
+        results : dict
+            The result for each of `keys`.
+
+        Raises
+        ------
+        Exception
+            Whatever `fn` or a shared call raised.
+        '''
+        own = {}
+        waiting = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                call = self._in_flight.get(key)
+                if call is None:
+                    own[key] = self._in_flight[key] = _Call()
+                else:
+                    waiting[key] = call
+                    self.shared += 1
+            if own:
+                self.calls += 1
+
+        results = {}
+        if own:
+            try:
+                results = fn(list(own), *args, **kwargs)
+                for key, call in own.items():
+                    call.result = results[key]
+            except BaseException as error:
+                for call in own.values():
+                    call.error = error
+                raise
+            finally:
+                with self._lock:
+                    for key in own:
+                        del self._in_flight[key]
+                for call in own.values():
+                    call.done.set()
+
+        for key, call in waiting.items():
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            results[key] = call.result
+        return results
+
+
+class AsyncSingleFlight:
+    '''
+    Coalesces concurrent calls for the same key across coroutines.
+
+    The shared work runs as its own task, so cancelling one waiter does not
+    cancel it for the others. Keys are tracked per event loop, so one
+    instance can be shared by code running on different loops.
+
+    Attributes
+    ----------
+    calls : int
+        The number of calls that actually ran.
+    shared : int
+        The number of calls that waited on another caller's result instead of running.
+    '''
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.shared = 0
+        self._in_flight = {}
+
+    async def do(self, key: object, fn: Callable[..., Awaitable], *args, **kwargs) -> object:
+        '''
+        Awaits `fn(*args, **kwargs)` unless a call for `key` is already running
+        on this event loop, in which case awaits that call's result.
+
+        Parameters
+        ----------
+        key : object
+            The key identifying equivalent calls.
+        fn : callable
+            The coroutine function to run.
+        *args
+            Positional arguments for `fn`.
+        **kwargs
+            Keyword arguments for `fn`.
+
+        Returns
+        -------
+        result : object
+            The result of the call, shared by every concurrent caller.
+        '''
+        loop_key = (asyncio.get_running_loop(), key)
+        task = self._in_flight.get(loop_key)
+        if task is None:
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            self._in_flight[loop_key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(loop_key, None))
+            self.calls += 1
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
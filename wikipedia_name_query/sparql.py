@@ -0,0 +1,286 @@
+"""
+Imported Modules:
+- asyncio: Used to tie the shared async client to the event loop it was created on.
+- logging: Allows for logging messages to the console or a file.
+- threading: Used to create the shared client only once across threads, and to
+  count the requests each thread sends.
+- httpx: An HTTP client with keep-alive connection pooling and gzip support.
+- instrumentation: Provides the stage timers.
+
+Long-lived SPARQL clients shared by `Query`, `AsyncQuery`, `Person` and the TUI,
+so each lookup reuses a pooled keep-alive connection instead of paying for a
+new TCP connection, DNS lookup and TLS handshake.
+"""
+import asyncio
+import logging
+import threading
+import httpx
+from wikipedia_name_query.instrumentation import stage
+
+logger = logging.getLogger(__name__)
+
+ENDPOINT = "http://dbpedia.org/sparql"
+DEFAULT_POOL_SIZE = 16
+DEFAULT_TIMEOUT = 30.0
+
+RESULTS_FORMAT = "application/sparql-results+json"
+HEADERS = {
+    "Accept": RESULTS_FORMAT,
+    "Accept-Encoding": "gzip",
+}
+
+
+class SPARQLClient:
+    '''
+    A synchronous SPARQL client with a keep-alive connection pool.
+
+    Queries are POSTed as form data, so long batched queries are not limited
+    by URL length, and responses are requested gzip-compressed.
+
+    Attributes
+    ----------
+    endpoint : str
+        The URL of the SPARQL endpoint.
+    pool_size : int
+        The maximum number of pooled connections.
+    '''
+
+    def __init__(self, endpoint: str = ENDPOINT, pool_size: int = DEFAULT_POOL_SIZE,
+                 timeout: float = DEFAULT_TIMEOUT, transport: httpx.BaseTransport | None = None) -> None:
+        '''
+        Initializes the client and its connection pool.
+
+        Parameters
+        ----------
+        endpoint : str, optional
+            The URL of the SPARQL endpoint. Defaults to `ENDPOINT`.
+        pool_size : int, optional
+            The maximum number of pooled connections. Defaults to `DEFAULT_POOL_SIZE`.
+        timeout : float, optional
+            The number of seconds a request may take. Defaults to `DEFAULT_TIMEOUT`.
+        transport : httpx.BaseTransport, optional
+            A custom transport, mainly for tests. Defaults to httpx's pooled transport.
+        '''
+        self.endpoint = endpoint
+        self.pool_size = pool_size
+        self._client = httpx.Client(
+            headers=HEADERS,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            transport=transport,
+        )
+
+    def select(self, query: str) -> list[dict]:
+        '''
+        Runs a SELECT query and returns its result bindings.
+
+        Parameters
+        ----------
+        query : str
+            The SPARQL query to run.
+
+        Returns
+        -------
+        bindings : list of dict
+            The `results.bindings` of the JSON response.
+
+        Raises
+        ------
+        httpx.HTTPError
+            If the request fails or the endpoint returns an error status.
+        '''
+        _sent.count = requests_sent() + 1
+        with stage("http"):
+            response = self._client.post(self.endpoint, data={"query": query, "format": RESULTS_FORMAT})
+            response.raise_for_status()
+        with stage("json_decode"):
+            return response.json()["results"]["bindings"]
+
+    def close(self) -> None:
+        '''
+        Closes every pooled connection.
+        '''
+        self._client.close()
+
+
+class AsyncSPARQLClient:
+    '''
+    The asyncio counterpart of `SPARQLClient`.
+
+    Attributes
+    ----------
+    endpoint : str
+        The URL of the SPARQL endpoint.
+    pool_size : int
+        The maximum number of pooled connections.
+    '''
+
+    def __init__(self, endpoint: str = ENDPOINT, pool_size: int = DEFAULT_POOL_SIZE,
+                 timeout: float = DEFAULT_TIMEOUT, transport: httpx.AsyncBaseTransport | None = None) -> None:
+        '''
+        Initializes the client and its connection pool.
+
+        Parameters
+        ----------
+        endpoint : str, optional
+            The URL of the SPARQL endpoint. Defaults to `ENDPOINT`.
+        pool_size : int, optional
+            The maximum number of pooled connections. Defaults to `DEFAULT_POOL_SIZE`.
+        timeout : float, optional
+            The number of seconds a request may take. Defaults to `DEFAULT_TIMEOUT`.
+        transport : httpx.AsyncBaseTransport, optional
+            A custom transport, mainly for tests. Defaults to httpx's pooled transport.
+        '''
+        self.endpoint = endpoint
+        self.pool_size = pool_size
+        self._client = httpx.AsyncClient(
+            headers=HEADERS,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            transport=transport,
+        )
+
+    async def select(self, query: str) -> list[dict]:
+        '''
+        Runs a SELECT query and returns its result bindings.
+
+        Parameters
+        ----------
+        query : str
+            The SPARQL query to run.
+
+        Returns
+        -------
+        bindings : list of dict
+            The `results.bindings` of the JSON response.
+
+        Raises
+        ------
+        httpx.HTTPError
+            If the request fails or the endpoint returns an error status.
+        '''
+        with stage("http"):
+            response = await self._client.post(self.endpoint, data={"query": query, "format": RESULTS_FORMAT})
+            response.raise_for_status()
+        with stage("json_decode"):
+            return response.json()["results"]["bindings"]
+
+    async def aclose(self) -> None:
+        '''
+        Closes every pooled connection.
+        '''
+        await self._client.aclose()
+
+
+_settings = {"endpoint": ENDPOINT, "pool_size": DEFAULT_POOL_SIZE, "timeout": DEFAULT_TIMEOUT}
+_client = None
+_async_clients = {}
+# Tasks closing async clients of the running loop, kept so they are not garbage collected.
+_closing = set()
+_lock = threading.Lock()
+# Requests sent by each thread through any `SPARQLClient`.
+_sent = threading.local()
+
+
+def requests_sent() -> int:
+    '''
+    Returns the number of requests the calling thread has sent through any
+    `SPARQLClient`, counting each retry. Callers compare two readings to see
+    how many requests some work cost.
+
+    Returns
+    -------
+    count : int
+        The number of requests sent so far.
+    '''
+    return getattr(_sent, "count", 0)
+
+
+def configure_client(endpoint: str | None = None, pool_size: int | None = None,
+                     timeout: float | None = None) -> None:
+    '''
+    Changes the settings of the shared clients.
+
+    The current shared clients are closed and new ones are created with the
+    new settings on next use. Settings that are not given keep their current value.
+
+    Parameters
+    ----------
+    endpoint : str, optional
+        The URL of the SPARQL endpoint.
+    pool_size : int, optional
+        The maximum number of pooled connections.
+    timeout : float, optional
+        The number of seconds a request may take.
+    '''
+    global _client
+    changes = {"endpoint": endpoint, "pool_size": pool_size, "timeout": timeout}
+    with _lock:
+        _settings.update({name: value for name, value in changes.items() if value is not None})
+        if _client is not None:
+            _client.close()
+        _client = None
+        async_clients = list(_async_clients.items())
+        _async_clients.clear()
+    for loop, client in async_clients:
+        _close_async_client(loop, client)
+
+
+def _close_async_client(loop: asyncio.AbstractEventLoop, client: AsyncSPARQLClient) -> None:
+    '''
+    Closes an async client on the event loop it belongs to. The connections of
+    a client whose loop is already closed went with the loop.
+    '''
+    if loop.is_closed():
+        return
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if loop is running:
+        task = loop.create_task(client.aclose())
+        _closing.add(task)
+        task.add_done_callback(_closing.discard)
+    elif loop.is_running():
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+    else:
+        loop.run_until_complete(client.aclose())
+
+
+def get_client() -> SPARQLClient:
+    '''
+    Returns the process-wide synchronous client, creating it on first use.
+
+    Returns
+    -------
+    client : SPARQLClient
+        The shared client.
+    '''
+    global _client
+    with _lock:
+        if _client is None:
+            logger.debug("Creating shared SPARQL client for %s", _settings["endpoint"])
+            _client = SPARQLClient(**_settings)
+        return _client
+
+
+def get_async_client() -> AsyncSPARQLClient:
+    '''
+    Returns the shared asynchronous client for the running event loop.
+
+    Async connections cannot move between event loops, so one client is kept
+    per loop; clients of loops that have been closed are discarded.
+
+    Returns
+    -------
+    client : AsyncSPARQLClient
+        The shared client for the running loop.
+    '''
+    loop = asyncio.get_running_loop()
+    with _lock:
+        for other in [other for other in _async_clients if other.is_closed()]:
+            del _async_clients[other]
+        if loop not in _async_clients:
+            logger.debug("Creating shared async SPARQL client for %s", _settings["endpoint"])
+            _async_clients[loop] = AsyncSPARQLClient(**_settings)
+        return _async_clients[loop]
@@ -0,0 +1,334 @@
+"""
+Imported Modules:
+- argparse: Used for the command line entry point.
+- json: Used to load the dataset and encode SPARQL JSON results.
+- random: Used to inject errors at a configurable rate.
+- re: Used to pick apart the query shapes sent by `Query`.
+- threading: Used to serve requests in the background.
+- time: Used to add artificial latency.
+- http.server: Provides the HTTP server.
+- urllib.parse: Used to decode GET and POST query parameters.
+
+A local stand-in for the DBpedia SPARQL endpoint, for offline tests and benchmarks.
+
+The server understands the query shapes `Query` and `AsyncQuery` send (the
+exact, batched exact, full-text, batched full-text, regex and batched regex tiers, with
+LIMIT/OFFSET paging)
+and answers them from a fixture dataset. Artificial latency and error
+injection make slow or failing endpoints reproducible:
+
+    $ python -m wikipedia_name_query.stub_server --data persons.json --latency 0.05
+    $ python -m wikipedia_name_query --endpoint http://127.0.0.1:8890/sparql age --Name "Donald Knuth"
+
+The dataset is a JSON list of objects with `name`, `birthDate` and the
+optional `deathDate`, `popularity` (served as the page length) and `uri`.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_PORT = 8890
+RESOURCE = "http://dbpedia.org/resource/"
+
+STRING = r'"((?:[^"\\]|\\.)*)"'
+BATCH_VALUES = re.compile(r"VALUES \(\?query \?name\) \{(.*?)\}\s*$", re.M)
+BATCH_PAIR = re.compile(STRING + r"\s+" + STRING + r"@en")
+EXACT_VALUES = re.compile(r"VALUES \?name \{(.*?)\}\s*$", re.M)
+LABEL = re.compile(STRING + r"@en")
+CONTAINS = re.compile(r"bif:contains '([^']*)'")
+BATCH_CONTAINS = re.compile(
+    r"bif:contains '([^']*)'.*?BIND \(" + STRING + r" AS \?query\)\s*\}\s*LIMIT (\d+)", re.S)
+CONTAINS_TERM = re.compile(r'"(\w+)(\*?)"')
+REGEX = re.compile(r"regex\(\?name, " + STRING + r', "i"\)')
+BATCH_REGEX = re.compile(
+    r"regex\(\?name, " + STRING + r', "i"\)\).*?BIND \(' + STRING + r" AS \?query\)\s*\}\s*LIMIT (\d+)", re.S)
+LIMIT = re.compile(r"LIMIT (\d+)")
+OFFSET = re.compile(r"OFFSET (\d+)")
+
+
+class StubSPARQLServer:
+    '''
+    A threaded HTTP server that answers SPARQL queries from a fixture dataset.
+
+    Attributes
+    ----------
+    dataset : list of dict
+        The people the server knows about.
+    latency : float
+        Seconds to wait before answering each request.
+    error_rate : float
+        The fraction of requests answered with `error_status` instead of results.
+    error_status : int
+        The HTTP status used for injected errors.
+    request_count : int
+        The number of requests received so far.
+    url : str
+        The URL of the SPARQL endpoint, valid once the server is started.
+    '''
+
+    def __init__(self, dataset: list[dict], latency: float = 0.0, error_rate: float = 0.0,
+                 error_status: int = 503, host: str = "127.0.0.1", port: int = 0,
+                 seed: int | None = None) -> None:
+        '''
+        Initializes the server without starting it.
+
+        Parameters
+        ----------
+        dataset : list of dict
+            The people the server knows about.
+        latency : float, optional
+            Seconds to wait before answering each request. Defaults to 0.
+        error_rate : float, optional
+            The fraction of requests answered with an error. Defaults to 0.
+        error_status : int, optional
+            The HTTP status used for injected errors. Defaults to 503.
+        host : str, optional
+            The interface to listen on. Defaults to 127.0.0.1.
+        port : int, optional
+            The port to listen on; 0 picks a free port. Defaults to 0.
+        seed : int, optional
+            Seed for the error injection, for reproducible runs. Defaults to None.
+        '''
+        self.dataset = dataset
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.request_count = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "StubSPARQLServer":
+        '''
+        Creates a server seeded from a JSON dataset file.
+
+        Parameters
+        ----------
+        path : str
+            The path to the JSON dataset.
+        **kwargs
+            Additional keyword arguments passed to the constructor.
+        '''
+        with open(path, "r", encoding="utf8") as file:
+            return cls(json.load(file), **kwargs)
+
+    @property
+    def url(self) -> str:
+        '''
+        Returns the URL of the SPARQL endpoint.
+        '''
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/sparql"
+
+    def start(self) -> "StubSPARQLServer":
+        '''
+        Starts serving in a background thread.
+        '''
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        '''
+        Serves in the current thread until `stop` is called or the process is interrupted.
+        '''
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        '''
+        Stops the server and waits for the background thread to finish.
+        '''
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StubSPARQLServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def answer(self, query: str) -> tuple[int, dict | None]:
+        '''
+        Answers one query, applying the configured latency and error injection.
+
+        Returns
+        -------
+        status : int
+            The HTTP status of the response.
+        results : dict or None
+            The SPARQL JSON results, or None for an injected error.
+        '''
+        with self._lock:
+            self.request_count += 1
+            fail = self._random.random() < self.error_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            return self.error_status, None
+        return 200, evaluate(query, self.dataset)
+
+
+def evaluate(query: str, dataset: list[dict]) -> dict:
+    '''
+    Evaluates one of the query shapes sent by `Query` against `dataset`.
+
+    Parameters
+    ----------
+    query : str
+        The SPARQL query.
+    dataset : list of dict
+        The people to match against.
+
+    Returns
+    -------
+    results : dict
+        The results in SPARQL JSON format.
+    '''
+    matches = []
+    if batch := BATCH_VALUES.search(query):
+        for requested, label in BATCH_PAIR.findall(batch.group(1)):
+            matches += [dict(person, query=_unescape(requested))
+                        for person in dataset if person["name"] == _unescape(label)]
+    elif batch := BATCH_CONTAINS.findall(query):
+        # Each sub-select has its own LIMIT, so the whole batch is answered here.
+        for terms, requested, limit in batch:
+            terms = CONTAINS_TERM.findall(terms)
+            matches += [dict(person, query=_unescape(requested))
+                        for person in dataset if _contains(person["name"], terms)][:int(limit)]
+        return _results(matches)
+    elif batch := BATCH_REGEX.findall(query):
+        for pattern, requested, limit in batch:
+            pattern = re.compile(_unescape(pattern), re.I)
+            matches += [dict(person, query=_unescape(requested))
+                        for person in dataset if pattern.search(person["name"])][:int(limit)]
+        return _results(matches)
+    elif exact := EXACT_VALUES.search(query):
+        labels = {_unescape(label) for label in LABEL.findall(exact.group(1))}
+        matches = [person for person in dataset if person["name"] in labels]
+    elif contains := CONTAINS.search(query):
+        terms = CONTAINS_TERM.findall(contains.group(1))
+        matches = [person for person in dataset if _contains(person["name"], terms)]
+    elif regex := REGEX.search(query):
+        pattern = re.compile(_unescape(regex.group(1)), re.I)
+        matches = [person for person in dataset if pattern.search(person["name"])]
+
+    if "ORDER BY" in query:
+        matches.sort(key=lambda person: (person["name"], person["birthDate"]))
+    offset = int(OFFSET.search(query).group(1)) if OFFSET.search(query) else 0
+    limit = int(LIMIT.search(query).group(1)) if LIMIT.search(query) else len(matches)
+    return _results(matches[offset:offset + limit])
+
+
+def _results(matches: list[dict]) -> dict:
+    '''
+    Builds the SPARQL JSON results for the matched people.
+    '''
+    return {
+        "head": {"vars": ["query", "person", "name", "birthDate", "deathDate", "popularity"]},
+        "results": {"bindings": [_binding(person) for person in matches]},
+    }
+
+
+def _binding(person: dict) -> dict:
+    '''
+    Builds the result binding for one person, with an entity URI derived from
+    their name unless the dataset gives one.
+    '''
+    binding = {"person": {"type": "uri", "value": RESOURCE + person["name"].replace(" ", "_")}}
+    for key, value in person.items():
+        if value is None:
+            continue
+        if key == "uri":
+            binding["person"]["value"] = value
+        else:
+            binding[key] = {"type": "literal", "value": str(value)}
+    return binding
+
+
+def _contains(name: str, terms: list[tuple[str, str]]) -> bool:
+    '''
+    Checks that every full-text term matches a word of `name`, as a prefix if it ends in `*`.
+    '''
+    words = re.findall(r"\w+", name.casefold())
+    return all(
+        any(word.startswith(term.casefold()) if prefix else word == term.casefold() for word in words)
+        for term, prefix in terms
+    )
+
+
+def _unescape(value: str) -> str:
+    '''
+    Decodes the escape sequences produced by the query builder's string literals.
+    '''
+    return re.sub(r"\\(.)", lambda match: {"n": "\n", "r": "\r"}.get(match.group(1), match.group(1)), value)
+
+
+def _make_handler(server: StubSPARQLServer) -> type[BaseHTTPRequestHandler]:
+    '''
+    Builds a request handler class bound to `server`.
+    '''
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            self._respond(parse_qs(urlparse(self.path).query))
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length", 0))
+            self._respond(parse_qs(self.rfile.read(length).decode("utf8")))
+
+        def _respond(self, params: dict[str, list[str]]) -> None:
+            if "query" not in params:
+                self.send_error(400, "Missing query parameter")
+                return
+            status, results = server.answer(params["query"][0])
+            if results is None:
+                self.send_error(status)
+                return
+            body = json.dumps(results).encode("utf8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/sparql-results+json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args) -> None:
+            pass
+
+    return Handler
+
+
+def main() -> None:
+    '''
+    Runs the stand-in server in the foreground until interrupted.
+    '''
+    parser = argparse.ArgumentParser(description="Local stand-in for the DBpedia SPARQL endpoint")
+    parser.add_argument("--data", type=str, required=True, help="JSON dataset of people")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of delay per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP status of injected errors")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for error injection")
+    args = parser.parse_args()
+
+    server = StubSPARQLServer.from_file(
+        args.data, latency=args.latency, error_rate=args.error_rate,
+        error_status=args.error_status, port=args.port, seed=args.seed,
+    )
+    print(f"Serving {len(server.dataset)} people at {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()